@@ -0,0 +1,258 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.pipeline import Pipeline
+from app.regression import SparseOLSResults
+from app.rolling import RollingIRFs
+from app.snapshot import ModelSnapshot, load_snapshot, save_snapshot
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = 'artifacts'
+MANIFEST_NAME = 'manifest.json'
+
+# Libraries whose versions decide how pickled and Parquet artifacts load
+VERSIONED_LIBRARIES = ['numpy', 'pandas', 'pyarrow', 'statsmodels']
+
+# Parquet schema metadata holding a table's index frequency, which pandas does not write
+FREQ_METADATA = b'app.index_freq'
+
+# The stages the pages read; intermediate stages are recomputed from these if ever needed
+ARTIFACT_STAGES = ['layoffs', 'macro', 'differenced', 'lag_selection', 'fit', 'irf', 'snapshot', 'rolling_irfs',
+                   'specification_search', 'adf_levels', 'adf_differences', 'regression', 'regression_by_year']
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+    Fingerprints the code that computes and reads artifacts: the app's source files and the library versions.
+
+    Stage keys only cover the data and parameters, so a manifest written by other code,
+    whose stages may have other columns or classes, must not be served under them.
+
+    Returns:
+        str: A SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    package = os.path.dirname(os.path.abspath(__file__))
+    for file_name in sorted(name for name in os.listdir(package) if name.endswith('.py')):
+        digest.update(file_name.encode())
+        with open(os.path.join(package, file_name), 'rb') as handle:
+            digest.update(handle.read())
+    for library in VERSIONED_LIBRARIES:
+        try:
+            digest.update(f'{library}=={metadata.version(library)}'.encode())
+        except metadata.PackageNotFoundError:
+            digest.update(f'{library} missing'.encode())
+    return digest.hexdigest()
+
+
+def _replace_atomically(path: str, write: Callable[[str], None]) -> None:
+    """Writes through a temporary file so readers never see a partial artifact."""
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    write(temporary_path)
+    os.replace(temporary_path, path)
+
+
+def _write_table(table: pd.DataFrame, path: str) -> None:
+    arrow = pa.Table.from_pandas(table)
+    freq = getattr(table.index, 'freqstr', None)
+    if freq:
+        arrow = arrow.replace_schema_metadata({**(arrow.schema.metadata or {}), FREQ_METADATA: freq.encode()})
+    pq.write_table(arrow, path)
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    table = pd.read_parquet(path)
+    freq = (pq.read_schema(path).metadata or {}).get(FREQ_METADATA)
+    if freq:
+        table.index = pd.DatetimeIndex(table.index, freq=freq.decode())
+    return table
+
+
+def _write_json(path: str, payload: dict) -> None:
+    def write(temporary_path):
+        with open(temporary_path, 'w') as handle:
+            json.dump(payload, handle)
+    _replace_atomically(path, write)
+
+
+def save_artifact(directory: str, name: str, value: Any) -> str:
+    """
+    Writes a stage value in the most portable format its type allows.
+
+    Tables are written as Parquet, with the frequency of a date index kept in the file's metadata, regression results and rolling IRFs as JSON, model
+    snapshots as .npz archives, and anything else (the fitted VAR and its IRFs) as a pickle.
+
+    Parameters:
+        directory (str): The artifact directory.
+        name (str): The stage name, used as the file stem.
+        value (Any): The value to write.
+
+    Returns:
+        str: The file name, relative to the directory.
+    """
+    if isinstance(value, pd.DataFrame):
+        file_name = f'{name}.parquet'
+        _replace_atomically(os.path.join(directory, file_name), lambda path: _write_table(value, path))
+    elif isinstance(value, SparseOLSResults):
+        file_name = f'{name}.json'
+        payload = {field: getattr(value, field) for field in value._fields}
+        for field in ('params', 'bse', 'tvalues', 'pvalues'):
+            payload[field] = {'index': list(payload[field].index), 'values': payload[field].tolist()}
+        _write_json(os.path.join(directory, file_name), {'type': 'SparseOLSResults', **payload})
+    elif isinstance(value, ModelSnapshot):
+        file_name = f'{name}.npz'
+        _replace_atomically(os.path.join(directory, file_name), lambda path: save_snapshot(path, value))
+    elif isinstance(value, RollingIRFs):
+        file_name = f'{name}.json'
+        _write_json(os.path.join(directory, file_name),
+                    {'type': 'RollingIRFs', 'ends': [str(end) for end in value.ends], 'freq': value.ends.freqstr,
+                     'irfs': value.irfs.tolist(), 'impulses': value.impulses, 'response': value.response})
+    else:
+        file_name = f'{name}.pickle'
+
+        def write(temporary_path):
+            with open(temporary_path, 'wb') as handle:
+                pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        _replace_atomically(os.path.join(directory, file_name), write)
+    return file_name
+
+
+def load_artifact(path: str) -> Any:
+    """
+    Reads a value written by save_artifact.
+
+    Pickled artifacts can run arbitrary code when loaded, so only read artifacts
+    from a directory written by a trusted batch run.
+
+    Parameters:
+        path (str): The path to the artifact file.
+
+    Returns:
+        Any: The stage value.
+    """
+    if path.endswith('.parquet'):
+        return _read_table(path)
+    if path.endswith('.npz'):
+        return load_snapshot(path)
+    if path.endswith('.pickle'):
+        with open(path, 'rb') as handle:
+            return pickle.load(handle)
+    with open(path) as handle:
+        payload = json.load(handle)
+    kind = payload.pop('type')
+    if kind == 'SparseOLSResults':
+        for field in ('params', 'bse', 'tvalues', 'pvalues'):
+            payload[field] = pd.Series(payload[field]['values'], index=payload[field]['index'], dtype=float)
+        return SparseOLSResults(**payload)
+    if kind == 'RollingIRFs':
+        return RollingIRFs(pd.DatetimeIndex(payload['ends'], freq=payload.get('freq')), np.asarray(payload['irfs']), payload['impulses'],
+                           payload['response'])
+    raise ValueError(f"Unknown artifact type: {kind}")
+
+
+def write_artifacts(pipeline: Pipeline, directory: str = ARTIFACT_DIR,
+                    stages: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Computes pipeline stages and writes each one with its key, followed by a manifest.
+
+    The manifest is written last, so a reader sees either the previous complete set
+    of artifacts or the new one. It records the code version, so the artifacts are
+    only served to the same code.
+
+    Parameters:
+        pipeline (Pipeline): The pipeline to evaluate.
+        directory (str): Where to write the artifacts.
+        stages (Optional[List[str]]): The stages to write; defaults to ARTIFACT_STAGES.
+
+    Returns:
+        Dict[str, Any]: The manifest, mapping each stage to its key, file and computation time.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = {'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'code_version': code_version(), 'stages': {}}
+    for name in stages or ARTIFACT_STAGES:
+        start = time.perf_counter()
+        value = pipeline.get(name)
+        seconds = time.perf_counter() - start
+        manifest['stages'][name] = {'key': pipeline.key(name), 'file': save_artifact(directory, name, value),
+                                    'seconds': seconds}
+        logger.info("Wrote %s in %.3fs", name, seconds)
+    _write_json(os.path.join(directory, MANIFEST_NAME), manifest)
+    return manifest
+
+
+class ArtifactStore:
+    """
+    Serves precomputed stage values to a pipeline, by stage key.
+
+    Used as a pipeline runner, the store returns the artifact written for a key
+    without evaluating the stage or anything upstream of it, and computes the stage
+    only when no artifact matches, for example after the input files changed. The
+    manifest is re-read when it changes on disk, so a new batch run is picked up
+    without a restart. A manifest written by another version of the code is
+    ignored. The directory must be trusted, since artifacts are unpickled.
+    """
+
+    def __init__(self, directory: str = ARTIFACT_DIR, version: Optional[str] = None):
+        """
+        Opens the store.
+
+        Parameters:
+            directory (str): The directory written by write_artifacts.
+            version (Optional[str]): The code version artifacts must have been written by; defaults to code_version().
+        """
+        self.directory = directory
+        self.version = version or code_version()
+        self._files: Dict[str, str] = {}
+        self._manifest_mtime_ns: Optional[int] = None
+
+    def _refresh(self) -> None:
+        manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        try:
+            mtime_ns = os.stat(manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            self._files, self._manifest_mtime_ns = {}, None
+            return
+        if mtime_ns != self._manifest_mtime_ns:
+            with open(manifest_path) as handle:
+                manifest = json.load(handle)
+            if manifest.get('code_version') == self.version:
+                self._files = {stage['key']: stage['file'] for stage in manifest['stages'].values()}
+            else:
+                logger.warning("Ignoring the artifacts in %s: they were written by another version of the code.",
+                               self.directory)
+                self._files = {}
+            self._manifest_mtime_ns = mtime_ns
+
+    def __contains__(self, key: str) -> bool:
+        self._refresh()
+        return key in self._files
+
+    def run(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the artifact stored for a key, or computes the value if there is none.
+
+        Parameters:
+            key (str): The stage key from Pipeline.key.
+            compute (Callable[[], Any]): Computes the stage on a miss.
+
+        Returns:
+            Any: The value of the stage.
+        """
+        self._refresh()
+        if key in self._files:
+            return load_artifact(os.path.join(self.directory, self._files[key]))
+        return compute()
@@ -0,0 +1,168 @@
+from concurrent.futures import as_completed
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.pools import worker_pool
+from app.var import get_irf
+
+
+def orthogonal_irfs(coefs: np.ndarray, sigma_u: np.ndarray, periods: int) -> np.ndarray:
+    """
+    Computes orthogonalized impulse responses for a batch of VAR models at once.
+
+    Parameters:
+        coefs (np.ndarray): Lag coefficient matrices with shape (batch, lags, neqs, neqs).
+        sigma_u (np.ndarray): Residual covariance matrices with shape (batch, neqs, neqs).
+        periods (int): The number of periods after the shock.
+
+    Returns:
+        np.ndarray: The responses with shape (batch, periods + 1, neqs, neqs), laid out
+        like IRAnalysis.orth_irfs for each model.
+    """
+    batch, lags, neqs, _ = coefs.shape
+    ma_coefs = np.zeros((batch, periods + 1, neqs, neqs))
+    ma_coefs[:, 0] = np.eye(neqs)
+    for horizon in range(1, periods + 1):
+        for lag in range(1, min(horizon, lags) + 1):
+            ma_coefs[:, horizon] += ma_coefs[:, horizon - lag] @ coefs[:, lag - 1]
+    chol = np.linalg.cholesky(sigma_u)
+    return ma_coefs @ chol[:, None]
+
+
+def _simulate_batch(endog: np.ndarray, coefs: np.ndarray, intercept: np.ndarray, resid: np.ndarray,
+                    sigma_u: np.ndarray, periods: int, repl: int, method: str, seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Simulates, refits and computes orthogonalized IRFs for one batch of replications.
+
+    Every array operation covers the whole batch; the only Python loops run over
+    time and lag order.
+
+    Returns:
+        np.ndarray: The simulated responses with shape (repl, periods + 1, neqs, neqs).
+    """
+    rng = np.random.default_rng(seed)
+    lags, neqs, _ = coefs.shape
+    nobs = len(endog)
+
+    if method == 'bootstrap':
+        # Recentred residuals, resampled with replacement
+        centred = resid - resid.mean(axis=0)
+        shocks = centred[rng.integers(0, len(centred), size=(repl, nobs - lags))]
+    else:
+        shocks = rng.multivariate_normal(np.zeros(neqs), sigma_u, size=(repl, nobs - lags))
+
+    # Every replication starts from the observed presample values
+    sample = np.empty((repl, nobs, neqs))
+    sample[:, :lags] = endog[:lags]
+    for t in range(lags, nobs):
+        step = intercept + shocks[:, t - lags]
+        for lag in range(1, lags + 1):
+            step = step + sample[:, t - lag] @ coefs[lag - 1].T
+        sample[:, t] = step
+
+    # Refit every replication with batched normal equations
+    design = np.empty((repl, nobs - lags, 1 + neqs * lags))
+    design[:, :, 0] = 1.
+    for lag in range(1, lags + 1):
+        design[:, :, 1 + neqs * (lag - 1):1 + neqs * lag] = sample[:, lags - lag:nobs - lag]
+    target = sample[:, lags:]
+    transposed = design.transpose(0, 2, 1)
+    params = np.linalg.solve(transposed @ design, transposed @ target)
+    residuals = target - design @ params
+    df_resid = nobs - lags - (1 + neqs * lags)
+    sim_sigma = residuals.transpose(0, 2, 1) @ residuals / df_resid
+
+    # params rows are the constant then lag blocks; coefs[i] is the transpose of a block
+    sim_coefs = params[:, 1:].reshape(repl, lags, neqs, neqs).transpose(0, 1, 3, 2)
+    return orthogonal_irfs(sim_coefs, sim_sigma, periods)
+
+
+def iter_irf_error_bands(fitted_model, periods: int = 20, repl: int = 1000, signif: float = 0.05,
+                         seed: int = 0, method: str = 'bootstrap', batch_size: int = 100,
+                         max_workers: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Computes IRF error bands by simulation, yielding the bands as replications complete.
+
+    The replications are split into batches, each with its own seed spawned from the
+    given seed, so the final bands do not depend on the number of workers or on the
+    order in which batches finish.
+
+    Parameters:
+        fitted_model (VARResultsWrapper): The fitted VAR model with a constant term.
+        periods (int): The number of periods after the shock.
+        repl (int): The number of replications.
+        signif (float): The significance level; the bands cover 1 - signif.
+        seed (int): The seed for the random number generator.
+        method (str): 'bootstrap' resamples the residuals, 'mc' draws normal errors from sigma_u.
+        batch_size (int): The number of replications simulated together as one array.
+        max_workers (Optional[int]): Number of worker processes; 0 runs every batch in this process.
+
+    Yields:
+        Tuple[int, np.ndarray, np.ndarray]: The number of finished replications and the
+        lower and upper bands so far, each with shape (periods + 1, neqs, neqs).
+    """
+    if method not in ('bootstrap', 'mc'):
+        raise ValueError(f"Unknown error band method: {method}")
+    if fitted_model.k_trend != 1:
+        raise ValueError("Error bands are only implemented for VAR models with a constant term.")
+
+    endog = np.asarray(fitted_model.endog, dtype=float)
+    coefs = np.asarray(fitted_model.coefs)
+    intercept = np.asarray(fitted_model.intercept)
+    resid = np.asarray(fitted_model.resid, dtype=float)
+    sigma_u = np.asarray(fitted_model.sigma_u)
+
+    sizes = [min(batch_size, repl - start) for start in range(0, repl, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(endog, coefs, intercept, resid, sigma_u, periods, size, method, batch_seed)
+             for size, batch_seed in zip(sizes, seeds)]
+
+    draws = [None] * len(tasks)
+
+    def bands_so_far():
+        finished = np.concatenate([batch for batch in draws if batch is not None])
+        lower = np.quantile(finished, signif / 2, axis=0)
+        upper = np.quantile(finished, 1 - signif / 2, axis=0)
+        return len(finished), lower, upper
+
+    if max_workers == 0:
+        for index, task in enumerate(tasks):
+            draws[index] = _simulate_batch(*task)
+            yield bands_so_far()
+        return
+
+    # Closing the generator early cancels the batches not started yet instead of waiting for them
+    with worker_pool('process', max_workers) as executor:
+        futures = {executor.submit(_simulate_batch, *task): index for index, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            draws[futures[future]] = future.result()
+            yield bands_so_far()
+
+
+def irf_error_bands(fitted_model, periods: int = 20, repl: int = 1000, signif: float = 0.05, seed: int = 0,
+                    method: str = 'bootstrap', batch_size: int = 100,
+                    max_workers: Optional[int] = None) -> Tuple[object, np.ndarray, np.ndarray]:
+    """
+    Computes the impulse response functions together with simulated error bands.
+
+    Parameters:
+        fitted_model (VARResultsWrapper): The fitted VAR model with a constant term.
+        periods (int): The number of periods after the shock.
+        repl (int): The number of replications.
+        signif (float): The significance level; the bands cover 1 - signif.
+        seed (int): The seed for the random number generator.
+        method (str): 'bootstrap' resamples the residuals, 'mc' draws normal errors from sigma_u.
+        batch_size (int): The number of replications simulated together as one array.
+        max_workers (Optional[int]): Number of worker processes; 0 runs every batch in this process.
+
+    Returns:
+        Tuple[IRAnalysis, np.ndarray, np.ndarray]: The impulse response functions from get_irf
+        and the lower and upper bands of the orthogonalized responses.
+    """
+    irf = get_irf(fitted_model, periods=periods)
+    lower = upper = None
+    for _, lower, upper in iter_irf_error_bands(fitted_model, periods, repl, signif, seed, method,
+                                                batch_size, max_workers):
+        pass
+    return irf, lower, upper
@@ -0,0 +1,326 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Run as a script from the repository root, like main.py
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.display import perform_regression_analysis
+from app.regression import fit_regression
+from app.var import difference_variables, fit_var_model_and_select_lags, get_irf, load_data, prepare_raw_data
+
+BASELINE_PATH = 'benchmarks/baseline.json'
+
+# The web app and the repository root it is started from
+APP_PATH = str(Path(__file__).resolve().parent / 'main.py')
+REPOSITORY_ROOT = str(Path(__file__).resolve().parents[2])
+
+# Run in a fresh interpreter so nothing is imported or cached yet; each prints seconds and peak RSS in KiB
+# (ru_maxrss would include the benchmark process itself, since Linux keeps it across exec)
+PEAK_RSS = "int(next(line for line in open('/proc/self/status') if line.startswith('VmHWM')).split()[1])"
+IMPORT_PROBE = f'''
+import sys, time
+sys.path.insert(0, 'src')
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start, {PEAK_RSS})
+'''
+FIRST_RUN_PROBE = f'''
+import sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=300).run()
+assert not app.exception, app.exception
+print(time.perf_counter() - start, {PEAK_RSS})
+'''
+
+# A stage regresses when it is this fraction slower, or uses this fraction more memory, than its baseline
+DEFAULT_THRESHOLD = 0.5
+
+# Measurements below these floors are too noisy to compare as a fraction
+MIN_SECONDS = 0.005
+MIN_BYTES = 64 * 1024
+
+MACRO_COLUMNS = ['FEDFUNDS', 'CORESTICKM159SFRBATL', 'INDPRO', 'LAYOFFS', 'UNCERTAINTY']
+INDUSTRIES = ['Consumer', 'Crypto', 'Finance', 'Healthcare', 'Retail', 'Transportation', 'Other']
+STAGES = ['Seed', 'Series A', 'Series B', 'Series C', 'Post-IPO', 'Acquired', 'Unknown']
+
+
+class BenchmarkSize(NamedTuple):
+    """The dimensions of one synthetic data set."""
+    name: str
+    months: int
+    extra_variables: int
+    maxlags: int
+    companies: int
+
+
+# The medium size matches the shipped data: 23 years of monthly observations and 12 lags
+BENCHMARK_SIZES = [
+    BenchmarkSize('small', 120, 0, 4, 500),
+    BenchmarkSize('medium', 277, 0, 12, 2000),
+    BenchmarkSize('large', 600, 3, 12, 20000),
+]
+
+
+def synthetic_macro(months: int, extra_variables: int = 0, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a raw macro panel shaped like the shipped CSV, ready for var.prepare_raw_data.
+
+    The five model variables follow a stable VAR(1), with the price index and
+    industrial production cumulated into levels so that differencing recovers it.
+    Extra variables are white noise named X1, X2, ...
+
+    Parameters:
+        months (int): The number of monthly observations.
+        extra_variables (int): The number of additional series.
+        seed (int): The random seed.
+
+    Returns:
+        pd.DataFrame: An observation_date column formatted as month/day/year, followed by the series.
+    """
+    rng = np.random.default_rng(seed)
+    neqs = len(MACRO_COLUMNS)
+    coefs = 0.5 * np.eye(neqs) + 0.05 * rng.standard_normal((neqs, neqs))
+    values = np.zeros((months, neqs))
+    for t in range(1, months):
+        values[t] = coefs @ values[t - 1] + rng.standard_normal(neqs)
+    data = pd.DataFrame(values + [2., 0., 0., 20., 100.], columns=MACRO_COLUMNS)
+    data['CORESTICKM159SFRBATL'] = 100 + data['CORESTICKM159SFRBATL'].cumsum()
+    data['INDPRO'] = 100 + data['INDPRO'].cumsum()
+    for i in range(1, extra_variables + 1):
+        data[f'X{i}'] = rng.standard_normal(months)
+    dates = pd.date_range('2000-01-01', periods=months, freq='MS').strftime('%m/%d/%Y')
+    data.insert(0, 'observation_date', dates)
+    return data
+
+
+def synthetic_layoffs(companies: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a layoffs table with both the dummy columns perform_regression_analysis expects
+    and the categorical columns regression.fit_regression encodes.
+
+    Parameters:
+        companies (int): The number of rows.
+        seed (int): The random seed.
+
+    Returns:
+        pd.DataFrame: The synthetic layoffs data.
+    """
+    rng = np.random.default_rng(seed)
+    raised = rng.lognormal(4, 1.5, size=companies)
+    industry = pd.Categorical(rng.choice(INDUSTRIES, size=companies), categories=INDUSTRIES)
+    stage = pd.Categorical(rng.choice(STAGES, size=companies), categories=STAGES)
+    laid_off = np.abs(50 + 0.05 * raised + rng.normal(0, 40, size=companies)).round()
+    data = pd.DataFrame({'# Laid Off': laid_off, '$ Raised (mm)': raised, '$ Raised (mm)^2': raised ** 2,
+                         'Industry': industry, 'Stage': stage})
+    data.loc[rng.random(companies) < 0.1, '$ Raised (mm)'] = np.nan
+    dummies = pd.get_dummies(data[['Industry', 'Stage']], drop_first=True, dtype=float)
+    return pd.concat([data, dummies], axis=1)
+
+
+def measure(func: Callable, *args: Any, repeat: int = 3) -> Tuple[Any, float, int]:
+    """
+    Times a call and measures its peak Python memory allocation.
+
+    The call runs repeat times without tracing and the fastest time is kept; one
+    more traced run measures the peak memory, since tracing slows the call down.
+
+    Parameters:
+        func (Callable): The function to measure.
+        args (Any): The arguments to pass on every call.
+        repeat (int): The number of timed calls.
+
+    Returns:
+        Tuple[Any, float, int]: The result of the last call, the fastest time in seconds and the peak bytes.
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = min(seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def run_size(size: BenchmarkSize, repeat: int = 3, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Measures every stage of the VAR and regression pipeline on one synthetic data set.
+
+    Parameters:
+        size (BenchmarkSize): The dimensions of the data.
+        repeat (int): The number of timed calls per stage.
+        seed (int): The random seed.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The seconds and peak_bytes of each stage, keyed '<stage>[<size>]'.
+    """
+    raw = synthetic_macro(size.months, size.extra_variables, seed)
+    layoffs = synthetic_layoffs(size.companies, seed)
+    extra = [column for column in raw.columns if column.startswith('X')]
+    results = {}
+
+    def record(stage, func, *args):
+        result, seconds, peak = measure(func, *args, repeat=repeat)
+        results[f'{stage}[{size.name}]'] = {'seconds': seconds, 'peak_bytes': peak}
+        return result
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'macro.csv')
+        raw.to_csv(path, index=False)
+        loaded = record('load_data', load_data, path)
+    # prepare_raw_data and difference_variables modify their input, so each call gets a copy
+    prepared = record('prepare_raw_data', lambda: prepare_raw_data(loaded.copy()))
+    differenced = record('difference_variables', lambda: difference_variables(prepared.copy()))
+    var_data = differenced.join(prepared[extra])
+    fitted, _ = record('fit_var_model_and_select_lags', fit_var_model_and_select_lags, var_data, size.maxlags)
+    record('get_irf', get_irf, fitted)
+    record('perform_regression_analysis', perform_regression_analysis, layoffs)
+    record('fit_regression', fit_regression, layoffs)
+    return results
+
+
+def run_benchmarks(sizes: List[BenchmarkSize], repeat: int = 3, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Measures every stage at every size.
+
+    Parameters:
+        sizes (List[BenchmarkSize]): The data sets to generate.
+        repeat (int): The number of timed calls per stage.
+        seed (int): The random seed.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The measurements of every stage and size.
+    """
+    # perform_regression_analysis writes to Streamlit, which warns about the missing app on every call;
+    # Streamlit resets its log levels when it reads its configuration, so the records are filtered instead
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).addFilter(lambda record: False)
+    results = {}
+    for size in sizes:
+        results.update(run_size(size, repeat, seed))
+    return results
+
+
+def measure_startup(repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Measures how long a new app process takes to import its modules and to finish its first page.
+
+    Each measurement runs in a fresh interpreter from the repository root, so it
+    includes every import and reads the precomputed artifacts if they exist, as a
+    new container would. The first page run covers the landing page with Streamlit's
+    test harness instead of a browser.
+
+    Parameters:
+        repeat (int): The number of fresh processes per measurement; the fastest is kept.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The seconds and peak resident bytes of 'import_app[startup]'
+        and 'first_run[startup]'.
+    """
+    results = {}
+    for stage, arguments in [('import_app', ['-c', IMPORT_PROBE]), ('first_run', ['-c', FIRST_RUN_PROBE, APP_PATH])]:
+        runs = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, *arguments], cwd=REPOSITORY_ROOT, capture_output=True,
+                                    text=True, check=True).stdout.split()
+            runs.append((float(output[-2]), int(output[-1]) * 1024))
+        seconds, peak = min(runs)
+        results[f'{stage}[startup]'] = {'seconds': seconds, 'peak_bytes': peak}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Lists the stages that are slower or use more memory than their baseline by more than the threshold.
+
+    Stages missing from the baseline are not compared, and measurements under
+    MIN_SECONDS or MIN_BYTES are only flagged once they exceed those floors.
+
+    Parameters:
+        results (Dict[str, Dict[str, float]]): The new measurements.
+        baseline (Dict[str, Dict[str, float]]): The stored measurements.
+        threshold (float): The allowed relative increase.
+
+    Returns:
+        List[str]: One message per regression.
+    """
+    regressions = []
+    for stage, measured in results.items():
+        if stage not in baseline:
+            continue
+        expected = baseline[stage]
+        allowed_seconds = max(expected['seconds'] * (1 + threshold), MIN_SECONDS)
+        if measured['seconds'] > allowed_seconds:
+            regressions.append(f"{stage}: {measured['seconds']:.4f}s against a baseline of {expected['seconds']:.4f}s")
+        if measured['peak_bytes'] > max(expected['peak_bytes'] * (1 + threshold), MIN_BYTES):
+            regressions.append(f"{stage}: {measured['peak_bytes'] / 1024:.0f} KiB peak against a baseline of "
+                               f"{expected['peak_bytes'] / 1024:.0f} KiB")
+    return regressions
+
+
+def environment() -> Dict[str, str]:
+    """Describes the machine and library versions, stored with the baseline for reference."""
+    import statsmodels
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system(),
+            'processor': platform.processor(), 'cpus': str(os.cpu_count()), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'statsmodels': statsmodels.__version__}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the VAR and regression pipeline on synthetic data.")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="the JSON file holding the baseline")
+    parser.add_argument('--update', action='store_true', help="store the measurements as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="the allowed relative increase")
+    parser.add_argument('--repeat', type=int, default=3, help="the number of timed calls per stage")
+    parser.add_argument('--sizes', nargs='+', choices=[size.name for size in BENCHMARK_SIZES] + ['startup'],
+                        default=[size.name for size in BENCHMARK_SIZES] + ['startup'],
+                        help="the data sizes to run; 'startup' measures the app's import and first page run")
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in BENCHMARK_SIZES if size.name in args.sizes]
+    results = run_benchmarks(sizes, args.repeat)
+    if 'startup' in args.sizes:
+        results.update(measure_startup(args.repeat))
+    for stage, measured in results.items():
+        print(f"{stage:45} {measured['seconds']:9.4f}s {measured['peak_bytes'] / 1024:10.0f} KiB")
+
+    if args.update:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as handle:
+            json.dump({'environment': environment(), 'results': results}, handle, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update to create one")
+        return 0
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    regressions = compare(results, baseline['results'], args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+from typing import Any, Callable, Optional, Tuple
+
+import streamlit as st
+
+from app.artifacts import ArtifactStore
+from app.figures import FigureCache
+from app.forecast import Forecaster
+from app.incremental import IncrementalLagSelection
+from app.jobs import JobQueue
+from app.pipeline import Pipeline, build_pipeline
+from app.profiling import serve_metrics
+from app.sources import SCHEMAS, DataSource, open_source
+from app.sources import file_fingerprint as cached_file_fingerprint
+
+# Entries are evicted after this many seconds so a long-running server picks up
+# refreshed data files even if nobody restarts it.
+CACHE_TTL = 60 * 60
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Computes a fingerprint of a file from its contents.
+
+    The file is only rehashed when its size or modification time changed, so the
+    keys can be recomputed on every rerun.
+
+    Parameters:
+        path (str): The path to the file.
+
+    Returns:
+        str: The SHA-256 hex digest of the file contents.
+    """
+    return cached_file_fingerprint(path)
+
+
+@st.cache_resource
+def get_data_source(location: str, kind: str) -> DataSource:
+    """
+    Opens a data source once per process, so database sources share one connection pool across sessions.
+
+    Parameters:
+        location (str): A file path or SQLite URL, as accepted by sources.open_source.
+        kind (str): 'layoffs' or 'macro', which selects the schema.
+
+    Returns:
+        DataSource: The source.
+    """
+    return open_source(location, SCHEMAS[kind])
+
+
+@st.cache_resource
+def get_lag_selection(location: str, maxlags: int) -> IncrementalLagSelection:
+    """
+    Returns the lag selection of a macro source, shared by the pipelines built as its data changes.
+
+    Parameters:
+        location (str): The location of the macro table.
+        maxlags (int): The maximum number of lags to consider.
+
+    Returns:
+        IncrementalLagSelection: The lag selection; a new version of the data that only adds months
+        is appended to the estimates of the previous one.
+    """
+    return IncrementalLagSelection(maxlags)
+
+
+@st.cache_resource(ttl=CACHE_TTL, show_spinner=False)
+def run_cached_stage(key: str, _compute: Callable[[], Any]) -> Any:
+    """
+    Computes a pipeline stage once per key and shares the result across reruns and sessions.
+
+    The key covers the input file contents and every parameter the stage depends on,
+    so the computation itself is left out of the hash. Results are shared rather
+    than copied, so callers must not mutate them.
+
+    Parameters:
+        key (str): The stage key from Pipeline.key.
+        _compute (Callable[[], Any]): Computes the stage on a cache miss.
+
+    Returns:
+        Any: The value of the stage.
+    """
+    return _compute()
+
+
+@st.cache_resource
+def get_artifact_store(directory: str) -> ArtifactStore:
+    """
+    Returns the store of precomputed artifacts in a directory, shared by all sessions.
+
+    Parameters:
+        directory (str): The directory written by the batch runner (cli.py).
+
+    Returns:
+        ArtifactStore: The store; it re-reads its manifest when a new batch run replaces it.
+    """
+    return ArtifactStore(directory)
+
+
+def build_cached_pipeline(layoffs_path: str, macro_path: str, maxlags: int,
+                          artifact_dir: Optional[str] = None) -> Pipeline:
+    """
+    Builds the analysis pipeline with every stage cached by its key.
+
+    With an artifact directory, a stage missing from the Streamlit cache is read from
+    the artifacts written by cli.py for the same key, and only computed if there is
+    none, so a server started after a batch run does no econometrics at all.
+
+    Parameters:
+        layoffs_path (str): The location of the layoffs table: a CSV or Parquet file or a SQLite URL.
+        macro_path (str): The location of the macro table.
+        maxlags (int): The maximum number of lags to consider.
+        artifact_dir (Optional[str]): The directory of precomputed artifacts, if any.
+
+    Returns:
+        Pipeline: The pipeline; stages are only computed when a page requests them.
+    """
+    runner = run_cached_stage
+    if artifact_dir is not None:
+        store = get_artifact_store(artifact_dir)
+
+        def runner(key, compute):
+            return run_cached_stage(key, lambda: store.run(key, compute))
+
+    return build_pipeline(get_data_source(layoffs_path, 'layoffs'), get_data_source(macro_path, 'macro'), maxlags,
+                          fingerprint=file_fingerprint, runner=runner,
+                          lag_selection=get_lag_selection(macro_path, maxlags))
+
+
+@st.cache_resource(ttl=CACHE_TTL)
+def get_irf_band_store() -> dict:
+    """
+    Returns the store of finished IRF error bands shared by all sessions.
+
+    Bands are computed incrementally while the page draws them, so they cannot go
+    through a cached function; the caller puts the final bands here instead, keyed by
+    the data fingerprint and the simulation settings.
+
+    Returns:
+        dict: The store mapping keys to (lower, upper) band arrays.
+    """
+    return {}
+
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    """
+    Returns the store of rendered figures shared by all sessions.
+
+    Figures are keyed by the model fingerprint, so they are not tied to the TTL of
+    the pipeline stages; the store's own size limit bounds its memory instead.
+
+    Returns:
+        FigureCache: The figure store and its render worker.
+    """
+    return FigureCache()
+
+
+@st.cache_resource(ttl=CACHE_TTL, show_spinner=False)
+def get_forecaster(key: str, _snapshot, steps: int, conditioned: Tuple[str, ...]) -> Forecaster:
+    """
+    Returns the forecaster of a fitted model for a horizon and a set of conditioned variables.
+
+    The forecaster holds the precomputed response of the forecasts to the scenario
+    paths, so moving a scenario slider only costs one matrix product.
+
+    Parameters:
+        key (str): Identifies the fitted model, such as Pipeline.key('snapshot').
+        _snapshot (ModelSnapshot): The fitted model's arrays.
+        steps (int): The forecast horizon.
+        conditioned (Tuple[str, ...]): The variables whose paths the scenarios set.
+
+    Returns:
+        Forecaster: The forecaster.
+    """
+    return Forecaster(_snapshot, steps, conditioned)
+
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """
+    Returns the background job queue shared by all sessions.
+
+    Long stages are computed on its workers instead of the script thread, once per
+    stage key, and their results stay in the queue's store, so sessions asking
+    for the same analysis wait on one computation.
+
+    Returns:
+        JobQueue: The queue and its result store.
+    """
+    return JobQueue()
+
+
+@st.cache_resource
+def start_metrics_server(port: int):
+    """
+    Starts the Prometheus metrics endpoint once per process, however many sessions rerun the app.
+
+    Parameters:
+        port (int): The local port to serve /metrics on.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+    return serve_metrics(port)
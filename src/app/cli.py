@@ -0,0 +1,43 @@
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# Run as a script from the repository root, like main.py; nothing here imports Streamlit
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.artifacts import ARTIFACT_DIR, ARTIFACT_STAGES, write_artifacts
+from app.ingest import file_sha256
+from app.pipeline import LAYOFFS_PATH, MACRO_PATH, MAXLAGS, build_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run the layoffs analysis without the web app and write its results as artifacts.")
+    parser.add_argument('--layoffs', default=LAYOFFS_PATH,
+                        help="the layoffs table: a CSV or Parquet file, or sqlite:///<database>?table=<table>")
+    parser.add_argument('--macro', default=MACRO_PATH, help="the macro table, in the same forms as --layoffs")
+    parser.add_argument('--maxlags', type=int, default=MAXLAGS, help="the maximum number of VAR lags to consider")
+    parser.add_argument('--periods', type=int, default=20, help="the number of IRF periods")
+    parser.add_argument('--out', default=ARTIFACT_DIR, help="the directory to write the artifacts to")
+    parser.add_argument('--stages', nargs='+', choices=ARTIFACT_STAGES, default=ARTIFACT_STAGES,
+                        help="the stages to write")
+    parser.add_argument('--quiet', action='store_true', help="only report errors")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format='%(message)s')
+    start = time.perf_counter()
+    # Keys use the same file fingerprints as the app, so the app finds these artifacts by key
+    pipeline = build_pipeline(args.layoffs, args.macro, args.maxlags, args.periods, fingerprint=file_sha256)
+    manifest = write_artifacts(pipeline, args.out, args.stages)
+    logger.info("Wrote %d artifacts to %s in %.2fs", len(manifest['stages']), args.out,
+                time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
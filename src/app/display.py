@@ -1,11 +1,24 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import statsmodels.api as sm
-from typing import Tuple
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from app.largevar import LARGE_VAR_EQUATIONS, LargeVarResults, equation_statistics
+from app.lazy import lazy_import
+from app.profiling import profiled
+from app.tables import FILTER_COLUMNS, PAGE_SIZES, page_count
 
+# Only the pages that fit a regression or draw a figure pay for these imports
+sm = lazy_import('statsmodels.api')
+plt = lazy_import('matplotlib.pyplot')
 
+# How often a page waiting for a background job refreshes its progress bar
+JOB_POLL_SECONDS = 0.2
+
+
+
+@profiled
 def plot_irfs(irf, independent_var: str, description: str) -> None:
     """
     Plots impulse response functions (IRFs) showing the response of LAYOFFS to a shock in the specified independent variable.
@@ -22,23 +35,238 @@ def plot_irfs(irf, independent_var: str, description: str) -> None:
     st.write(description)
     fig = irf.plot(impulse=independent_var, response='LAYOFFS', orth=True, subplot_params={'title': f'Response of LAYOFFS to a shock in {independent_var}'})
     st.pyplot(fig)
+    plt.close(fig)
+
+
+def display_irf_figures(figures: Dict[str, Future], descriptions: List[str]) -> None:
+    """
+    Shows pre-rendered IRF figures, writing every heading and description before waiting for any image.
+
+    Parameters:
+    - figures (Dict[str, Future]): Futures resolving to the PNG bytes of each impulse's figure, as returned by figures.prerender_irfs.
+    - descriptions (List[str]): The description of each figure, in the same order.
+
+    Returns:
+    None. Each figure replaces its placeholder as soon as it is rendered.
+    """
+    placeholders = []
+    for independent_var, description in zip(figures, descriptions):
+        st.write(" ")
+        st.write(f"**Graph for {independent_var}**")
+        st.write(description)
+        placeholders.append(st.empty())
+    for placeholder, future in zip(placeholders, figures.values()):
+        if not future.done():
+            placeholder.caption("Rendering...")
+        placeholder.image(future.result())
+
+
+@profiled
+def display_irf_bands(irf, band_updates: Iterable[Tuple[int, np.ndarray, np.ndarray]], impulses: List[str], repl: int, response: str = 'LAYOFFS') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Plots the orthogonalized responses of one variable with simulated error bands, redrawing as the bands arrive.
+
+    Parameters:
+    - irf (IRAnalysis): The impulse response functions of the fitted VAR model.
+    - band_updates (Iterable): Tuples of (finished replications, lower band, upper band), as yielded by bands.iter_irf_error_bands.
+    - impulses (List[str]): The shocked variables, one subplot each.
+    - repl (int): The total number of replications, used for the progress bar.
+    - response (str): The responding variable.
+
+    Returns:
+    The final lower and upper bands.
+    """
+    st.write(f"**Response of {response} with {int(repl):,} bootstrap replications (95% bands)**")
+    progress = st.progress(0.0)
+    placeholder = st.empty()
+    names = list(irf.model.names)
+    j = names.index(response)
+    lower = upper = None
+    for finished, lower, upper in band_updates:
+        fig, axes = plt.subplots(1, len(impulses), figsize=(4 * len(impulses), 3), sharey=True)
+        for ax, impulse in zip(np.atleast_1d(axes), impulses):
+            i = names.index(impulse)
+            ax.plot(irf.orth_irfs[:, j, i], color='k')
+            ax.fill_between(range(len(lower)), lower[:, j, i], upper[:, j, i], alpha=0.3)
+            ax.axhline(0, color='grey', linewidth=0.5)
+            ax.set_title(f'{impulse} -> {response}')
+        placeholder.pyplot(fig)
+        plt.close(fig)
+        progress.progress(min(finished / repl, 1.0), text=f"{finished:,} of {int(repl):,} replications")
+    return lower, upper
+
+
+@profiled
+def display_rolling_irfs(rolling) -> None:
+    """
+    Shows how the responses to each shock change across estimation windows as heatmaps.
+
+    Parameters:
+    - rolling (RollingIRFs): The output of rolling.rolling_irfs.
+
+    Returns:
+    None. One heatmap per impulse, with the window end date on the vertical axis and the horizon on the horizontal axis.
+    """
+    ends = pd.DatetimeIndex(rolling.ends)
+    # A few explosive windows (spring 2020) would otherwise wash out the colour scale
+    limit = np.percentile(np.abs(rolling.irfs), 99)
+    fig, axes = plt.subplots(1, len(rolling.impulses), figsize=(6 * len(rolling.impulses), 6), sharey=True)
+    for ax, impulse, responses in zip(np.atleast_1d(axes), rolling.impulses, np.moveaxis(rolling.irfs, 2, 0)):
+        image = ax.imshow(responses, aspect='auto', cmap='RdBu_r', vmin=-limit, vmax=limit, origin='lower',
+                          extent=(-0.5, responses.shape[1] - 0.5, -0.5, len(ends) - 0.5))
+        ax.set_title(f'{impulse} -> {rolling.response}')
+        ax.set_xlabel('Months after the shock')
+        ticks = np.linspace(0, len(ends) - 1, min(len(ends), 8)).astype(int)
+        ax.set_yticks(ticks, ends[ticks].strftime('%Y-%m'))
+    np.atleast_1d(axes)[0].set_ylabel('Window end')
+    fig.colorbar(image, ax=axes)
+    st.pyplot(fig)
+    plt.close(fig)
 
-def display_data_tables(data: pd.DataFrame, var_data: pd.DataFrame) -> None:
+
+@profiled
+def display_forecasts(result, history: pd.DataFrame, labels: List[str], response: str = 'LAYOFFS', months_shown: int = 48) -> None:
+    """
+    Plots the forecasts of one variable under each scenario after its recent history.
+
+    Parameters:
+    - result (ForecastResult): The output of Forecaster.forecast, one scenario per label.
+    - history (pd.DataFrame): The data the model was fitted on, indexed by month.
+    - labels (List[str]): The name of each scenario.
+    - response (str): The variable to plot.
+    - months_shown (int): How many months of history to show before the forecasts.
+
+    Returns:
+    None. A line chart with 95% intervals and a table of the point forecasts.
+    """
+    column = result.names.index(response)
+    steps = result.point.shape[1]
+    dates = pd.date_range(history.index[-1], periods=steps + 1, freq='MS')[1:]
+    recent = history[response].iloc[-months_shown:]
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(recent.index, recent.values, 'k', label='Observed')
+    for scenario, label in enumerate(labels):
+        line, = ax.plot(dates, result.point[scenario, :, column], label=label)
+        ax.fill_between(dates, result.lower[scenario, :, column], result.upper[scenario, :, column],
+                        color=line.get_color(), alpha=0.15)
+    ax.set_title(f'{response} forecasts')
+    ax.legend()
+    st.pyplot(fig)
+    plt.close(fig)
+
+    st.dataframe(pd.DataFrame(result.point[:, :, column].T, index=dates.strftime('%Y-%m'), columns=labels))
+
+
+def wait_for_job(job) -> Any:
+    """
+    Waits for a background job, showing its progress until it finishes.
+
+    Parameters:
+    - job (Job): The job, from jobs.JobQueue.submit.
+
+    Returns:
+    Any. The job's result. While waiting, the progress bar is updated a few times a second; any widget
+    interaction reruns the script at the next update, and the job keeps running for when the page comes back.
+    """
+    if not job.done():
+        bar = st.progress(0., text=f"Waiting for {job.name.replace('_', ' ')}")
+        while not job.wait(JOB_POLL_SECONDS):
+            fraction, message = job.progress
+            bar.progress(fraction, text=message)
+        bar.empty()
+    return job.result()
+
+
+def display_diagnostics(profiler) -> None:
+    """
+    Shows the time and memory spent in each instrumented stage since the profiler was last reset.
+
+    Parameters:
+    - profiler (Profiler): The profiler the instrumented functions report to.
+
+    Returns:
+    None. A table of the stages, sorted by total wall time, their metrics in the Prometheus text format and a reset button.
+    While memory is traced, a caption explains that calls overlapping stages on other threads have no peak.
+    """
+    st.title("Diagnostics")
+    if st.button("Reset statistics"):
+        profiler.reset()
+    table = profiler.to_frame()
+    if table.empty:
+        st.write("No instrumented stage has run yet.")
+        return
+    table['Peak memory (MiB)'] = table.pop('Peak memory (bytes)') / 2 ** 20
+    st.dataframe(table)
+    if profiler.traces_memory:
+        st.caption("Peak memory only counts calls that overlapped no instrumented stage on another thread, "
+                   "since tracemalloc tracks a single process-wide peak. A stage whose every call overlapped with "
+                   "figure rendering, background jobs or other sessions has no peak.")
+    with st.expander("Prometheus metrics"):
+        st.code(profiler.to_prometheus(), language='text')
+
+
+@profiled
+def display_specification_search(table: pd.DataFrame, support: pd.DataFrame) -> None:
+    """
+    Shows how the hypotheses fare across model specifications and the ranked specifications.
+
+    Parameters:
+    - table (pd.DataFrame): The output of specsearch.search_specifications.
+    - support (pd.DataFrame): The output of specsearch.hypothesis_support for the same table.
+
+    Returns:
+    None. The share of stable models supporting each hypothesis, and the table of specifications, filterable by criterion.
+    """
+    st.subheader("Support for each hypothesis")
+    st.dataframe(support.style.format({'Share supporting': '{:.0%}', 'Median response': '{:.3f}'}))
+
+    st.subheader("Ranked specifications")
+    criteria = st.multiselect("Lag order chosen by", sorted(table['Criterion'].unique()))
+    if st.checkbox("Stable models only", value=True):
+        table = table[table['Stable']]
+    if criteria:
+        table = table[table['Criterion'].isin(criteria)]
+    st.dataframe(table)
+
+
+@profiled
+def display_data_tables(table, var_data: pd.DataFrame) -> None:
     """
     Displays data tables for layoffs and VAR macrovariables using Streamlit.
 
+    The layoffs table is filtered and paged on the server, so only the visible page
+    of the chosen columns is sent to the browser.
+
     Parameters:
-    - data (pd.DataFrame): The DataFrame containing layoffs data.
+    - table (LayoffsTable): The indexed layoffs data.
     - var_data (pd.DataFrame): The DataFrame containing VAR macrovariables data.
 
-    Renders two data tables and titles in a Streamlit app.
+    Renders the filter and paging controls, one page of the layoffs table and the macrovariables table in a Streamlit app.
     """
     st.title("Layoffs.fyi Company Table:")
-    st.dataframe(data)
+    columns = st.multiselect("Columns", table.columns, default=table.columns)
+    filters = {column: st.multiselect(column, table.options(column)) for column in FILTER_COLUMNS}
+    bounds = table.date_bounds
+    start = end = None
+    if bounds is not None:
+        first, last = bounds
+        dates = st.date_input("Date range", (first, last), min_value=first, max_value=last)
+        # While a range is being picked the widget returns only its start
+        start, end = (tuple(dates) + (None, None))[:2]
+    rows = table.select(filters, start, end)
+
+    size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+    number = st.number_input("Page", min_value=1, max_value=page_count(len(rows), size), value=1)
+    shown = table.page(rows, number, size, columns)
+    st.caption(f"Rows {min((number - 1) * size + 1, len(rows)):,}–{(number - 1) * size + len(shown):,} of {len(rows):,}")
+    st.dataframe(shown)
+
     st.title("VAR macrovariables used for regression (Dec 2000 to Dec 2023):")
     st.dataframe(var_data)
 
 
+@profiled
 def perform_regression_analysis(data: pd.DataFrame) -> None:
     """
     Performs regression analysis on the provided data, identifying significant and 
@@ -58,8 +286,17 @@ def perform_regression_analysis(data: pd.DataFrame) -> None:
     X = sm.add_constant(X)
     model = sm.OLS(y, X).fit()
 
-    # Process and display results
-    # We can separate here
+    display_regression_results(model)
+
+
+@profiled
+def display_regression_results(model) -> None:
+    """
+    Displays the significant and non-significant predictors and R-squared values of a fitted regression.
+
+    Parameters:
+    - model (RegressionResults or SparseOLSResults): The fitted regression, with pvalues, rsquared and rsquared_adj.
+    """
     p_values = model.pvalues
 
 
@@ -87,6 +324,18 @@ def perform_regression_analysis(data: pd.DataFrame) -> None:
     st.table(non_significant_predictors)
 
 
+def display_grouped_regressions(summary: pd.DataFrame, group_label: str) -> None:
+    """
+    Displays the fit of a regression estimated separately for each group.
+
+    Parameters:
+    - summary (pd.DataFrame): The output of regression.summarize_groups.
+    - group_label (str): What the groups are, for example "Year".
+    """
+    st.subheader(f"R-squared by {group_label.lower()}:")
+    st.table(summary.rename(columns={'Group': group_label}))
+
+
 def print_adf_result(variable: str, result: Tuple) -> None:
     """
     Prints the Augmented Dickey-Fuller test result for a given variable using Streamlit.
@@ -108,37 +357,68 @@ def print_adf_result(variable: str, result: Tuple) -> None:
         st.error(f'"{variable}" is not stationary and requires differencing.\n')
 
 
-def display_var_model_results(fitted_model, results_df):
-    # Display Optimal Lag Lengths based on Information Criteria
-    st.write("### Optimal Lag Lengths based on Information Criteria:")
-    st.dataframe(results_df)
+@profiled
+def print_adf_table(table: pd.DataFrame) -> None:
+    """
+    Prints every row of a batch of Augmented Dickey-Fuller test results using Streamlit.
+
+    Parameters:
+    - table (pd.DataFrame): The results from stationarity.adf_tests, one row per variable.
+    """
+    for _, row in table.iterrows():
+        critical = {'1%': row['Critical 1%'], '5%': row['Critical 5%'], '10%': row['Critical 10%']}
+        print_adf_result(row['Variable'], (row['ADF Statistic'], row['p-value'], row['Used Lag'], row['Observations'],
+                                           critical, row['IC Best']))
+
+
+@profiled
+def display_var_model_results(fitted_model, results_df: Optional[pd.DataFrame] = None) -> None:
+    """
+    Displays the lag selection, the model summary and the statistics of each equation of a VAR.
+
+    Parameters:
+    - fitted_model (Union[VARResultsWrapper, LargeVarResults]): The fitted VAR model.
+    - results_df (Optional[pd.DataFrame]): The information criteria of each lag order, if lags were selected.
+
+    Returns:
+    None. The statsmodels summary is only rendered for small models; its text grows with the square of the
+    number of equations, so larger models get a one-line description instead.
+    """
+    if results_df is not None:
+        # Display Optimal Lag Lengths based on Information Criteria
+        st.write("### Optimal Lag Lengths based on Information Criteria:")
+        st.dataframe(results_df)
 
     # VAR Model Summary (General)
     st.write("### VAR Model Summary:")
-    st.text(str(fitted_model.summary()))
-
-    stats_list = []
+    if hasattr(fitted_model, 'summary') and len(fitted_model.names) <= LARGE_VAR_EQUATIONS:
+        st.text(str(fitted_model.summary()))
+    else:
+        estimator = "Minnesota prior" if isinstance(fitted_model, LargeVarResults) else "OLS"
+        st.write(f"VAR({fitted_model.k_ar}) with {len(fitted_model.names)} equations and "
+                 f"{fitted_model.nobs} observations, estimated by {estimator}.")
 
     # Equation-specific statistics (RMSE, R-squared, etc.)
     st.write("### Equation-specific statistics:")
-    resid = fitted_model.resid
-    sigma_u = fitted_model.sigma_u
-
-    for i, eq_name in enumerate(fitted_model.model.endog_names):
-        rmse = np.sqrt(np.diag(sigma_u))[i]
-        # Adjust access to actuals and residuals
-        actuals = fitted_model.endog[12:, i] if isinstance(fitted_model.endog, np.ndarray) else fitted_model.endog.iloc[12:, i].to_numpy()
-        resid = fitted_model.resid[:, i] if isinstance(fitted_model.resid, np.ndarray) else fitted_model.resid.iloc[:, i].to_numpy()
-        ss_res = np.sum(resid**2)
-        ss_tot = np.sum((actuals - np.mean(actuals))**2)
-        r_squared = 1 - ss_res / ss_tot
-
-        stats_list.append({"Equation": eq_name, "RMSE": f"{rmse:.6f}", "R-squared": f"{r_squared:.4f}"})
-    ## additional results table
-    stats_df = pd.DataFrame(stats_list) 
-
-    # Convert DataFrame to Markdown table string
-    md_table = stats_df.to_markdown(index=False)
-
-    # Display the Markdown table in Streamlit
-    st.markdown(md_table, unsafe_allow_html=True)
\ No newline at end of file
+    stats_df = equation_statistics(fitted_model).reset_index()
+    stats_df['RMSE'] = stats_df['RMSE'].map('{:.6f}'.format)
+    stats_df['R-squared'] = stats_df['R-squared'].map('{:.4f}'.format)
+
+    # Display the statistics as a Markdown table in Streamlit
+    st.markdown(stats_df.to_markdown(index=False), unsafe_allow_html=True)
+
+
+@profiled
+def display_response_irfs(table: pd.DataFrame, response: str = 'LAYOFFS') -> None:
+    """
+    Plots the orthogonalized responses of one variable to shocks in others.
+
+    Parameters:
+    - table (pd.DataFrame): The responses, one column per impulse, as returned by largevar.response_irfs.
+    - response (str): The responding variable.
+
+    Returns:
+    None. One line per impulse.
+    """
+    st.write(f"### Responses of {response}:")
+    st.line_chart(table)
@@ -0,0 +1,172 @@
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from statistics import NormalDist
+from typing import Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from app.lazy import lazy_import
+from app.profiling import profiled
+
+# Figures are drawn on standalone Figure objects, so nothing registers with pyplot's global state
+figure = lazy_import('matplotlib.figure')
+
+# Rendered figures are kept up to this many bytes in total, least recently used first out
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Error bands cover this two-sided significance level, as in statsmodels' IRF plots
+BAND_SIGNIFICANCE = 0.05
+
+
+@profiled
+def render_irf_png(snapshot, impulse: str, response: str = 'LAYOFFS', dpi: int = 100) -> bytes:
+    """
+    Renders the orthogonalized response of one variable to a shock in another as PNG bytes.
+
+    The figure reproduces IRAnalysis.plot(impulse, response, orth=True), with
+    asymptotic error bands, from the arrays of a model snapshot.
+
+    Parameters:
+        snapshot (ModelSnapshot): The fitted model's arrays, from snapshot.take_snapshot.
+        impulse (str): The shocked variable.
+        response (str): The responding variable.
+        dpi (int): The resolution of the image.
+
+    Returns:
+        bytes: The PNG image.
+    """
+    i, j = snapshot.names.index(response), snapshot.names.index(impulse)
+    values, error = snapshot.orth_irfs[:, i, j], snapshot.orth_stderr[:, i, j]
+    critical = NormalDist().inv_cdf(1 - BAND_SIGNIFICANCE / 2)
+    horizon = np.arange(len(values))
+
+    fig = figure.Figure(figsize=(10, 10))
+    fig.subplots_adjust(bottom=0.05, top=0.925, left=0.05, right=0.95, hspace=0.2)
+    fig.suptitle('Impulse responses (orthogonalized)', fontsize=14)
+    ax = fig.subplots()
+    ax.plot(horizon, values, 'b')
+    ax.plot(horizon, values - critical * error, 'k--')
+    ax.plot(horizon, values + critical * error, 'k--')
+    ax.axhline(0, color='k')
+    ax.set_title(rf'{impulse}$\rightarrow${response}', fontsize=12)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    return buffer.getvalue()
+
+
+class FigureCache:
+    """
+    A size-bounded LRU store of rendered figures with a background render worker.
+
+    Figures are keyed by the caller, typically by the fingerprint of the model and
+    the variables shown. A figure that is not stored yet is rendered on a single
+    worker thread, and concurrent requests for the same key share one render.
+    """
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._pending: Dict[Hashable, Future] = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='figure-render')
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """The total size of the stored figures."""
+        return self._nbytes
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """
+        Returns a stored figure and marks it as recently used.
+
+        Parameters:
+            key (Hashable): The key of the figure.
+
+        Returns:
+            Optional[bytes]: The image, or None if it is not stored.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, image: bytes) -> None:
+        """
+        Stores a figure, evicting the least recently used ones beyond the size limit.
+
+        Parameters:
+            key (Hashable): The key of the figure.
+            image (bytes): The rendered image.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= len(self._entries.pop(key))
+            self._entries[key] = image
+            self._nbytes += len(image)
+            while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= len(evicted)
+
+    def submit(self, key: Hashable, render: Callable[[], bytes]) -> Future:
+        """
+        Returns a future for a figure, rendering it in the background unless it is stored or already queued.
+
+        Parameters:
+            key (Hashable): The key of the figure.
+            render (Callable[[], bytes]): Renders the figure on a cache miss.
+
+        Returns:
+            Future: Resolves to the image.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                future = Future()
+                future.set_result(self._entries[key])
+                return future
+            if key not in self._pending:
+                self._pending[key] = self._executor.submit(self._render, key, render)
+            return self._pending[key]
+
+    def _render(self, key: Hashable, render: Callable[[], bytes]) -> bytes:
+        try:
+            image = render()
+            self.put(key, image)
+            return image
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes every stored figure; renders already queued still complete."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+def prerender_irfs(cache: FigureCache, fingerprint: str, snapshot, impulses: List[str],
+                   response: str = 'LAYOFFS') -> Dict[str, Future]:
+    """
+    Queues the IRF figure of every impulse for rendering, reusing figures of the same model.
+
+    Parameters:
+        cache (FigureCache): Where rendered figures are stored.
+        fingerprint (str): Identifies the fitted model and the IRF horizon, such as Pipeline.key('snapshot').
+        snapshot (ModelSnapshot): The fitted model's arrays.
+        impulses (List[str]): The shocked variables.
+        response (str): The responding variable.
+
+    Returns:
+        Dict[str, Future]: A future resolving to the PNG bytes of each impulse's figure.
+    """
+    return {impulse: cache.submit((fingerprint, impulse, response),
+                                  lambda impulse=impulse: render_irf_png(snapshot, impulse, response))
+            for impulse in impulses}
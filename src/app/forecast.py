@@ -0,0 +1,143 @@
+from statistics import NormalDist
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class ForecastResult(NamedTuple):
+    """Point forecasts and intervals for a batch of scenarios."""
+    names: List[str]
+    point: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    conditioned: List[str]
+
+
+def companion_matrix(coefs: np.ndarray) -> np.ndarray:
+    """
+    Stacks the lag coefficient matrices of a VAR(p) into the companion matrix of its VAR(1) form.
+
+    Parameters:
+        coefs (np.ndarray): The lag coefficient matrices with shape (lags, neqs, neqs).
+
+    Returns:
+        np.ndarray: The matrix with shape (neqs * lags, neqs * lags) mapping [y_t, ..., y_{t-p+1}] one step ahead.
+    """
+    lags, neqs, _ = coefs.shape
+    companion = np.zeros((neqs * lags, neqs * lags))
+    companion[:neqs] = np.concatenate(list(coefs), axis=1)
+    companion[neqs:, :-neqs] = np.eye(neqs * (lags - 1))
+    return companion
+
+
+class Forecaster:
+    """
+    Multi-step VAR forecasts with some variables held to given paths, for many scenarios at once.
+
+    A scenario fixes the conditioned variables to a path over the horizon and the
+    other variables follow the VAR given those values (conditioning by
+    substitution), so the forecast is affine in the paths. The constructor runs
+    the companion-form recursion once for the baseline and for a unit change at
+    each conditioned step; after that, any batch of scenarios is a single matrix
+    product. Intervals come from the forecast error variance of the free
+    variables, which equals VARResults.forecast_interval without conditioning.
+    """
+
+    def __init__(self, snapshot, steps: int, conditioned: Sequence[str] = (), signif: float = 0.05):
+        """
+        Precomputes the forecasts' response to the conditioned paths and their error variances.
+
+        Parameters:
+            snapshot (ModelSnapshot): The fitted model's arrays, from snapshot.take_snapshot.
+            steps (int): The forecast horizon.
+            conditioned (Sequence[str]): The variables whose paths each scenario sets.
+            signif (float): The significance level of the intervals.
+        """
+        self.names = list(snapshot.names)
+        self.steps = steps
+        self.conditioned = list(conditioned)
+        neqs, lags = len(self.names), snapshot.lags
+        self._fixed = [self.names.index(name) for name in self.conditioned]
+
+        # Deterministic terms continue the time index of the estimation sample, as in VARResults.forecast
+        k_trend = snapshot.params.shape[0] - neqs * lags
+        time = snapshot.nobs + lags + np.arange(1, steps + 1)
+        trend = (time[:, None] ** np.arange(k_trend)) @ snapshot.params[:k_trend]
+
+        self._companion = companion_matrix(snapshot.coefs)
+        state = snapshot.history[::-1].ravel()
+
+        # Row 0 is the baseline with all paths at zero; row 1 + s * m + j sets path j to one at step s
+        width = steps * len(self._fixed)
+        units = np.zeros((1 + width, steps, len(self._fixed)))
+        units[1:].reshape(width, width)[:] = np.eye(width)
+        paths = self._recurse(np.broadcast_to(state, (1 + width, neqs * lags)), trend, units)
+        self._baseline = paths[0]
+        self._loadings = (paths[1:] - paths[0]).reshape(width, steps * neqs)
+
+        free = np.ones(neqs)
+        free[self._fixed] = 0.
+        self._stderr = np.sqrt(np.diagonal(self._error_variance(snapshot.coefs, snapshot.sigma_u, free), axis1=1,
+                                           axis2=2))
+        self._critical = NormalDist().inv_cdf(1 - signif / 2)
+
+    def _recurse(self, state: np.ndarray, trend: np.ndarray, paths: np.ndarray) -> np.ndarray:
+        """Iterates the companion form over the horizon for every row of state at once, substituting the paths."""
+        neqs = len(self.names)
+        forecasts = np.empty((len(state), self.steps, neqs))
+        for step in range(self.steps):
+            ahead = state @ self._companion[:neqs].T + trend[step]
+            ahead[:, self._fixed] = paths[:, step]
+            forecasts[:, step] = ahead
+            state = np.concatenate([ahead, state[:, :-neqs]], axis=1)
+        return forecasts
+
+    def _error_variance(self, coefs: np.ndarray, sigma_u: np.ndarray, free: np.ndarray) -> np.ndarray:
+        """
+        Accumulates the forecast error variance, with the errors of the conditioned variables set to zero.
+
+        Without conditioned variables this is the sum of Phi_i Sigma_u Phi_i' in VARProcess.mse.
+        """
+        lags = coefs.shape[0]
+        select = np.diag(free)
+        responses = [select]
+        for step in range(1, self.steps):
+            response = sum(coefs[lag - 1] @ responses[step - lag] for lag in range(1, min(step, lags) + 1))
+            responses.append(select @ response)
+        responses = np.array(responses)
+        return np.cumsum(responses @ sigma_u @ responses.transpose(0, 2, 1), axis=0)
+
+    def forecast(self, paths: Optional[np.ndarray] = None) -> ForecastResult:
+        """
+        Forecasts a batch of scenarios.
+
+        Parameters:
+            paths (Optional[np.ndarray]): The values of the conditioned variables with shape
+                (scenarios, steps, conditioned); None for a single forecast without conditions.
+
+        Returns:
+            ForecastResult: Point forecasts and interval bounds with shape (scenarios, steps, neqs).
+        """
+        if paths is None:
+            paths = np.zeros((1, self.steps, len(self._fixed)))
+        paths = np.asarray(paths, dtype=float)
+        scenarios = len(paths)
+        point = self._baseline + (paths.reshape(scenarios, -1) @ self._loadings).reshape(scenarios, self.steps, -1)
+        margin = self._critical * self._stderr
+        return ForecastResult(self.names, point, point - margin, point + margin, self.conditioned)
+
+
+def scenario_paths(last_value: float, steps: int, monthly_changes: Sequence[float]) -> np.ndarray:
+    """
+    Builds paths that move a variable by a constant amount each month from its last observed value.
+
+    Parameters:
+        last_value (float): The last observation of the variable.
+        steps (int): The forecast horizon.
+        monthly_changes (Sequence[float]): The change per month of each scenario.
+
+    Returns:
+        np.ndarray: The paths with shape (scenarios, steps, 1), ready for Forecaster.forecast.
+    """
+    months = np.arange(1, steps + 1)
+    return (last_value + np.outer(monthly_changes, months))[:, :, None]
@@ -0,0 +1,224 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.var import (TREND_ORDERS, build_lag_matrix, difference_variables, fit_var_model_and_select_lags,
+                     information_criteria)
+
+
+class _LagState:
+    """Sufficient statistics of one candidate lag order, updated by recursive least squares."""
+
+    def __init__(self, design: np.ndarray, endog: np.ndarray):
+        self.gram_inv = np.linalg.inv(design.T @ design)
+        self.params = self.gram_inv @ (design.T @ endog)
+        resid = endog - design @ self.params
+        self.sse = resid.T @ resid
+        self.nobs = len(endog)
+
+    def update(self, row: np.ndarray, obs: np.ndarray) -> None:
+        """Adds one observation with a rank-one (Sherman-Morrison) update."""
+        gain = self.gram_inv @ row
+        denom = 1. + row @ gain
+        error = obs - row @ self.params
+        self.params += np.outer(gain, error) / denom
+        self.gram_inv -= np.outer(gain, gain) / denom
+        self.sse += np.outer(error, error) / denom
+        self.nobs += 1
+
+
+class IncrementalVAR:
+    """
+    VAR estimates for every candidate lag order that absorb new observations without refitting.
+
+    For each lag order from 1 to maxlags the model keeps the inverse cross-product
+    matrix of its design, its coefficients and its residual cross-product. A new
+    observation updates each of them in place with a rank-one update, so appending
+    a month costs O(m^2) per lag order, with m = k_trend + neqs * lag, instead of a
+    full re-estimation. Each lag order uses its own sample, as in
+    var.select_lag_order, so the information criteria match a fresh selection.
+    """
+
+    def __init__(self, levels: pd.DataFrame, maxlags: int, trend: str = 'c'):
+        """
+        Estimates every candidate lag order on the current data.
+
+        Parameters:
+            levels (pd.DataFrame): The prepared macro data in levels, as returned by var.prepare_raw_data.
+            maxlags (int): The maximum number of lags to consider.
+            trend (str): The deterministic terms, one of 'n', 'c', 'ct' or 'ctt'.
+        """
+        self.maxlags = maxlags
+        self.trend = trend
+        self._k_trend = TREND_ORDERS[trend]
+        self._last_levels = levels.iloc[-1:].copy()
+
+        data = difference_variables(levels.copy())
+        self.names = list(data.columns)
+        self._chunks: List[pd.DataFrame] = [data]
+
+        values = data.to_numpy(dtype=float)
+        self._nobs_total = len(values)
+        self._recent = values[-maxlags:].copy()
+        design = build_lag_matrix(values, maxlags, trend)
+        self._states: Dict[int, _LagState] = {}
+        for lag in range(1, maxlags + 1):
+            ncols = self._k_trend + len(self.names) * lag
+            if len(values) - lag <= ncols:
+                raise ValueError(f"Too few observations to estimate a VAR({lag}) with {len(self.names)} variables.")
+            self._states[lag] = _LagState(design[lag:, :ncols], values[lag:])
+
+    def append(self, new_levels: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds new observations in levels, differencing them against the last stored level.
+
+        Parameters:
+            new_levels (pd.DataFrame): The new rows, with the same columns as the initial levels.
+
+        Returns:
+            pd.DataFrame: The differenced rows that were added to the model, none if new_levels is empty.
+
+        Raises:
+            ValueError: If a new row, or the last stored level it is differenced against, has missing values;
+                differencing would drop the row and the model would silently skip a month.
+        """
+        if new_levels.empty:
+            return self._chunks[-1].iloc[:0]
+        new_rows = difference_variables(pd.concat([self._last_levels, new_levels]))
+        if len(new_rows) != len(new_levels):
+            raise ValueError(f"{len(new_levels) - len(new_rows)} of the {len(new_levels)} new rows have missing "
+                             "values after differencing; fill them in before appending.")
+        self._last_levels = new_levels.iloc[-1:].copy()
+        neqs = len(self.names)
+        for obs in new_rows.to_numpy(dtype=float):
+            # The time trend counts rows from the start of the sample, as in build_lag_matrix
+            time = float(self._nobs_total + 1)
+            row = np.concatenate([time ** np.arange(self._k_trend), self._recent[::-1].ravel()])
+            for lag, state in self._states.items():
+                state.update(row[:self._k_trend + neqs * lag], obs)
+            self._recent = np.vstack([self._recent[1:], obs])
+            self._nobs_total += 1
+        self._chunks.append(new_rows)
+        return new_rows
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """The differenced data seen so far."""
+        if len(self._chunks) > 1:
+            self._chunks = [pd.concat(self._chunks)]
+        return self._chunks[0]
+
+    @property
+    def results_df(self) -> pd.DataFrame:
+        """AIC, HQIC and BIC for each lag, laid out like var.select_lag_order."""
+        results_df = pd.DataFrame.from_dict(
+            {lag: information_criteria(state.sse, state.nobs, lag, self._k_trend)
+             for lag, state in self._states.items()}, orient='index')
+        results_df.index.name = 'Lag'
+        return results_df
+
+    @property
+    def best_lag(self) -> int:
+        """The lag order with the lowest AIC."""
+        return int(self.results_df['AIC'].idxmin())
+
+    def params(self, lag: int) -> np.ndarray:
+        """
+        Returns the stacked coefficients of one lag order, laid out like VARResults.params.
+
+        Parameters:
+            lag (int): The lag order.
+
+        Returns:
+            np.ndarray: The trend rows followed by the lag blocks, one column per equation.
+        """
+        return self._states[lag].params.copy()
+
+    def coefs(self, lag: int) -> np.ndarray:
+        """
+        Returns the lag coefficient matrices of one lag order, laid out like VARResults.coefs.
+
+        Parameters:
+            lag (int): The lag order.
+
+        Returns:
+            np.ndarray: The matrices with shape (lag, neqs, neqs).
+        """
+        neqs = len(self.names)
+        blocks = self._states[lag].params[self._k_trend:]
+        return blocks.reshape(lag, neqs, neqs).transpose(0, 2, 1).copy()
+
+    def sigma_u(self, lag: int) -> np.ndarray:
+        """
+        Returns the residual covariance of one lag order, with the same degrees of freedom as VARResults.sigma_u.
+
+        Parameters:
+            lag (int): The lag order.
+
+        Returns:
+            np.ndarray: The covariance matrix with shape (neqs, neqs).
+        """
+        state = self._states[lag]
+        return state.sse / (state.nobs - state.params.shape[0])
+
+    def refit(self) -> Tuple[object, pd.DataFrame]:
+        """
+        Re-estimates from scratch on all the data seen so far, as a check on the updates.
+
+        Returns:
+            Tuple[VARResultsWrapper, pd.DataFrame]: The output of var.fit_var_model_and_select_lags,
+            which always includes a constant.
+        """
+        return fit_var_model_and_select_lags(self.data, self.maxlags)
+
+
+class IncrementalLagSelection:
+    """
+    Selects the lag order of successive versions of the macro data, updating instead of refitting where it can.
+
+    The latest levels and their IncrementalVAR are kept. When the next version only
+    adds rows after them, as a monthly data release does, the new rows are appended
+    to the model by rank-one updates; any other change, or rows it cannot append,
+    re-estimates every lag order from scratch.
+    """
+
+    def __init__(self, maxlags: int, trend: str = 'c'):
+        """
+        Starts with no data.
+
+        Parameters:
+            maxlags (int): The maximum number of lags to consider.
+            trend (str): The deterministic terms, one of 'n', 'c', 'ct' or 'ctt'.
+        """
+        self.maxlags = maxlags
+        self.trend = trend
+        self._levels: Optional[pd.DataFrame] = None
+        self._model: Optional[IncrementalVAR] = None
+        self._lock = threading.Lock()
+
+    def select(self, levels: pd.DataFrame) -> pd.DataFrame:
+        """
+        Computes the information criteria of every lag order on the differenced levels.
+
+        Parameters:
+            levels (pd.DataFrame): The prepared macro data in levels, as returned by var.prepare_raw_data.
+
+        Returns:
+            pd.DataFrame: AIC, HQIC and BIC for each lag, laid out like var.select_lag_order.
+        """
+        with self._lock:
+            known = 0 if self._levels is None else len(self._levels)
+            extends = (self._model is not None and len(levels) >= known
+                       and levels.iloc[:known].equals(self._levels))
+            if extends:
+                try:
+                    self._model.append(levels.iloc[known:])
+                except ValueError:
+                    # A new row with missing values, which a fresh estimation drops like differencing does
+                    extends = False
+            if not extends:
+                self._model = IncrementalVAR(levels, self.maxlags, self.trend)
+            self._levels = levels
+            return self._model.results_df
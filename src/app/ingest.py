@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit, but the cache is optional
+    feather = None
+
+from app.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+# Columns of the layoffs extract the app uses; the free-text Source and employee-list
+# columns and the precomputed '$ Raised (mm)^2' are never read
+LAYOFFS_DTYPES = {
+    'Company': 'string',
+    'Location HQ': 'category',
+    '# Laid Off': 'float64',
+    '%': 'float64',
+    'Industry': 'category',
+    'Stage': 'category',
+    '$ Raised (mm)': 'float64',
+    'Country': 'category',
+}
+LAYOFFS_DATES = {'Date': '%m/%d/%Y'}
+
+MACRO_DTYPES = {
+    'FEDFUNDS': 'float64',
+    'CORESTICKM159SFRBATL': 'float64',
+    'INDPRO': 'float64',
+    'LAYOFFS': 'float64',
+    'UNCERTAINTY': 'float64',
+}
+MACRO_DATES = {'observation_date': '%m/%d/%Y'}
+
+# A file modified this close to the last check may have changed again within the
+# file system's timestamp granularity, so its size and mtime alone are not trusted
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+
+class IngestReport(NamedTuple):
+    """How a table was loaded: from the columnar cache or by parsing the CSV."""
+    path: str
+    source: str
+    rows: int
+    seconds: float
+    memory_bytes: int
+
+
+def _schema_token(dtypes: Dict[str, str], dates: Dict[str, str]) -> str:
+    """Hashes the column selection and types so a schema change gets its own cache file."""
+    return hashlib.sha256(json.dumps([dtypes, dates], sort_keys=True).encode()).hexdigest()[:16]
+
+
+def file_sha256(path: str) -> str:
+    """
+    Computes the SHA-256 hex digest of a file's contents.
+
+    Parameters:
+        path (str): The path to the file.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_manifest(manifest_path: str, manifest: dict) -> None:
+    temporary_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w') as handle:
+        json.dump(manifest, handle)
+    os.replace(temporary_path, manifest_path)
+
+
+def read_csv_typed(path: str, dtypes: Dict[str, str], dates: Dict[str, str]) -> pd.DataFrame:
+    """
+    Reads only the given columns of a CSV file with explicit types.
+
+    Parameters:
+        path (str): The path to the CSV file.
+        dtypes (Dict[str, str]): The columns to read and their pandas dtypes.
+        dates (Dict[str, str]): Date columns to read and their strptime formats.
+
+    Returns:
+        pd.DataFrame: The selected columns, in file order.
+    """
+    data = pd.read_csv(path, usecols=list(dtypes) + list(dates), dtype=dtypes)
+    for column, date_format in dates.items():
+        data[column] = pd.to_datetime(data[column], format=date_format)
+    return data
+
+
+def ingest_table(path: str, dtypes: Dict[str, str], dates: Dict[str, str],
+                 cache_dir: Optional[str] = None) -> Tuple[pd.DataFrame, IngestReport]:
+    """
+    Loads a CSV file through a Feather cache that is rebuilt only when the file changes.
+
+    The cache sits next to a small manifest recording the source file's size,
+    modification time and SHA-256. A matching size and mtime is trusted without
+    reading the file, unless the file was modified just before the manifest was
+    written; otherwise the file is hashed, and the cache is rebuilt only if the hash
+    differs. Loading the cache converts every column to pandas, so it saves the CSV
+    parsing, not the copy of the data. Without pyarrow the CSV is parsed every time.
+
+    Parameters:
+        path (str): The path to the CSV file.
+        dtypes (Dict[str, str]): The columns to read and their pandas dtypes.
+        dates (Dict[str, str]): Date columns to read and their strptime formats.
+        cache_dir (Optional[str]): Where to keep the cache; defaults to a .cache folder next to the file.
+
+    Returns:
+        Tuple[pd.DataFrame, IngestReport]: The data and how it was loaded.
+    """
+    start = time.perf_counter()
+    if feather is None:
+        data, source = read_csv_typed(path, dtypes, dates), 'csv'
+    else:
+        cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), '.cache')
+        stem = f'{os.path.basename(path)}.{_schema_token(dtypes, dates)}'
+        cache_path = os.path.join(cache_dir, f'{stem}.feather')
+        manifest_path = os.path.join(cache_dir, f'{stem}.json')
+
+        stat = os.stat(path)
+        manifest = {}
+        if os.path.exists(cache_path) and os.path.exists(manifest_path):
+            with open(manifest_path) as handle:
+                manifest = json.load(handle)
+
+        fresh = (manifest.get('size') == stat.st_size and manifest.get('mtime_ns') == stat.st_mtime_ns
+                 and stat.st_mtime_ns + RACY_WINDOW_NS < manifest.get('checked_ns', 0))
+        if not fresh and manifest:
+            # Touched but possibly unchanged: compare contents before rebuilding
+            sha256 = file_sha256(path)
+            fresh = manifest.get('sha256') == sha256
+            if fresh:
+                manifest.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, checked_ns=time.time_ns())
+                _write_manifest(manifest_path, manifest)
+
+        if fresh:
+            data, source = feather.read_table(cache_path).to_pandas(), 'cache'
+        else:
+            data, source = read_csv_typed(path, dtypes, dates), 'csv'
+            os.makedirs(cache_dir, exist_ok=True)
+            # Uncompressed so loading it skips decompression; written under a temporary name
+            # so concurrent sessions never read a half-written cache
+            temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+            feather.write_feather(data, temporary_path, compression='uncompressed')
+            os.replace(temporary_path, cache_path)
+            _write_manifest(manifest_path, {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                            'sha256': file_sha256(path), 'checked_ns': time.time_ns()})
+
+    report = IngestReport(path, source, len(data), time.perf_counter() - start,
+                          int(data.memory_usage(deep=True).sum()))
+    logger.info("Loaded %s from %s: %d rows in %.3fs, %.1f KiB", report.path, report.source, report.rows,
+                report.seconds, report.memory_bytes / 1024)
+    return data, report
+
+
+@profiled
+def load_layoffs(path: str, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Loads the layoffs extract with the columns and types the app uses.
+
+    Parameters:
+        path (str): The path to the layoffs CSV file.
+        cache_dir (Optional[str]): Where to keep the columnar cache.
+
+    Returns:
+        pd.DataFrame: The layoffs data.
+    """
+    return ingest_table(path, LAYOFFS_DTYPES, LAYOFFS_DATES, cache_dir)[0]
+
+
+@profiled
+def load_macro(path: str, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Loads the macro series with a parsed observation_date column, ready for var.prepare_raw_data.
+
+    Parameters:
+        path (str): The path to the macro CSV file.
+        cache_dir (Optional[str]): Where to keep the columnar cache.
+
+    Returns:
+        pd.DataFrame: The macro data.
+    """
+    return ingest_table(path, MACRO_DTYPES, MACRO_DATES, cache_dir)[0]
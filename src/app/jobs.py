@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.profiling import PROFILER
+
+logger = logging.getLogger(__name__)
+
+# Long analyses run side by side with this many others; the rest wait in the queue
+JOB_WORKERS = 2
+
+# Finished results are kept for this many distinct inputs, least recently used first out
+JOB_RESULTS = 64
+
+Reporter = Callable[[float, str], None]
+
+
+class Job:
+    """
+    One computation in the queue, shared by every session that asked for the same key.
+
+    The computation reports its progress as a fraction and a message, which any
+    session can poll while it waits.
+    """
+
+    def __init__(self, key: Hashable, name: str, future: Optional[Future] = None):
+        self.key = key
+        self.name = name
+        self.future = future or Future()
+        self.progress: Tuple[float, str] = (0., 'Queued')
+        self.submitted = time.time()
+
+    def report(self, fraction: float, message: str = '') -> None:
+        """
+        Records how far the computation got.
+
+        Parameters:
+            fraction (float): The share of the work done, between 0 and 1.
+            message (str): What the computation is doing now.
+        """
+        self.progress = (min(max(fraction, 0.), 1.), message)
+
+    def done(self) -> bool:
+        """Whether the computation finished or failed."""
+        return self.future.done()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for the computation to finish.
+
+        Parameters:
+            timeout (Optional[float]): The longest wait in seconds; None waits for as long as it takes.
+
+        Returns:
+            bool: Whether it finished.
+        """
+        try:
+            self.future.exception(timeout)
+        except FutureTimeoutError:
+            return False
+        return True
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """Returns the result, waiting for it; raises the computation's exception if it failed."""
+        return self.future.result(timeout)
+
+    def __repr__(self) -> str:
+        return f'Job({self.name!r}, {self.progress[0]:.0%})'
+
+
+class JobQueue:
+    """
+    Runs long computations on background threads, once per distinct input, and keeps their results.
+
+    A computation is identified by a key that fingerprints its inputs, such as a
+    pipeline stage key. Submitting a key that is queued or running returns the
+    same job, so concurrent sessions share one computation, and submitting a key
+    that finished returns the stored result at once. Failed computations are not
+    stored, so the next submission retries them. Threads rather than processes run
+    the jobs, since the computations close over pipelines and data that cannot be
+    pickled, and the numerical work releases the GIL.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_results: int = JOB_RESULTS):
+        """
+        Starts the queue.
+
+        Parameters:
+            max_workers (int): The number of jobs run at the same time.
+            max_results (int): The number of finished results kept.
+        """
+        self.max_results = max_results
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._pending: Dict[Hashable, Job] = {}
+        self._results: 'OrderedDict[Hashable, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, func: Callable[[Reporter], Any], name: Optional[str] = None) -> Job:
+        """
+        Returns the job computing a key, queueing it unless it is stored, queued or running.
+
+        Parameters:
+            key (Hashable): Fingerprints every input of the computation.
+            func (Callable[[Reporter], Any]): Computes the result; it is passed the job's report method.
+            name (Optional[str]): Describes the computation in progress displays; defaults to the key.
+
+        Returns:
+            Job: The job; a stored result comes back as a finished job.
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+            if key not in self._pending:
+                job = Job(key, name or str(key))
+                self._pending[key] = job
+                job.future = self._executor.submit(self._run, job, func)
+            return self._pending[key]
+
+    def _run(self, job: Job, func: Callable[[Reporter], Any]) -> Any:
+        job.report(0., 'Started')
+        try:
+            with PROFILER.stage(f'jobs.{job.name}'):
+                result = func(job.report)
+        except BaseException:
+            logger.exception("Job %s failed", job.name)
+            with self._lock:
+                self._pending.pop(job.key, None)
+            raise
+        job.report(1., 'Done')
+        with self._lock:
+            self._pending.pop(job.key, None)
+            self._results[job.key] = job
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result
+
+    def get(self, key: Hashable) -> Optional[Job]:
+        """
+        Looks a key up without queueing anything.
+
+        Parameters:
+            key (Hashable): The key of the computation.
+
+        Returns:
+            Optional[Job]: The queued, running or finished job, or None.
+        """
+        with self._lock:
+            return self._pending.get(key) or self._results.get(key)
+
+    @property
+    def pending(self) -> List[Job]:
+        """The jobs queued or running, oldest first."""
+        with self._lock:
+            return sorted(self._pending.values(), key=lambda job: job.submitted)
+
+    def clear(self) -> None:
+        """Forgets the stored results; queued and running jobs still complete."""
+        with self._lock:
+            self._results.clear()
+
+
+def stage_job(pipeline, name: str) -> Callable[[Reporter], Any]:
+    """
+    Wraps a pipeline stage as a job that reports each upstream stage it computes.
+
+    The stage is requested once, so a runner holding its key returns it without
+    evaluating anything upstream; only on a miss are the upstream stages computed,
+    each reported as it starts.
+
+    Parameters:
+        pipeline (Pipeline): The pipeline.
+        name (str): The stage to compute.
+
+    Returns:
+        Callable[[Reporter], Any]: Computes the stage, reporting the share of its upstream stages done.
+    """
+    def run(report: Reporter) -> Any:
+        stages = pipeline.upstream(name)
+
+        def progress(stage):
+            report(stages.index(stage) / len(stages), f"Computing {stage.replace('_', ' ')}")
+
+        return pipeline.get(name, progress)
+    return run
+
+
+def submit_stage(queue: JobQueue, pipeline, name: str) -> Job:
+    """
+    Queues a pipeline stage, keyed by its stage key so identical inputs share one job.
+
+    Parameters:
+        queue (JobQueue): The queue.
+        pipeline (Pipeline): The pipeline.
+        name (str): The stage to compute.
+
+    Returns:
+        Job: The job computing the stage.
+    """
+    return queue.submit(pipeline.key(name), stage_job(pipeline, name), name=name)
@@ -0,0 +1,231 @@
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.profiling import profiled
+from app.var import TREND_ORDERS, build_lag_matrix
+
+# Above this many equations the VAR page shows compact tables instead of the statsmodels summary
+LARGE_VAR_EQUATIONS = 10
+
+# Equations solved together; bounds the stacked systems to batch_size * ncols ** 2 floats
+BATCH_SIZE = 8
+
+
+class MinnesotaPrior(NamedTuple):
+    """
+    The hyperparameters of a Minnesota (Litterman) prior on the VAR coefficients.
+
+    The prior is independent normal around a random walk (own_mean 1, suited to
+    series in levels) or white noise (own_mean 0, suited to differenced series);
+    own_mean can also give one value per variable, for a mix of the two. The
+    standard deviation of the coefficient of lag l of variable j in equation i is
+    tightness * cross_tightness ** (i != j) / l ** decay * sigma_i / sigma_j, where
+    sigma is the residual standard deviation of a univariate autoregression of each
+    variable; deterministic terms get constant * sigma_i.
+    """
+    tightness: float = 0.2
+    cross_tightness: float = 0.5
+    decay: float = 1.
+    constant: float = 100.
+    own_mean: Union[float, Tuple[float, ...]] = 0.
+
+
+class LargeVarResults(NamedTuple):
+    """The posterior mean of a VAR under a Minnesota prior, laid out like statsmodels' VARResults."""
+    names: List[str]
+    params: np.ndarray
+    coefs: np.ndarray
+    sigma_u: np.ndarray
+    resid: np.ndarray
+    endog: np.ndarray
+    nobs: int
+    trend: str
+    prior: MinnesotaPrior
+
+    @property
+    def k_ar(self) -> int:
+        """The lag order of the model."""
+        return self.coefs.shape[0]
+
+    @property
+    def neqs(self) -> int:
+        """The number of equations."""
+        return len(self.names)
+
+
+def autoregression_scales(values: np.ndarray, lags: int) -> np.ndarray:
+    """
+    Estimates the residual standard deviation of an AR(lags) with a constant for every series at once.
+
+    Parameters:
+        values (np.ndarray): The data with shape (nobs, neqs).
+        lags (int): The lag order of the autoregressions.
+
+    Returns:
+        np.ndarray: The standard deviation of each series' residuals, with shape (neqs,).
+    """
+    nobs, neqs = values.shape
+    # One design per series, stacked as (neqs, nobs - lags, 1 + lags)
+    design = np.ones((neqs, nobs - lags, 1 + lags))
+    for lag in range(1, lags + 1):
+        design[:, :, lag] = values[lags - lag:nobs - lag].T
+    target = values[lags:].T[:, :, None]
+    coefs = np.linalg.solve(design.transpose(0, 2, 1) @ design, design.transpose(0, 2, 1) @ target)
+    resid = (target - design @ coefs)[:, :, 0]
+    return np.sqrt((resid ** 2).sum(axis=1) / (nobs - lags - 1 - lags))
+
+
+def minnesota_moments(scales: np.ndarray, lags: int, prior: MinnesotaPrior, k_trend: int = 1
+                      ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the prior means and precisions of every coefficient, in the layout of build_lag_matrix.
+
+    Parameters:
+        scales (np.ndarray): The scale of each variable, from autoregression_scales.
+        lags (int): The lag order.
+        prior (MinnesotaPrior): The hyperparameters.
+        k_trend (int): The number of deterministic terms.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The means and precisions, each with shape (neqs, k_trend + neqs * lags),
+        one row per equation.
+    """
+    neqs = len(scales)
+    ratio = scales[:, None] / scales[None, :]
+    cross = np.where(np.eye(neqs, dtype=bool), 1., prior.cross_tightness)
+    decay = np.arange(1, lags + 1, dtype=float) ** prior.decay
+    # Standard deviations with shape (equation, lag, variable), flattened lag by lag as in the design
+    stds = prior.tightness * cross[:, None, :] * ratio[:, None, :] / decay[None, :, None]
+    stds = np.concatenate([np.repeat(prior.constant * scales[:, None], k_trend, axis=1),
+                           stds.reshape(neqs, lags * neqs)], axis=1)
+    means = np.zeros_like(stds)
+    means[:, k_trend:k_trend + neqs] = np.diag(np.broadcast_to(np.asarray(prior.own_mean, dtype=float), (neqs,)))
+    return means, stds ** -2
+
+
+@profiled
+def fit_large_var(data: Union[pd.DataFrame, np.ndarray], lags: int, prior: Optional[MinnesotaPrior] = None,
+                  trend: str = 'c', batch_size: int = BATCH_SIZE) -> LargeVarResults:
+    """
+    Estimates a VAR with many variables and lags as the posterior mean under a Minnesota prior.
+
+    Equations are estimated one by one, each with its own prior, but share one
+    design and Gram matrix, which are built once. Batches of equations are then
+    solved as a stack of symmetric systems, (Z'Z + P_i) b_i = Z'y_i + P_i m_i, so the
+    model stays well defined when it has more coefficients per equation than
+    observations. The residual covariance is divided by the number of observations,
+    since shrinkage leaves no meaningful degrees-of-freedom correction.
+
+    Parameters:
+        data (Union[pd.DataFrame, np.ndarray]): The endogenous data with shape (nobs, neqs).
+        lags (int): The lag order.
+        prior (Optional[MinnesotaPrior]): The hyperparameters of the prior; defaults to MinnesotaPrior().
+        trend (str): The deterministic terms, one of 'n', 'c', 'ct' or 'ctt'.
+        batch_size (int): The number of equations solved together.
+
+    Returns:
+        LargeVarResults: The coefficients, residuals and residual covariance.
+    """
+    names = [str(name) for name in data.columns] if isinstance(data, pd.DataFrame) else \
+        [f'y{index + 1}' for index in range(np.shape(data)[1])]
+    values = np.asarray(data, dtype=float)
+    prior = prior or MinnesotaPrior()
+    nobs_total, neqs = values.shape
+    k_trend = TREND_ORDERS[trend]
+    if nobs_total <= 2 * lags + 1:
+        raise ValueError(f"Too few observations to scale a Minnesota prior with {lags} lags.")
+
+    design = build_lag_matrix(values, lags, trend)[lags:]
+    endog = values[lags:]
+    gram = design.T @ design
+    cross = design.T @ endog
+    means, precisions = minnesota_moments(autoregression_scales(values, lags), lags, prior, k_trend)
+
+    params = np.empty((design.shape[1], neqs))
+    diagonal = np.arange(design.shape[1])
+    for start in range(0, neqs, batch_size):
+        batch = slice(start, min(start + batch_size, neqs))
+        systems = np.repeat(gram[None], batch.stop - start, axis=0)
+        systems[:, diagonal, diagonal] += precisions[batch]
+        right = cross[:, batch].T + precisions[batch] * means[batch]
+        params[:, batch] = np.linalg.solve(systems, right[:, :, None])[:, :, 0].T
+
+    resid = endog - design @ params
+    coefs = params[k_trend:].reshape(lags, neqs, neqs).transpose(0, 2, 1)
+    return LargeVarResults(names, params, coefs, resid.T @ resid / len(resid), resid, values, len(resid), trend, prior)
+
+
+@profiled
+def selected_irfs(coefs: np.ndarray, sigma_u: np.ndarray, pairs: Sequence[Tuple[int, int]], periods: int
+                  ) -> np.ndarray:
+    """
+    Computes orthogonalized impulse responses for chosen impulse and response pairs only.
+
+    Only the columns of the moving-average matrices belonging to the shocked
+    variables are propagated, so the work and memory grow with the number of
+    impulses instead of with the full (periods + 1, neqs, neqs) array.
+
+    Parameters:
+        coefs (np.ndarray): The lag coefficient matrices with shape (lags, neqs, neqs).
+        sigma_u (np.ndarray): The residual covariance matrix; shocks are orthogonalized in its variable order.
+        pairs (Sequence[Tuple[int, int]]): The (impulse, response) variable positions.
+        periods (int): The number of periods after the shock.
+
+    Returns:
+        np.ndarray: The responses with shape (periods + 1, len(pairs)), equal to
+        IRAnalysis.orth_irfs[:, response, impulse] for each pair.
+    """
+    lags, neqs, _ = coefs.shape
+    impulses = sorted({impulse for impulse, _ in pairs})
+    columns = [impulses.index(impulse) for impulse, _ in pairs]
+    responses = [response for _, response in pairs]
+
+    # The responses of all variables to each chosen shock, as (periods + 1, neqs, impulses)
+    paths = np.zeros((periods + 1, neqs, len(impulses)))
+    paths[0] = np.linalg.cholesky(sigma_u)[:, impulses]
+    for horizon in range(1, periods + 1):
+        for lag in range(1, min(horizon, lags) + 1):
+            paths[horizon] += coefs[lag - 1] @ paths[horizon - lag]
+    return paths[:, responses, columns]
+
+
+def response_irfs(results, impulses: Sequence[str], response: str, periods: int) -> pd.DataFrame:
+    """
+    Tabulates the orthogonalized responses of one variable to shocks in others.
+
+    Parameters:
+        results (LargeVarResults): The fitted model.
+        impulses (Sequence[str]): The shocked variables.
+        response (str): The responding variable.
+        periods (int): The number of periods after the shock.
+
+    Returns:
+        pd.DataFrame: One column per impulse, indexed by the periods after the shock.
+    """
+    pairs = [(results.names.index(impulse), results.names.index(response)) for impulse in impulses]
+    table = pd.DataFrame(selected_irfs(results.coefs, results.sigma_u, pairs, periods), columns=list(impulses))
+    table.index.name = 'Period'
+    return table
+
+
+def equation_statistics(fitted_model, names: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Computes the RMSE and R-squared of every equation of a VAR at once.
+
+    Parameters:
+        fitted_model (Union[VARResultsWrapper, LargeVarResults]): The fitted model.
+        names (Optional[Sequence[str]]): The equation names; defaults to the model's.
+
+    Returns:
+        pd.DataFrame: The 'RMSE' and 'R-squared' of each equation, indexed by equation.
+    """
+    actuals = np.asarray(fitted_model.endog, dtype=float)[fitted_model.k_ar:]
+    resid = np.asarray(fitted_model.resid, dtype=float)
+    ss_res = (resid ** 2).sum(axis=0)
+    ss_tot = ((actuals - actuals.mean(axis=0)) ** 2).sum(axis=0)
+    table = pd.DataFrame({'RMSE': np.sqrt(np.diag(np.asarray(fitted_model.sigma_u, dtype=float))),
+                          'R-squared': 1 - ss_res / ss_tot}, index=list(names or fitted_model.names))
+    table.index.name = 'Equation'
+    return table
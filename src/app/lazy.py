@@ -0,0 +1,54 @@
+import importlib
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    """
+    A stand-in for a module that imports it on first attribute access.
+
+    Unlike importlib.util.LazyLoader, it does not import the parent package up
+    front, so 'matplotlib.pyplot' costs nothing until a figure is drawn.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self._name}'{' (loaded)' if self._module is not None else ''}>"
+
+
+class LazyCallable:
+    """A stand-in for a function or class of a module that imports the module on the first call."""
+
+    def __init__(self, module: str, name: str):
+        self._module = LazyModule(module)
+        self._name = name
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return getattr(self._module, self._name)(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._module._name}.{self._name}>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Defers importing a module until one of its attributes is used.
+
+    Parameters:
+        name (str): The dotted module name.
+
+    Returns:
+        LazyModule: The stand-in, to be bound to the name the module would have been imported as.
+    """
+    return LazyModule(name)
@@ -1,17 +1,46 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
 import streamlit as st
-from statsmodels.tsa.stattools import adfuller
 
+# Streamlit puts src/app on the path; add src so the app modules import as one package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.display import display_irf_figures, display_irf_bands, display_rolling_irfs, display_forecasts, display_specification_search, display_diagnostics, display_data_tables, display_regression_results, display_grouped_regressions, print_adf_table, display_var_model_results, display_response_irfs, wait_for_job
+from app.cache import build_cached_pipeline, get_figure_cache, get_forecaster, get_irf_band_store, get_job_queue, start_metrics_server
+from app.figures import prerender_irfs
+from app.bands import iter_irf_error_bands
+from app.forecast import scenario_paths
+from app.jobs import submit_stage
+from app.specsearch import hypothesis_support
+from app.artifacts import ARTIFACT_DIR
+from app.pipeline import LAYOFFS_PATH, MACRO_PATH, MAXLAGS
+from app.profiling import METRICS_PORT_ENV, PROFILER, profiled
+from app.sources import LAYOFFS_SOURCE_ENV, MACRO_SOURCE_ENV
 
-from display import plot_irfs, display_data_tables, perform_regression_analysis, print_adf_result, display_var_model_results
-from var import load_data, prepare_raw_data, difference_variables, fit_var_model_and_select_lags
+BAND_REPLICATIONS = 1000
 
 # This function must be here because it contains the IRF
 
+@profiled(name='main.rerun')
 def main():
-    # Load the dataset for Linear-Regression
-    data = load_data('src/data/filtered_US_data.csv')
-    data['$ Raised (mm)^2'] = data['$ Raised (mm)']**2
-
+    if os.environ.get(METRICS_PORT_ENV):
+        start_metrics_server(int(os.environ[METRICS_PORT_ENV]))
+
+    # Every stage (load, prepare, difference, select lags, fit, IRF, ADF) is computed
+    # only when a page asks for it, and cached by data fingerprints and parameters.
+    # Stages precomputed by cli.py are read from the artifact directory instead.
+    # A deployment can point LAYOFFS_SOURCE and MACRO_SOURCE at its own files or database.
+    pipeline = build_cached_pipeline(os.environ.get(LAYOFFS_SOURCE_ENV, LAYOFFS_PATH),
+                                     os.environ.get(MACRO_SOURCE_ENV, MACRO_PATH), MAXLAGS, ARTIFACT_DIR)
+    job_queue = get_job_queue()
+
+    def compute(name):
+        # Long stages run on the shared job queue, once per stage key however many sessions ask,
+        # and the page shows their progress instead of blocking on them
+        return wait_for_job(submit_stage(job_queue, pipeline, name))
 
     description = ["Inflation on Layoffs graph illustrates how a positive shock in inflation affects the number of layoffs. We can see that a positive shock in inflation decreases the number of layoffs until it hits 0 in the 6th month. This does not seem to match the hypothesis that I initially came up with.",
                 "Industrial production on Layoffs graph shows a positive shock in the industrial production decreases layoffs until it reached 0 in the 8th month. This result lines up with Hypothesis 2: An increase in Industrial Production decreases Layoffs. This makes economic sense because if there is more production, there is more workforce behind the produced goods.",
@@ -19,13 +48,6 @@ def main():
                 "Economic Uncertainty Index on Layoffs graph illustrates how the U.S economic uncertainty index affects layoffs. The graph starts with a positive spike and is on the positive side until it hits 0 at around the 2nd period. This is in line with the economic theory that supports that businesses are cutting back on the workforce during economic challenging times. Moreover, after the 2nd period in the IRF graph, the response(layoffs) fluctuates above and below the zero line, which suggests the impact of layoffs changes over time. Thus, the VAR IRF result was consistent with the H4: Increase in Economic Uncertainty index increases Layoffs."
                 "Layoffs on Layoffs does not mean that much."
                 ]
-    # Load the dataset for VAR
-
-    var_data = prepare_raw_data(load_data('src/data/macro_seasonal_variables_data.csv'))
-    data_df = difference_variables(var_data)
-    fitted_model, results_df = fit_var_model_and_select_lags(data_df,12)
-    irf = fitted_model.irf(periods=20)
-
     # Side bar configurations
 
     st.sidebar.title("Tech Layoff Analysis")
@@ -33,38 +55,92 @@ def main():
     st.sidebar.empty()
 
     st.sidebar.markdown("## 📌 Navigation")
-    page = st.sidebar.radio("", ["📊 Vector Auto Regression (VAR)","📊 Regression Analysis", "📋 Data Tables", "📈 Impulse Response Functions"])
+    pages = ["📊 Vector Auto Regression (VAR)","📊 Regression Analysis", "📋 Data Tables", "📈 Impulse Response Functions", "🕒 Rolling IRFs", "🔮 Forecasts", "🧪 Specification search"]
+    # The diagnostics page is hidden unless the app was started with APP_PROFILE set
+    if PROFILER.enabled:
+        pages.append("🩺 Diagnostics")
+    page = st.sidebar.radio("", pages)
 
     # Individual pages
 
     if page == "📊 Regression Analysis":
-        perform_regression_analysis(data)
+        # Industry and stage enter as sparse one-hot dummies
+        display_regression_results(compute('regression'))
+        display_grouped_regressions(compute('regression_by_year'), "Year")
 
     elif page == "📊 Vector Auto Regression (VAR)":
         # Augmented Dickey-Fuller tests for stationarity (before differencing)
         st.header("ADF Tests Before Differencing\n")
-        for var in ['LAYOFFS', 'UNCERTAINTY', 'FEDFUNDS', 'CORESTICKM159SFRBATL', 'INDPRO']:
-            result = adfuller(var_data[var], 1)
-            print_adf_result(var, result)
+        print_adf_table(pipeline.get('adf_levels'))
 
         st.header("ADF Tests After Differencing\n")
-        for var in ['INFLATION', 'D_INDPRO']:
-            result = adfuller(data_df[var].dropna())
-            print_adf_result(var, result)
+        print_adf_table(pipeline.get('adf_differences'))
     
         # Display results in Streamlit
-        display_var_model_results(fitted_model, results_df)
+        estimator = st.radio("Estimator", ["OLS with lags chosen by AIC", "Minnesota prior (large-VAR mode)"])
+        if estimator.startswith("OLS"):
+            display_var_model_results(compute('fit'), pipeline.get('lag_selection'))
+        else:
+            # Shrinkage handles many series and long lags; only the responses of layoffs are computed
+            display_var_model_results(compute('large_var'))
+            display_response_irfs(compute('large_var_irfs'))
 
     elif page == "📋 Data Tables":
-        display_data_tables(data, var_data)
+        display_data_tables(pipeline.get('layoffs_table'), pipeline.get('macro'))
 
     elif page == "📈 Impulse Response Functions":
 
         st.title('Impulse response functions')
         st.write('This section shows the response of layoffs to shocks in various economic indicators.')
         independent_variables = ['INFLATION', 'D_INDPRO', 'FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS']
-        for i in range(len(independent_variables)-1):
-            plot_irfs(irf, independent_variables[i], description[i])
+        # Figures are drawn from the model snapshot, which loads without statsmodels, once per
+        # fitted model on a background worker, and served as images
+        figures = prerender_irfs(get_figure_cache(), pipeline.key('snapshot'), compute('snapshot'),
+                                 independent_variables[:-1])
+        display_irf_figures(figures, description)
+
+        if st.checkbox("Show bootstrap error bands"):
+            # Finished bands are shared by all sessions; otherwise draw them as batches finish
+            band_store = get_irf_band_store()
+            band_key = (pipeline.key('fit'), BAND_REPLICATIONS)
+            if band_key in band_store:
+                band_updates = [(BAND_REPLICATIONS, *band_store[band_key])]
+            else:
+                band_updates = iter_irf_error_bands(pipeline.get('fit'), repl=BAND_REPLICATIONS)
+            band_store[band_key] = display_irf_bands(pipeline.get('irf'), band_updates, independent_variables[:-1], BAND_REPLICATIONS)
+
+    elif page == "🕒 Rolling IRFs":
+
+        st.title('Rolling impulse response functions')
+        st.write('This section shows how the response of layoffs to shocks in the federal funds rate and uncertainty changed over time, estimating the VAR on ten-year rolling windows.')
+        display_rolling_irfs(compute('rolling_irfs'))
+
+    elif page == "🔮 Forecasts":
+
+        st.title('Layoff forecasts')
+        st.write('This section forecasts layoffs from the VAR, unconditionally and with the federal funds rate following a chosen path.')
+        steps = st.slider("Months ahead", 1, 36, 12)
+        change = st.slider("Federal funds rate change per month (percentage points)", 0.05, 0.5, 0.25, 0.05)
+        snapshot = compute('snapshot')
+        # The forecaster is built once per model, horizon and conditioned variable; all scenarios are one batch
+        unconditional = get_forecaster(pipeline.key('snapshot'), snapshot, steps, ()).forecast()
+        scenarios = get_forecaster(pipeline.key('snapshot'), snapshot, steps, ('FEDFUNDS',)).forecast(
+            scenario_paths(snapshot.history[-1, snapshot.names.index('FEDFUNDS')], steps, [0., change, -change]))
+        result = unconditional._replace(point=np.concatenate([unconditional.point, scenarios.point]),
+                                        lower=np.concatenate([unconditional.lower, scenarios.lower]),
+                                        upper=np.concatenate([unconditional.upper, scenarios.upper]))
+        display_forecasts(result, pipeline.get('differenced'),
+                          ['Unconditional', 'Rate held', f'Rate +{change:.2f} per month', f'Rate -{change:.2f} per month'])
+
+    elif page == "🧪 Specification search":
+
+        st.title('Specification search')
+        st.write('This section checks whether the conclusions on H1 to H4 survive other VAR specifications: every subset of the variables, each variable in levels or differenced, no constant, a constant or a linear trend, and the lag order chosen by AIC, BIC or HQIC. Responses are the orthogonalized responses of layoffs, summed over the first six months.')
+        table = compute('specification_search')
+        display_specification_search(table, hypothesis_support(table))
+
+    elif page == "🩺 Diagnostics":
+        display_diagnostics(PROFILER)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,257 @@
+import hashlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from app.incremental import IncrementalLagSelection
+from app.largevar import MinnesotaPrior, fit_large_var, response_irfs
+from app.profiling import PROFILER
+from app.regression import fit_grouped_regressions, fit_regression, summarize_groups
+from app.rolling import ROLLING_WINDOW, rolling_irfs
+from app.snapshot import ModelSnapshot, take_snapshot
+from app.sources import LAYOFFS_SCHEMA, MACRO_SCHEMA, DataSource, FileSource, open_source
+from app.specsearch import search_specifications
+from app.stationarity import adf_tests
+from app.tables import LayoffsTable
+from app.var import prepare_raw_data, difference_variables, fit_var_model, get_irf
+
+# The shipped data, relative to the repository root, and the default lag search used by the app and the batch runner
+LAYOFFS_PATH = 'src/data/filtered_US_data.csv'
+MACRO_PATH = 'src/data/macro_seasonal_variables_data.csv'
+MAXLAGS = 12
+
+# Variables tested for a unit root in levels and after differencing
+LEVEL_VARIABLES = ['LAYOFFS', 'UNCERTAINTY', 'FEDFUNDS', 'CORESTICKM159SFRBATL', 'INDPRO']
+DIFFERENCED_VARIABLES = ['INFLATION', 'D_INDPRO']
+
+# The variable whose responses the IRF pages show
+RESPONSE_VARIABLE = 'LAYOFFS'
+
+Runner = Callable[[str, Callable[[], Any]], Any]
+
+
+class Pipeline:
+    """
+    A small dependency graph of named stages that are evaluated lazily and memoized.
+
+    A stage is computed the first time it is requested, after the stages it depends
+    on, and never again for the lifetime of the pipeline. Every stage also has a key
+    derived from its name, its token (file fingerprints, parameters) and the keys of
+    its dependencies. The runner receives that key with a callable computing the
+    stage, so a persistent cache can return a stored value without evaluating any
+    upstream stage.
+    """
+
+    def __init__(self, runner: Optional[Runner] = None):
+        self._stages: Dict[str, Tuple[Callable, Tuple[str, ...], Any]] = {}
+        self._values: Dict[str, Any] = {}
+        self._keys: Dict[str, str] = {}
+        self._runner = runner or (lambda key, compute: compute())
+
+    def add_stage(self, name: str, func: Callable, *dependencies: str, token: Any = None) -> None:
+        """
+        Registers a stage. Dependencies must be registered first, which rules out cycles.
+
+        Parameters:
+            name (str): The name of the stage.
+            func (Callable): Computes the stage from the values of its dependencies, in order.
+            dependencies (str): The names of the stages the function takes as arguments.
+            token (Any): Anything else the result depends on, such as a file fingerprint or a parameter.
+                A callable token is only evaluated when the key is first needed.
+        """
+        for dependency in dependencies:
+            if dependency not in self._stages:
+                raise KeyError(f"Stage '{name}' depends on unknown stage '{dependency}'.")
+        self._stages[name] = (func, dependencies, token)
+
+    def key(self, name: str) -> str:
+        """
+        Computes the key identifying the result of a stage.
+
+        Parameters:
+            name (str): The name of the stage.
+
+        Returns:
+            str: A SHA-256 hex digest over the stage name, its token and its dependencies' keys.
+        """
+        if name not in self._keys:
+            _, dependencies, token = self._stages[name]
+            if callable(token):
+                token = token()
+            digest = hashlib.sha256(f'{name}:{token!r}'.encode())
+            for dependency in dependencies:
+                digest.update(self.key(dependency).encode())
+            self._keys[name] = digest.hexdigest()
+        return self._keys[name]
+
+    def get(self, name: str, progress: Optional[Callable[[str], None]] = None) -> Any:
+        """
+        Returns the value of a stage, computing it and its dependencies if needed.
+
+        Parameters:
+            name (str): The name of the stage.
+            progress (Optional[Callable[[str], None]]): Called with the name of each stage about to be
+                computed, after its dependencies; stages the runner returns by key are not reported.
+
+        Returns:
+            Any: The value of the stage.
+        """
+        if name not in self._values:
+            func, dependencies, _ = self._stages[name]
+
+            def compute():
+                values = [self.get(dependency, progress) for dependency in dependencies]
+                if progress is not None:
+                    progress(name)
+                return func(*values)
+
+            # Measured through the runner, so cache and artifact hits show up as well as computations
+            with PROFILER.stage(f'pipeline.{name}'):
+                self._values[name] = self._runner(self.key(name), compute)
+        return self._values[name]
+
+    def upstream(self, name: str) -> List[str]:
+        """
+        Lists the stages a stage is computed from, in an order they can be evaluated in.
+
+        Parameters:
+            name (str): The name of the stage.
+
+        Returns:
+            List[str]: Its direct and indirect dependencies, each once, followed by the stage itself.
+        """
+        order: List[str] = []
+
+        def visit(stage):
+            if stage not in order:
+                for dependency in self._stages[stage][1]:
+                    visit(dependency)
+                order.append(stage)
+
+        visit(name)
+        return order
+
+    @property
+    def evaluated(self) -> List[str]:
+        """The names of the stages evaluated so far, in evaluation order."""
+        return list(self._values)
+
+
+def add_squared_funding(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds the squared amount raised used by the regression.
+
+    Parameters:
+        data (pd.DataFrame): The layoffs data.
+
+    Returns:
+        pd.DataFrame: A copy of the data with a '$ Raised (mm)^2' column.
+    """
+    return data.assign(**{'$ Raised (mm)^2': data['$ Raised (mm)'] ** 2})
+
+
+def own_means(columns: Sequence[str]) -> Tuple[float, ...]:
+    """
+    Chooses the Minnesota prior mean of each variable's own first lag.
+
+    Parameters:
+        columns (Sequence[str]): The variables of the model.
+
+    Returns:
+        Tuple[float, ...]: 1 (a random walk) for the variables kept in levels, listed in LEVEL_VARIABLES,
+        and 0 (white noise) for the differenced ones.
+    """
+    return tuple(1. if column in LEVEL_VARIABLES else 0. for column in columns)
+
+
+def source_token(source: DataSource, fingerprint: Callable[[str], str]) -> Tuple[str, Any]:
+    """
+    Identifies the contents of a data source for the stage keys.
+
+    Parameters:
+        source (DataSource): The source.
+        fingerprint (Callable[[str], str]): Maps a file path to a token; sources that are not files fingerprint themselves.
+
+    Returns:
+        Tuple[str, Any]: The location of the source and its fingerprint.
+    """
+    if isinstance(source, FileSource):
+        return source.location, fingerprint(source.path)
+    return source.location, source.fingerprint()
+
+
+def build_pipeline(layoffs_path: Union[str, DataSource], macro_path: Union[str, DataSource], maxlags: int = MAXLAGS,
+                   periods: int = 20, fingerprint: Optional[Callable[[str], str]] = None,
+                   runner: Optional[Runner] = None, cache_dir: Optional[str] = None,
+                   prior: Optional[MinnesotaPrior] = None,
+                   lag_selection: Optional[IncrementalLagSelection] = None) -> Pipeline:
+    """
+    Builds the analysis pipeline from loading the data to the IRF and the ADF tests.
+
+    Stages never modify the values of the stages they depend on, so their results
+    can be shared between pages and sessions.
+
+    Parameters:
+        layoffs_path (Union[str, DataSource]): The layoffs table, as a source or a location for sources.open_source.
+        macro_path (Union[str, DataSource]): The macro table, as a source or a location for sources.open_source.
+        maxlags (int): The maximum number of lags to consider.
+        periods (int): The number of IRF periods.
+        fingerprint (Callable[[str], str]): Maps a file path to a token identifying its contents;
+            other sources, such as database tables, always fingerprint themselves.
+        runner (Optional[Runner]): Evaluates a stage given its key; the default computes it directly.
+        cache_dir (Optional[str]): Where the ingestion layer keeps its columnar copies of CSV files.
+        prior (Optional[MinnesotaPrior]): The prior of the large-VAR estimator, which uses maxlags lags;
+            defaults to random-walk means for the variables in levels and white noise for the differenced ones.
+        lag_selection (Optional[IncrementalLagSelection]): Selects the lag order; pass the one of an earlier
+            pipeline over the same source, with the same maxlags, so data that only gained rows is updated
+            rather than refitted. Defaults to a new one.
+
+    Returns:
+        Pipeline: The pipeline with the stages 'layoffs', 'layoffs_table', 'regression_data', 'regression',
+        'regression_by_year', 'macro', 'differenced', 'lag_selection', 'fit', 'irf', 'snapshot',
+        'rolling_irfs', 'specification_search', 'large_var', 'large_var_irfs', 'adf_levels' and 'adf_differences'.
+    """
+    fingerprint = fingerprint or (lambda path: None)
+    lag_selection = lag_selection or IncrementalLagSelection(maxlags)
+    if lag_selection.maxlags != maxlags:
+        raise ValueError(f"The lag selection considers {lag_selection.maxlags} lags, not {maxlags}.")
+    pipeline = Pipeline(runner)
+    layoffs_source = open_source(layoffs_path, LAYOFFS_SCHEMA, cache_dir)
+    macro_source = open_source(macro_path, MACRO_SCHEMA, cache_dir)
+    pipeline.add_stage('layoffs', layoffs_source.read, token=lambda: source_token(layoffs_source, fingerprint))
+    pipeline.add_stage('layoffs_table', LayoffsTable, 'layoffs')
+    pipeline.add_stage('regression_data', add_squared_funding, 'layoffs')
+    pipeline.add_stage('regression', fit_regression, 'regression_data')
+    pipeline.add_stage('regression_by_year',
+                       lambda data: summarize_groups(fit_grouped_regressions(data, data['Date'].dt.year)),
+                       'regression_data')
+    pipeline.add_stage('macro', lambda: prepare_raw_data(macro_source.read()),
+                       token=lambda: source_token(macro_source, fingerprint))
+    pipeline.add_stage('differenced', lambda macro: difference_variables(macro.copy()), 'macro')
+    # Differences the levels itself, so it can append new months to the previous version's estimates
+    pipeline.add_stage('lag_selection', lag_selection.select, 'macro', token=maxlags)
+    pipeline.add_stage('fit', lambda data_df, results_df: fit_var_model(data_df, results_df['AIC'].idxmin()),
+                       'differenced', 'lag_selection')
+    pipeline.add_stage('irf', lambda fitted_model: get_irf(fitted_model, periods=periods), 'fit', token=periods)
+    # The field list is in the key, so snapshots stored with an older layout are not served
+    pipeline.add_stage('snapshot', take_snapshot, 'fit', 'irf', token=ModelSnapshot._fields)
+    pipeline.add_stage('rolling_irfs',
+                       lambda data_df, results_df: rolling_irfs(data_df, int(results_df['AIC'].idxmin()),
+                                                                ROLLING_WINDOW, periods=periods),
+                       'differenced', 'lag_selection', token=(ROLLING_WINDOW, periods))
+    pipeline.add_stage('specification_search',
+                       lambda macro: search_specifications(macro, maxlags=maxlags, periods=periods), 'macro',
+                       token=(maxlags, periods))
+    # Shrinkage keeps every lag up to maxlags, so the large-VAR mode needs no lag selection
+    pipeline.add_stage('large_var',
+                       lambda data_df: fit_large_var(data_df, maxlags,
+                                                     prior or MinnesotaPrior(own_mean=own_means(data_df.columns))),
+                       'differenced', token=(maxlags, prior, LEVEL_VARIABLES))
+    pipeline.add_stage('large_var_irfs',
+                       lambda results: response_irfs(results, [name for name in results.names
+                                                               if name != RESPONSE_VARIABLE],
+                                                     RESPONSE_VARIABLE, periods),
+                       'large_var', token=periods)
+    pipeline.add_stage('adf_levels', lambda macro: adf_tests(macro, LEVEL_VARIABLES, maxlag=1), 'macro')
+    pipeline.add_stage('adf_differences', lambda data_df: adf_tests(data_df, DIFFERENCED_VARIABLES), 'differenced')
+    return pipeline
@@ -0,0 +1,57 @@
+import multiprocessing
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+# Libraries the fork server imports once, if this process has imported them, so each worker forked from
+# it starts with them loaded; the app's own modules are not found there since Python 3.11 ignores the
+# parent's sys.path when starting the server
+FORKSERVER_PRELOAD = ['numpy', 'pandas', 'scipy.linalg', 'statsmodels.tsa.api', 'streamlit']
+
+
+def process_context():
+    """
+    Returns the multiprocessing context worker processes are started with.
+
+    The app runs inside Streamlit's multithreaded server, and forking a process
+    with running threads can deadlock the child on a lock another thread held, so
+    workers come from a single-threaded fork server, or are spawned where there is
+    none. Either way a worker re-imports the main module as __mp_main__, so the
+    main module must keep its work under an if __name__ == '__main__' guard.
+
+    Returns:
+        multiprocessing.context.BaseContext: The 'forkserver' context, or 'spawn'.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([module for module in FORKSERVER_PRELOAD if module in sys.modules])
+    return context
+
+
+@contextmanager
+def worker_pool(executor: str, max_workers: Optional[int] = None) -> Iterator[Executor]:
+    """
+    Opens a thread or process pool that is shut down without waiting when the block exits.
+
+    Leaving the block early, through an exception or a generator that is closed
+    before it is exhausted, cancels the queued tasks and returns at once instead of
+    blocking on the running ones; they finish in the background.
+
+    Parameters:
+        executor (str): 'thread' or 'process'.
+        max_workers (Optional[int]): The number of workers; defaults to the executor's default.
+
+    Yields:
+        Executor: The pool.
+    """
+    if executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+    else:
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=process_context())
+    try:
+        yield pool
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,295 @@
+import functools
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Set
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Set to 1 to time the instrumented stages, or to 'memory' to also trace their peak allocations
+PROFILE_ENV = 'APP_PROFILE'
+
+# Set to a port number to serve the stage metrics in the Prometheus text format
+METRICS_PORT_ENV = 'APP_METRICS_PORT'
+
+# Returned by Profiler.stage while profiling is off, so a disabled stage costs one attribute lookup
+_DISABLED = nullcontext()
+
+
+class _Measurement:
+    """Measures one entry into a stage; nested stages each report their own peak allocation."""
+
+    __slots__ = ('profiler', 'name', 'wall', 'cpu', 'base', 'peak', 'thread', 'overlapped')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> '_Measurement':
+        stack = self.profiler._stack()
+        self.base = None
+        if tracemalloc.is_tracing():
+            self.thread, self.overlapped = threading.get_ident(), False
+            self.profiler._start_tracing(self)
+            current, peak = tracemalloc.get_traced_memory()
+            # Resetting the peak for this stage would lose the enclosing stage's peak so far
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.base = self.peak = current
+        stack.append(self)
+        self.wall, self.cpu = time.perf_counter(), time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        wall, cpu = time.perf_counter() - self.wall, time.thread_time() - self.cpu
+        stack = self.profiler._stack()
+        stack.pop()
+        peak_bytes = None
+        if self.base is not None:
+            if tracemalloc.is_tracing():
+                peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, peak)
+                if not self.profiler._stop_tracing(self):
+                    peak_bytes = peak - self.base
+            else:
+                self.profiler._stop_tracing(self)
+        self.profiler.record(self.name, wall, cpu, peak_bytes)
+        return False
+
+
+class Profiler:
+    """
+    Accumulates the wall time, CPU time and peak memory of named stages.
+
+    Stages are measured with the stage context manager or the profiled decorator.
+    Times are inclusive, so a stage that calls another is charged for both, and the
+    CPU time is that of the calling thread. Peak memory is the largest amount of
+    Python memory allocated above the level at entry, traced with tracemalloc, which
+    slows the traced code down noticeably; it is only measured when enabled with
+    trace_memory. The tracemalloc peak is process-wide while the stages are
+    tracked per thread, so a call that overlapped with a traced stage on another
+    thread, such as the figure-render worker, the job queue or another session,
+    records no peak: the other thread's allocations and peak resets would make it
+    wrong. Allocations of threads running no instrumented code are still counted.
+    Every measurement is also logged as a key=value line.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._started_tracing = False
+        self._stats: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # The memory-traced measurements in progress, on every thread
+        self._traced: Set[_Measurement] = set()
+
+    def _stack(self) -> List[_Measurement]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _start_tracing(self, measurement: _Measurement) -> None:
+        with self._lock:
+            for other in self._traced:
+                if other.thread != measurement.thread:
+                    other.overlapped = measurement.overlapped = True
+            self._traced.add(measurement)
+
+    def _stop_tracing(self, measurement: _Measurement) -> bool:
+        """Ends a traced measurement and returns whether a stage on another thread overlapped it."""
+        with self._lock:
+            self._traced.discard(measurement)
+            return measurement.overlapped
+
+    def enable(self, trace_memory: bool = False) -> None:
+        """
+        Starts measuring stages.
+
+        Parameters:
+            trace_memory (bool): Whether to trace peak memory, starting tracemalloc if it is not running.
+        """
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stops measuring stages, and stops tracemalloc if enable started it. Recorded statistics are kept."""
+        self.enabled = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @property
+    def traces_memory(self) -> bool:
+        """Whether stages are measured with peak memory."""
+        return self.enabled and tracemalloc.is_tracing()
+
+    def reset(self) -> None:
+        """Forgets the recorded statistics."""
+        with self._lock:
+            self._stats.clear()
+
+    def stage(self, name: str):
+        """
+        Returns a context manager measuring the code it wraps as one call of a stage.
+
+        Parameters:
+            name (str): The name of the stage.
+
+        Returns:
+            ContextManager: The measurement, or a shared no-op context while profiling is off.
+        """
+        if not self.enabled:
+            return _DISABLED
+        return _Measurement(self, name)
+
+    def record(self, name: str, wall: float, cpu: float, peak_bytes: Optional[int] = None) -> None:
+        """
+        Adds one call of a stage to its statistics.
+
+        Parameters:
+            name (str): The name of the stage.
+            wall (float): The elapsed time in seconds.
+            cpu (float): The CPU time in seconds.
+            peak_bytes (Optional[int]): The peak allocation in bytes, if memory was traced without
+                overlapping another thread's stage.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(name, [0, 0., 0., 0., None])
+            stats[0] += 1
+            stats[1] += wall
+            stats[2] += cpu
+            stats[3] = max(stats[3], wall)
+            if peak_bytes is not None:
+                stats[4] = peak_bytes if stats[4] is None else max(stats[4], peak_bytes)
+        logger.info("stage=%s wall_seconds=%.6f cpu_seconds=%.6f peak_bytes=%s", name, wall, cpu,
+                    peak_bytes if peak_bytes is not None else '-')
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Tabulates the recorded statistics.
+
+        Returns:
+            pd.DataFrame: One row per stage, sorted by total wall time, with the number of calls,
+            total, mean and maximum wall time, total CPU time and peak memory; the peak is missing
+            for stages with no call measured on its own.
+        """
+        with self._lock:
+            rows = {name: list(stats) for name, stats in self._stats.items()}
+        table = pd.DataFrame.from_dict(rows, orient='index', columns=['Calls', 'Wall (s)', 'CPU (s)', 'Max wall (s)',
+                                                                      'Peak memory (bytes)'])
+        table['Calls'] = table['Calls'].astype(int)
+        table['Peak memory (bytes)'] = table['Peak memory (bytes)'].astype('Int64')
+        table.insert(2, 'Mean wall (s)', table['Wall (s)'] / table['Calls'])
+        table.index.name = 'Stage'
+        return table.sort_values('Wall (s)', ascending=False)
+
+    def to_prometheus(self) -> str:
+        """
+        Formats the recorded statistics in the Prometheus text exposition format.
+
+        Returns:
+            str: Counters of calls, wall and CPU seconds and a gauge of peak bytes, labelled by stage;
+            stages with no peak measured on their own have no peak sample.
+        """
+        with self._lock:
+            rows = sorted((name, list(stats)) for name, stats in self._stats.items())
+        metrics = [('app_stage_calls_total', 'counter', 'Calls of each instrumented stage.', 0),
+                   ('app_stage_wall_seconds_total', 'counter', 'Wall time spent in each stage.', 1),
+                   ('app_stage_cpu_seconds_total', 'counter', 'CPU time of the calling thread in each stage.', 2),
+                   ('app_stage_peak_bytes', 'gauge',
+                    'Largest traced allocation of one call of each stage that overlapped no other thread\'s stage.', 4)]
+        lines = []
+        for metric, kind, description, column in metrics:
+            lines += [f'# HELP {metric} {description}', f'# TYPE {metric} {kind}']
+            lines += [f'{metric}{{stage="{name}"}} {stats[column]:.9g}' for name, stats in rows
+                      if stats[column] is not None]
+        return '\n'.join(lines) + '\n'
+
+
+# The profiler the instrumented functions report to
+PROFILER = Profiler()
+
+
+def profiled(func: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
+    """
+    Measures every call of a function as a stage of the shared profiler.
+
+    Can be used as @profiled or @profiled(name='...'). While profiling is off, the
+    wrapper only checks a flag before calling the function.
+
+    Parameters:
+        func (Optional[Callable]): The function to wrap.
+        name (Optional[str]): The name of the stage; defaults to the module and function name, such as 'var.get_irf'.
+
+    Returns:
+        Callable: The wrapped function, or a decorator if func is not given.
+    """
+    def decorate(func: Callable) -> Callable:
+        stage_name = name or f"{func.__module__.rpartition('.')[2]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            with _Measurement(PROFILER, stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def serve_metrics(port: int, profiler: Profiler = PROFILER, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """
+    Serves the stage metrics at /metrics on a background thread, for a local Prometheus scraper.
+
+    Parameters:
+        port (int): The port to listen on; 0 picks a free one.
+        profiler (Profiler): The profiler whose statistics are served.
+        host (str): The address to bind; the default only accepts local connections.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown to stop it.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = profiler.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+def configure_from_environment(profiler: Profiler = PROFILER) -> None:
+    """
+    Enables the profiler if APP_PROFILE is set to 1 (timing) or 'memory' (timing and peak memory).
+
+    Parameters:
+        profiler (Profiler): The profiler to configure.
+    """
+    setting = os.environ.get(PROFILE_ENV, '').strip().lower()
+    if setting not in ('', '0', 'false'):
+        profiler.enable(trace_memory=setting == 'memory')
+
+
+configure_from_environment()
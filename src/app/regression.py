@@ -0,0 +1,186 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.lazy import lazy_import
+from app.pools import worker_pool
+from app.profiling import profiled
+
+# scipy.stats alone takes most of a second to import; neither is needed until a fit
+sp = lazy_import('scipy.sparse')
+stats = lazy_import('scipy.stats')
+
+# The layoffs regression: layoff counts on funding and its square, with industry and stage dummies
+REGRESSION_TARGET = '# Laid Off'
+REGRESSION_NUMERIC = ['$ Raised (mm)', '$ Raised (mm)^2']
+REGRESSION_CATEGORICAL = ['Industry', 'Stage']
+
+
+class SparseOLSResults(NamedTuple):
+    """OLS estimates with the attribute names of statsmodels' RegressionResults."""
+    params: pd.Series
+    bse: pd.Series
+    tvalues: pd.Series
+    pvalues: pd.Series
+    rsquared: float
+    rsquared_adj: float
+    nobs: int
+    df_resid: float
+
+
+def encode_design(data: pd.DataFrame, numeric: List[str], categorical: List[str]) -> Tuple['sp.csr_matrix', List[str]]:
+    """
+    Builds a sparse design matrix with a constant, numeric columns and one-hot encoded categories.
+
+    Missing numeric values are replaced by the column mean and infinite values by 1e9,
+    as in display.perform_regression_analysis. Each categorical column gets one dummy
+    per observed category except the first, named '<column>_<category>'.
+
+    Parameters:
+        data (pd.DataFrame): The input data.
+        numeric (List[str]): Numeric predictors.
+        categorical (List[str]): Categorical predictors to one-hot encode.
+
+    Returns:
+        Tuple[sp.csr_matrix, List[str]]: The design matrix and its column names, starting with 'const'.
+    """
+    nobs = len(data)
+    blocks = [sp.csr_matrix(np.ones((nobs, 1)))]
+    names = ['const']
+    if numeric:
+        values = data[numeric].astype(float)
+        values = values.fillna(values.mean()).replace([np.inf, -np.inf], 1e9)
+        blocks.append(sp.csr_matrix(values.to_numpy()))
+        names += numeric
+    for column in categorical:
+        categories = pd.Categorical(data[column]).remove_unused_categories()
+        codes = categories.codes
+        # Rows with a missing category (code -1) or the first category get no dummy
+        rows = np.flatnonzero(codes > 0)
+        dummies = sp.csr_matrix((np.ones(len(rows)), (rows, codes[rows] - 1)),
+                                shape=(nobs, max(len(categories.categories) - 1, 0)))
+        blocks.append(dummies)
+        names += [f'{column}_{category}' for category in categories.categories[1:]]
+    return sp.hstack(blocks, format='csr'), names
+
+
+def fit_sparse_ols(design: 'sp.spmatrix', target: np.ndarray, names: List[str]) -> SparseOLSResults:
+    """
+    Fits OLS on a sparse design through the normal equations, without densifying the design.
+
+    The columns are scaled to unit norm before forming X'X, which keeps the normal
+    equations well conditioned when predictors differ by orders of magnitude. X'X is
+    only as large as the number of predictors, and its pseudo-inverse handles
+    collinear dummies the way statsmodels' default pinv solver does.
+
+    Parameters:
+        design (sp.spmatrix): The design matrix, including the constant.
+        target (np.ndarray): The dependent variable.
+        names (List[str]): The column names of the design.
+
+    Returns:
+        SparseOLSResults: Coefficients, standard errors, t-values, p-values and R-squared values.
+    """
+    design = sp.csr_matrix(design, dtype=float)
+    target = np.asarray(target, dtype=float)
+    nobs = design.shape[0]
+
+    norms = np.sqrt(np.asarray(design.multiply(design).sum(axis=0))).ravel()
+    scale = np.divide(1., norms, out=np.zeros_like(norms), where=norms > 0)
+    scaled = design @ sp.diags(scale)
+    gram = (scaled.T @ scaled).toarray()
+    gram_inv = np.linalg.pinv(gram, hermitian=True)
+    rank = np.linalg.matrix_rank(gram, hermitian=True)
+
+    params = scale * (gram_inv @ (scaled.T @ target))
+    resid = target - design @ params
+    ssr = resid @ resid
+    centered = target - target.mean()
+    rsquared = 1. - ssr / (centered @ centered)
+    df_resid = nobs - rank
+    # Without residual degrees of freedom the adjusted fit and the standard errors are undefined
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsquared_adj = 1. - (nobs - 1) / df_resid * (1. - rsquared) if df_resid > 0 else np.nan
+        bse = np.sqrt(np.diag(gram_inv) * ssr / df_resid) * scale if df_resid > 0 else np.full(len(names), np.nan)
+        tvalues = params / bse
+    pvalues = 2 * stats.t.sf(np.abs(tvalues), max(df_resid, 1))
+
+    def series(values):
+        return pd.Series(values, index=names)
+
+    return SparseOLSResults(series(params), series(bse), series(tvalues), series(pvalues),
+                            rsquared, rsquared_adj, nobs, float(df_resid))
+
+
+@profiled
+def fit_regression(data: pd.DataFrame, target: str = REGRESSION_TARGET, numeric: Optional[List[str]] = None,
+                   categorical: Optional[List[str]] = None) -> SparseOLSResults:
+    """
+    Encodes and fits the layoffs regression.
+
+    Missing target values are replaced by the target mean, as in display.perform_regression_analysis.
+
+    Parameters:
+        data (pd.DataFrame): The layoffs data.
+        target (str): The dependent variable.
+        numeric (Optional[List[str]]): Numeric predictors; defaults to REGRESSION_NUMERIC.
+        categorical (Optional[List[str]]): Categorical predictors; defaults to REGRESSION_CATEGORICAL.
+
+    Returns:
+        SparseOLSResults: The fitted regression.
+    """
+    numeric = REGRESSION_NUMERIC if numeric is None else numeric
+    categorical = REGRESSION_CATEGORICAL if categorical is None else categorical
+    design, names = encode_design(data, numeric, categorical)
+    y = data[target].astype(float)
+    return fit_sparse_ols(design, y.fillna(y.mean()).to_numpy(), names)
+
+
+@profiled
+def fit_grouped_regressions(data: pd.DataFrame, by: pd.Series, target: str = REGRESSION_TARGET,
+                            numeric: Optional[List[str]] = None, categorical: Optional[List[str]] = None,
+                            executor: Optional[str] = 'thread',
+                            max_workers: Optional[int] = None) -> Dict[object, SparseOLSResults]:
+    """
+    Fits the regression separately for each group, for example for each year, in parallel.
+
+    Each group is encoded on its own, so it only gets dummies for the categories it
+    contains. Groups with no residual degrees of freedom are left out.
+
+    Parameters:
+        data (pd.DataFrame): The layoffs data.
+        by (pd.Series): The group of each row, aligned with data.
+        target (str): The dependent variable.
+        numeric (Optional[List[str]]): Numeric predictors; defaults to REGRESSION_NUMERIC.
+        categorical (Optional[List[str]]): Categorical predictors; defaults to REGRESSION_CATEGORICAL.
+        executor (Optional[str]): 'thread', 'process', or None to fit the groups one after another.
+        max_workers (Optional[int]): The number of workers in the pool.
+
+    Returns:
+        Dict[object, SparseOLSResults]: The fitted regression of each group, in group order.
+    """
+    if executor not in ('thread', 'process', None):
+        raise ValueError(f"Unknown executor: {executor}")
+    groups = [(name, group) for name, group in data.groupby(by, sort=True, observed=True)]
+    tasks = [(group, target, numeric, categorical) for _, group in groups]
+    if executor is None:
+        results = [fit_regression(*task) for task in tasks]
+    else:
+        with worker_pool(executor, max_workers) as pool:
+            results = list(pool.map(fit_regression, *zip(*tasks)))
+    return {name: result for (name, _), result in zip(groups, results) if result.df_resid > 0}
+
+
+def summarize_groups(results: Dict[object, SparseOLSResults]) -> pd.DataFrame:
+    """
+    Tabulates the fit of each group's regression.
+
+    Parameters:
+        results (Dict[object, SparseOLSResults]): The output of fit_grouped_regressions.
+
+    Returns:
+        pd.DataFrame: Observations, R-squared and adjusted R-squared per group.
+    """
+    return pd.DataFrame([{'Group': name, 'Observations': result.nobs, 'R-squared': result.rsquared,
+                          'Adjusted R-squared': result.rsquared_adj} for name, result in results.items()])
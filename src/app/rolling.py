@@ -0,0 +1,137 @@
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.bands import orthogonal_irfs
+from app.pools import worker_pool
+from app.profiling import profiled
+from app.var import TREND_ORDERS, build_lag_matrix
+
+# Responses of LAYOFFS to these shocks are tracked across windows
+ROLLING_IMPULSES = ['FEDFUNDS', 'UNCERTAINTY']
+
+# Ten years of monthly observations per rolling window
+ROLLING_WINDOW = 120
+
+
+class RollingIRFs(NamedTuple):
+    """Orthogonalized responses of one variable, estimated on a sequence of sample windows."""
+    ends: pd.Index
+    irfs: np.ndarray
+    impulses: List[str]
+    response: str
+
+
+def _cumulative_cross_products(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Returns S with S[t] = sum of left[i] right[i]' over i < t, so any window's sum is a difference of two rows."""
+    products = np.einsum('ti,tj->tij', left, right)
+    return np.concatenate([np.zeros((1,) + products.shape[1:]), np.cumsum(products, axis=0)])
+
+
+def _window_irfs(design: np.ndarray, endog: np.ndarray, starts: np.ndarray, ends: np.ndarray, lags: int,
+                 k_trend: int, periods: int) -> np.ndarray:
+    """
+    Estimates a VAR on each window [start, end) of the rows and computes its orthogonalized IRFs.
+
+    The cross-product matrices of every window come from differences of running
+    sums, which is the same as adding the rows that enter and dropping those that
+    leave, and all the windows are solved in one batched call.
+
+    Returns:
+        np.ndarray: The responses with shape (windows, periods + 1, neqs, neqs).
+    """
+    first, last = starts.min(), ends.max()
+    design, endog = design[first:last], endog[first:last]
+    xx = _cumulative_cross_products(design, design)
+    xy = _cumulative_cross_products(design, endog)
+    yy = _cumulative_cross_products(endog, endog)
+
+    # The first lags rows of each window are its presample, as in VAR(window).fit(lags)
+    begin, end = starts - first + lags, ends - first
+    gram, cross = xx[end] - xx[begin], xy[end] - xy[begin]
+    params = np.linalg.solve(gram, cross)
+    sse = yy[end] - yy[begin] - cross.transpose(0, 2, 1) @ params
+    dof = (end - begin) - params.shape[1]
+    sigma_u = sse / dof[:, None, None]
+
+    windows, neqs = len(starts), endog.shape[1]
+    coefs = params[:, k_trend:].reshape(windows, lags, neqs, neqs).transpose(0, 1, 3, 2)
+    return orthogonal_irfs(coefs, sigma_u, periods)
+
+
+def window_bounds(nobs: int, window: Optional[int], step: int = 1, min_window: Optional[int] = None) -> np.ndarray:
+    """
+    Lists the row ranges of rolling or expanding windows.
+
+    Parameters:
+        nobs (int): The number of observations.
+        window (Optional[int]): The rolling window length, or None for windows that all start at the first row.
+        step (int): The number of rows between the ends of consecutive windows.
+        min_window (Optional[int]): The length of the first expanding window; defaults to a quarter of the rows.
+
+    Returns:
+        np.ndarray: The start and end (exclusive) row of each window, with shape (windows, 2).
+    """
+    first_end = window if window is not None else (min_window or nobs // 4)
+    ends = np.arange(first_end, nobs + 1, step)
+    starts = ends - window if window is not None else np.zeros_like(ends)
+    return np.column_stack([starts, ends])
+
+
+@profiled
+def rolling_irfs(data: pd.DataFrame, lags: int, window: Optional[int] = ROLLING_WINDOW, step: int = 1,
+                 periods: int = 20, impulses: Optional[List[str]] = None, response: str = 'LAYOFFS',
+                 trend: str = 'c', min_window: Optional[int] = None, executor: Optional[str] = 'process',
+                 max_workers: Optional[int] = None, batch_size: int = 50) -> RollingIRFs:
+    """
+    Estimates the VAR on rolling or expanding windows and collects the responses of one variable.
+
+    Every window uses the same lag order and its own sample, so each estimate equals
+    VAR(data.iloc[start:end]).fit(lags). Windows are split into batches that are
+    solved in a thread or process pool.
+
+    Parameters:
+        data (pd.DataFrame): The differenced data, as returned by var.difference_variables.
+        lags (int): The lag order of every window's model.
+        window (Optional[int]): The window length in rows, or None for an expanding window.
+        step (int): The number of rows between the ends of consecutive windows.
+        periods (int): The number of periods after the shock.
+        impulses (Optional[List[str]]): The shocked variables; defaults to ROLLING_IMPULSES.
+        response (str): The responding variable.
+        trend (str): The deterministic terms, one of 'n', 'c', 'ct' or 'ctt'.
+        min_window (Optional[int]): The length of the first expanding window.
+        executor (Optional[str]): 'thread', 'process', or None to solve all windows in one batch.
+        max_workers (Optional[int]): The number of workers in the pool.
+        batch_size (int): The number of windows per task.
+
+    Returns:
+        RollingIRFs: The last date of each window and the responses with shape (windows, periods + 1, impulses).
+    """
+    if executor not in ('thread', 'process', None):
+        raise ValueError(f"Unknown executor: {executor}")
+    impulses = ROLLING_IMPULSES if impulses is None else impulses
+    names = list(data.columns)
+    values = data.to_numpy(dtype=float)
+    k_trend = TREND_ORDERS[trend]
+
+    bounds = window_bounds(len(values), window, step, min_window)
+    if len(bounds) == 0:
+        raise ValueError(f"A window of {window or min_window} rows does not fit in {len(values)} observations.")
+    shortest = (bounds[:, 1] - bounds[:, 0]).min() - lags
+    if shortest <= k_trend + len(names) * lags:
+        raise ValueError(f"Windows need more than {k_trend + len(names) * lags + lags} rows for a VAR({lags}) "
+                         f"with {len(names)} variables.")
+
+    design = build_lag_matrix(values, lags, trend)
+    batches = [bounds[i:i + batch_size] for i in range(0, len(bounds), batch_size)]
+    tasks = [(design, values, batch[:, 0], batch[:, 1], lags, k_trend, periods) for batch in batches]
+    if executor is None or len(tasks) == 1:
+        results = [_window_irfs(*task) for task in tasks]
+    else:
+        with worker_pool(executor, max_workers) as pool:
+            results = list(pool.map(_window_irfs, *zip(*tasks)))
+
+    irfs = np.concatenate(results)
+    selected = irfs[:, :, names.index(response), [names.index(impulse) for impulse in impulses]]
+    return RollingIRFs(data.index[bounds[:, 1] - 1], np.ascontiguousarray(selected), list(impulses), response)
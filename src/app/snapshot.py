@@ -0,0 +1,75 @@
+from typing import List, NamedTuple
+
+import numpy as np
+
+
+class ModelSnapshot(NamedTuple):
+    """
+    The arrays of a fitted VAR and its IRFs that the pages draw from, without statsmodels objects.
+
+    A snapshot is written as a plain .npz archive, so loading it imports neither
+    statsmodels nor pickle-reconstructed results.
+    """
+    names: List[str]
+    params: np.ndarray
+    coefs: np.ndarray
+    sigma_u: np.ndarray
+    orth_irfs: np.ndarray
+    orth_stderr: np.ndarray
+    nobs: int
+    history: np.ndarray
+
+    @property
+    def lags(self) -> int:
+        """The lag order of the model."""
+        return self.coefs.shape[0]
+
+    @property
+    def periods(self) -> int:
+        """The number of IRF periods after the shock."""
+        return self.orth_irfs.shape[0] - 1
+
+
+def take_snapshot(fitted_model, irf) -> ModelSnapshot:
+    """
+    Copies the coefficients, residual covariance, orthogonalized IRFs and last observations out of a fitted model.
+
+    Parameters:
+        fitted_model (VARResultsWrapper): The fitted VAR model.
+        irf (IRAnalysis): Its impulse response functions.
+
+    Returns:
+        ModelSnapshot: The arrays, with asymptotic standard errors of the orthogonalized IRFs and
+        the last lags observations, from which forecasts start.
+    """
+    return ModelSnapshot(list(fitted_model.names), np.asarray(fitted_model.params, dtype=float),
+                         np.asarray(fitted_model.coefs, dtype=float), np.asarray(fitted_model.sigma_u, dtype=float),
+                         np.asarray(irf.orth_irfs, dtype=float), np.asarray(irf.stderr(orth=True), dtype=float),
+                         int(fitted_model.nobs), np.asarray(fitted_model.endog[-fitted_model.k_ar:], dtype=float))
+
+
+def save_snapshot(path: str, snapshot: ModelSnapshot) -> None:
+    """
+    Writes a snapshot as an uncompressed .npz archive.
+
+    Parameters:
+        path (str): The file to write; it should end in .npz.
+        snapshot (ModelSnapshot): The snapshot.
+    """
+    with open(path, 'wb') as handle:
+        np.savez(handle, **{**snapshot._asdict(), 'names': np.array(snapshot.names), 'nobs': snapshot.nobs})
+
+
+def load_snapshot(path: str) -> ModelSnapshot:
+    """
+    Reads a snapshot written by save_snapshot.
+
+    Parameters:
+        path (str): The .npz file.
+
+    Returns:
+        ModelSnapshot: The snapshot.
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        arrays = {field: archive[field] for field in ModelSnapshot._fields}
+    return ModelSnapshot(**{**arrays, 'names': arrays['names'].tolist(), 'nobs': int(arrays['nobs'])})
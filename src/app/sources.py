@@ -0,0 +1,287 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from app.ingest import (LAYOFFS_DATES, LAYOFFS_DTYPES, MACRO_DATES, MACRO_DTYPES, RACY_WINDOW_NS, file_sha256,
+                        ingest_table)
+from app.profiling import profiled
+
+# Each deployment can point the app at its own tables; unset, the shipped CSV files are used
+LAYOFFS_SOURCE_ENV = 'LAYOFFS_SOURCE'
+MACRO_SOURCE_ENV = 'MACRO_SOURCE'
+
+POOL_SIZE = 4
+POOL_TIMEOUT = 30.
+
+
+class Schema(NamedTuple):
+    """The columns of a table, their pandas dtypes, the date columns with their text formats, and the date to track."""
+    dtypes: Dict[str, str]
+    dates: Dict[str, str]
+    date_column: str
+
+
+LAYOFFS_SCHEMA = Schema(LAYOFFS_DTYPES, LAYOFFS_DATES, 'Date')
+MACRO_SCHEMA = Schema(MACRO_DTYPES, MACRO_DATES, 'observation_date')
+SCHEMAS = {'layoffs': LAYOFFS_SCHEMA, 'macro': MACRO_SCHEMA}
+
+
+# Content hashes of files, by path, with the size and mtime they were taken at
+_FILE_HASHES: Dict[str, tuple] = {}
+_FILE_HASHES_LOCK = threading.Lock()
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Returns the SHA-256 of a file's contents, rehashing only when its size or mtime changed.
+
+    As in ingest_table, a size and mtime seen less than RACY_WINDOW_NS after the file
+    was modified are not trusted, since the file may have changed again within the
+    timestamp granularity.
+
+    Parameters:
+        path (str): The path to the file.
+
+    Returns:
+        str: The hex digest.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _FILE_HASHES_LOCK:
+        size, mtime_ns, checked_ns, sha256 = _FILE_HASHES.get(path, (None, None, 0, None))
+    if size == stat.st_size and mtime_ns == stat.st_mtime_ns and stat.st_mtime_ns + RACY_WINDOW_NS < checked_ns:
+        return sha256
+    checked_ns = time.time_ns()
+    sha256 = file_sha256(path)
+    with _FILE_HASHES_LOCK:
+        _FILE_HASHES[path] = (stat.st_size, stat.st_mtime_ns, checked_ns, sha256)
+    return sha256
+
+
+def _apply_schema(data: pd.DataFrame, schema: Schema) -> pd.DataFrame:
+    """Casts columns a source returned with other types, and parses dates stored as text."""
+    data = data.astype({column: dtype for column, dtype in schema.dtypes.items() if str(data[column].dtype) != dtype})
+    for column, date_format in schema.dates.items():
+        if not pd.api.types.is_datetime64_any_dtype(data[column]):
+            data[column] = pd.to_datetime(data[column], format=date_format)
+    return data
+
+
+class DataSource(ABC):
+    """
+    A table the pipeline reads: it can be read in bulk and fingerprinted cheaply.
+
+    The fingerprint changes whenever the data may have changed and is part of the
+    pipeline's stage keys, so cached stages downstream are only recomputed after
+    the data actually changed.
+    """
+
+    location: str
+
+    @abstractmethod
+    def fingerprint(self) -> str:
+        """Returns a token that changes when the table changes."""
+
+    @abstractmethod
+    def read(self) -> pd.DataFrame:
+        """Reads the whole table with the schema's columns and types."""
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.location!r})'
+
+
+class FileSource(DataSource):
+    """A table stored in a single file, fingerprinted by its contents."""
+
+    def __init__(self, path: str, schema: Schema):
+        self.location = self.path = path
+        self.schema = schema
+
+    def fingerprint(self) -> str:
+        return file_fingerprint(self.path)
+
+
+class CsvSource(FileSource):
+    """A CSV file, loaded through the ingestion layer's columnar cache."""
+
+    def __init__(self, path: str, schema: Schema, cache_dir: Optional[str] = None):
+        super().__init__(path, schema)
+        self.cache_dir = cache_dir
+
+    @profiled
+    def read(self) -> pd.DataFrame:
+        return ingest_table(self.path, self.schema.dtypes, self.schema.dates, self.cache_dir)[0]
+
+
+class ParquetSource(FileSource):
+    """A Parquet file; only the schema's columns are read."""
+
+    @profiled
+    def read(self) -> pd.DataFrame:
+        data = pd.read_parquet(self.path, columns=list(self.schema.dtypes) + list(self.schema.dates))
+        return _apply_schema(data, self.schema)
+
+
+class ConnectionPool:
+    """
+    A bounded pool of DB-API connections shared by threads.
+
+    Connections are opened on demand up to the pool size; beyond that, callers wait
+    for one to be returned. The most recently returned connection is handed out
+    first, so an idle pool keeps few connections warm.
+    """
+
+    def __init__(self, connect: Callable[[], Any], size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT):
+        self._connect = connect
+        self._idle: 'queue.LifoQueue' = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.size = size
+        self.timeout = timeout
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Lends a connection for the duration of a with block.
+
+        Yields:
+            Any: The connection; it goes back to the pool afterwards, even if the block raised.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection became free within {self.timeout}s.")
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            try:
+                yield connection
+            finally:
+                self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Closes the idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _crc32(value: Any) -> Optional[int]:
+    """The CRC-32 of a value's text, registered as the crc32 SQL function of SQLite connections."""
+    if value is None:
+        return None
+    return zlib.crc32(value if isinstance(value, bytes) else str(value).encode())
+
+
+def sqlite_pool(path: str, size: int = POOL_SIZE) -> ConnectionPool:
+    """
+    Creates a pool of read-only connections to a SQLite database.
+
+    Parameters:
+        path (str): The database file.
+        size (int): The largest number of open connections.
+
+    Returns:
+        ConnectionPool: The pool.
+    """
+    uri = f'file:{os.path.abspath(path)}?mode=ro'
+
+    def connect():
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        # SQLite has no hash function; the default change query of SqlSource needs one
+        connection.create_function('crc32', 1, _crc32, deterministic=True)
+        return connection
+
+    return ConnectionPool(connect, size)
+
+
+def quote_identifier(name: str) -> str:
+    """Quotes a table or column name for SQL, so names with spaces or symbols are safe to interpolate."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqlSource(DataSource):
+    """
+    A table in a SQL database, read through a connection pool.
+
+    The fingerprint is one aggregate query: the row count, the latest date, the
+    total of every numeric column and the sum of a checksum of every row's values,
+    text columns included. It catches appended, deleted and revised rows, and values
+    moved between rows, while transferring a single row. The checksum function,
+    crc32 by default, must exist in the database; sqlite_pool registers it. A custom
+    change query, such as the latest update timestamp of a mirror, can replace it.
+    """
+
+    def __init__(self, pool: ConnectionPool, table: str, schema: Schema, location: Optional[str] = None,
+                 change_query: Optional[str] = None, checksum_function: str = 'crc32'):
+        self.pool = pool
+        self.table = table
+        self.schema = schema
+        self.location = location or table
+        self.change_query = change_query or self._default_change_query(checksum_function)
+
+    def _default_change_query(self, checksum_function: str) -> str:
+        """Builds the aggregate query behind the default fingerprint."""
+        numeric = [column for column, dtype in self.schema.dtypes.items() if dtype.startswith(('float', 'int'))]
+        # Separated so that moving text from one column to the next changes the row's checksum
+        row_text = " || '|' || ".join(f"COALESCE(CAST({quote_identifier(column)} AS TEXT), '')"
+                                      for column in list(self.schema.dtypes) + list(self.schema.dates))
+        aggregates = ['COUNT(*)', f'MAX({quote_identifier(self.schema.date_column)})']
+        aggregates += [f'TOTAL({quote_identifier(column)})' for column in numeric]
+        aggregates.append(f'SUM({checksum_function}({row_text}))')
+        return f"SELECT {', '.join(aggregates)} FROM {quote_identifier(self.table)}"
+
+    def fingerprint(self) -> str:
+        with self.pool.connection() as connection:
+            return repr(tuple(connection.execute(self.change_query).fetchone()))
+
+    @profiled
+    def read(self) -> pd.DataFrame:
+        columns = ', '.join(quote_identifier(column) for column in list(self.schema.dtypes) + list(self.schema.dates))
+        with self.pool.connection() as connection:
+            data = pd.read_sql_query(f'SELECT {columns} FROM {quote_identifier(self.table)}', connection)
+        # Databases store dates as ISO text whatever format the CSV extracts use
+        schema = self.schema._replace(dates={column: 'ISO8601' for column in self.schema.dates})
+        return _apply_schema(data, schema)
+
+
+def open_source(location: Union[str, DataSource], schema: Schema, cache_dir: Optional[str] = None) -> DataSource:
+    """
+    Opens a data source from its location.
+
+    A location is a CSV or Parquet file path, or a SQLite URL naming the table, such as
+    'sqlite:///data/fred.db?table=macro'. Sources are returned unchanged.
+
+    Parameters:
+        location (Union[str, DataSource]): The location, or a source.
+        schema (Schema): The columns and types of the table.
+        cache_dir (Optional[str]): Where CSV sources keep their columnar cache.
+
+    Returns:
+        DataSource: The source; a SQLite source opens its own connection pool.
+    """
+    if isinstance(location, DataSource):
+        return location
+    if location.startswith('sqlite:'):
+        url = urlparse(location)
+        tables = parse_qs(url.query).get('table')
+        if not tables:
+            raise ValueError(f"The SQLite location {location!r} does not name a table, as in '?table=macro'.")
+        # sqlite:///relative.db keeps the path relative; sqlite:////absolute.db makes it absolute
+        path = url.path[1:] if url.path.startswith('/') else url.path
+        return SqlSource(sqlite_pool(path), tables[0], schema, location)
+    if os.path.splitext(location)[1].lower() in ('.parquet', '.pq'):
+        return ParquetSource(location, schema)
+    return CsvSource(location, schema, cache_dir)
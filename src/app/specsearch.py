@@ -0,0 +1,332 @@
+import itertools
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.bands import orthogonal_irfs
+from app.forecast import companion_matrix
+from app.pools import worker_pool
+from app.profiling import profiled
+from app.var import TREND_ORDERS, build_lag_matrix, information_criteria
+
+# The macro variables in the app's Cholesky ordering, before any differencing
+RAW_VARIABLES = ['INDPRO', 'CORESTICKM159SFRBATL', 'FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS']
+
+# The names the app gives differenced variables; any other gets a D_ prefix
+DIFFERENCED_NAMES = {'INDPRO': 'D_INDPRO', 'CORESTICKM159SFRBATL': 'INFLATION'}
+
+# How each variable is named in the results, whether or not it is differenced
+LABELS = {'CORESTICKM159SFRBATL': 'INFLATION'}
+
+# The hypotheses of the study: the shocked variable and the expected sign of the layoffs response
+HYPOTHESES = {'H1': ('FEDFUNDS', 1), 'H2': ('CORESTICKM159SFRBATL', 1), 'H3': ('INDPRO', -1), 'H4': ('UNCERTAINTY', 1)}
+
+CRITERIA = ['AIC', 'BIC', 'HQIC']
+TRENDS = ['n', 'c', 'ct']
+
+# Responses are summed over the impact month and this many months after it
+RESPONSE_HORIZON = 6
+
+# The largest deterministic part any specification may use; every design shares its columns
+_MAX_TREND = max(TREND_ORDERS.values())
+
+
+def differenced_name(variable: str) -> str:
+    """The column name of a differenced variable."""
+    return DIFFERENCED_NAMES.get(variable, f'D_{variable}')
+
+
+def label(variable: str) -> str:
+    """The name of a variable in the results."""
+    return LABELS.get(variable, variable)
+
+
+class Specification(NamedTuple):
+    """A VAR specification: the variables in Cholesky order, which of them are differenced, and the trend."""
+    variables: Tuple[str, ...]
+    differenced: Tuple[bool, ...]
+    trend: str
+
+    @property
+    def columns(self) -> List[str]:
+        """The columns of the specification panel the model uses."""
+        return [differenced_name(variable) if diff else variable
+                for variable, diff in zip(self.variables, self.differenced)]
+
+
+BASELINE = Specification(tuple(RAW_VARIABLES), (True, True, False, False, False), 'c')
+
+
+def specification_grid(variables: Sequence[str] = RAW_VARIABLES, response: str = 'LAYOFFS', min_variables: int = 2,
+                       differencing: Optional[Dict[str, Sequence[bool]]] = None,
+                       trends: Sequence[str] = TRENDS) -> List[Specification]:
+    """
+    Enumerates variable subsets, differencing choices and trends.
+
+    Parameters:
+        variables (Sequence[str]): The candidate variables, in the default Cholesky order.
+        response (str): The variable every specification includes.
+        min_variables (int): The smallest number of variables in a specification.
+        differencing (Optional[Dict[str, Sequence[bool]]]): The differencing choices of each variable;
+            variables not listed are tried both in levels and differenced.
+        trends (Sequence[str]): The deterministic terms to try.
+
+    Returns:
+        List[Specification]: Every combination, with the variables in the order given.
+    """
+    differencing = differencing or {}
+    others = [variable for variable in variables if variable != response]
+    specifications = []
+    for size in range(max(min_variables - 1, 0), len(others) + 1):
+        for subset in itertools.combinations(others, size):
+            chosen = tuple(variable for variable in variables if variable in subset or variable == response)
+            choices = [tuple(differencing.get(variable, (False, True))) for variable in chosen]
+            for differenced in itertools.product(*choices):
+                specifications += [Specification(chosen, differenced, trend) for trend in trends]
+    return specifications
+
+
+def specification_panel(data: pd.DataFrame, variables: Sequence[str] = RAW_VARIABLES) -> pd.DataFrame:
+    """
+    Puts every variable in levels and differenced side by side on a common sample.
+
+    The first observation, which has no difference, is dropped from all columns, so
+    every specification is estimated on the same months as the app's model.
+
+    Parameters:
+        data (pd.DataFrame): The macro data in levels, as returned by var.prepare_raw_data.
+        variables (Sequence[str]): The variables to include.
+
+    Returns:
+        pd.DataFrame: The levels followed by the differences of the variables.
+    """
+    levels = data[list(variables)].astype(float)
+    differences = levels.diff().rename(columns=differenced_name)
+    return pd.concat([levels, differences], axis=1).iloc[1:]
+
+
+def _cross_product_stacks(values: np.ndarray, maxlags: int) -> Dict[str, np.ndarray]:
+    """
+    Computes the cross products of one lagged design over all panel columns for every sample start.
+
+    Entry lag - 1 of each stack covers rows lag onward, the sample of a VAR(lag), so
+    the Gram matrix of any specification is a block of it; see select_lag_order.
+    """
+    design = build_lag_matrix(values, maxlags, 'ctt')
+    gram = design[maxlags:].T @ design[maxlags:]
+    cross = design[maxlags:].T @ values[maxlags:]
+    endog_gram = values[maxlags:].T @ values[maxlags:]
+    stacks = {'gram': np.empty((maxlags,) + gram.shape), 'cross': np.empty((maxlags,) + cross.shape),
+              'endog_gram': np.empty((maxlags,) + endog_gram.shape)}
+    for lag in range(maxlags, 0, -1):
+        if lag < maxlags:
+            row, obs = design[lag], values[lag]
+            gram += np.outer(row, row)
+            cross += np.outer(row, obs)
+            endog_gram += np.outer(obs, obs)
+        stacks['gram'][lag - 1], stacks['cross'][lag - 1], stacks['endog_gram'][lag - 1] = gram, cross, endog_gram
+    return stacks
+
+
+def _share(arrays: Dict[str, np.ndarray]) -> Tuple[SharedMemory, dict]:
+    """Copies arrays into one shared memory block and returns it with the layout workers attach by."""
+    block = SharedMemory(create=True, size=max(sum(array.nbytes for array in arrays.values()), 1))
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        np.ndarray(array.shape, array.dtype, buffer=block.buf, offset=offset)[...] = array
+        layout[name] = (offset, array.shape, array.dtype.str)
+        offset += array.nbytes
+    return block, {'name': block.name, 'arrays': layout}
+
+
+# Shared blocks attached in this process, by name, kept open for the life of the worker
+_ATTACHED: Dict[str, Tuple[SharedMemory, Dict[str, np.ndarray]]] = {}
+
+
+def _attach(shared: Union[dict, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Returns the arrays themselves, or read-only views of a shared memory layout."""
+    if 'name' not in shared:
+        return shared
+    if shared['name'] not in _ATTACHED:
+        block = SharedMemory(name=shared['name'])
+        arrays = {}
+        for name, (offset, shape, dtype) in shared['arrays'].items():
+            arrays[name] = np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+            arrays[name].flags.writeable = False
+        _ATTACHED[shared['name']] = (block, arrays)
+    return _ATTACHED[shared['name']][1]
+
+
+def _search_batch(shared: dict, columns: List[str], specifications: List[Specification], maxlags: int,
+                  criteria: Sequence[str], orderings: str, periods: int, horizon: int,
+                  response: str) -> List[dict]:
+    """
+    Selects the lag order of each specification by each criterion, fits it and summarizes its IRFs.
+
+    Returns:
+        List[dict]: One row per specification, criterion and Cholesky ordering.
+    """
+    stacks = _attach(shared)
+    nobs_total, width = int(stacks['nobs'][0]), len(columns)
+    rows = []
+    for specification in specifications:
+        positions = [columns.index(column) for column in specification.columns]
+        k_trend = TREND_ORDERS[specification.trend]
+
+        # Every lag order is estimated on its own sample from blocks of the shared cross products
+        fits = {}
+        for lag in range(1, maxlags + 1):
+            design_columns = list(range(k_trend)) + [_MAX_TREND + width * step + position
+                                                     for step in range(lag) for position in positions]
+            nobs, ncols = nobs_total - lag, len(design_columns)
+            if nobs <= ncols:
+                break
+            try:
+                chol = np.linalg.cholesky(stacks['gram'][lag - 1][np.ix_(design_columns, design_columns)])
+            except np.linalg.LinAlgError:
+                continue
+            projected = np.linalg.solve(chol, stacks['cross'][lag - 1][np.ix_(design_columns, positions)])
+            sse = stacks['endog_gram'][lag - 1][np.ix_(positions, positions)] - projected.T @ projected
+            fits[lag] = (information_criteria(sse, nobs, lag, k_trend), chol, projected, sse / (nobs - ncols))
+        if not fits:
+            continue
+
+        chosen = {criterion: min(fits, key=lambda lag: fits[lag][0][criterion]) for criterion in criteria}
+        summaries = {lag: _summarize_fit(specification, fits[lag], lag, orderings, periods, horizon, response)
+                     for lag in set(chosen.values())}
+        for criterion, lag in chosen.items():
+            base = {'Variables': ', '.join(map(label, specification.variables)),
+                    'Differenced': ', '.join(label(variable) for variable, diff in
+                                             zip(specification.variables, specification.differenced) if diff) or '-',
+                    'Trend': specification.trend, 'Criterion': criterion, 'Lags': lag, **fits[lag][0]}
+            rows += [{**base, **summary} for summary in summaries[lag]]
+    return rows
+
+
+def _summarize_fit(specification: Specification, fit: tuple, lag: int, orderings: str, periods: int, horizon: int,
+                   response: str) -> List[dict]:
+    """Checks the stability of one fitted model and sums the layoffs responses under each Cholesky ordering."""
+    _, chol, projected, sigma_u = fit
+    neqs, k_trend = len(specification.variables), TREND_ORDERS[specification.trend]
+    params = np.linalg.solve(chol.T, projected)
+    coefs = params[k_trend:].reshape(lag, neqs, neqs).transpose(0, 2, 1)
+    stable = bool(np.abs(np.linalg.eigvals(companion_matrix(coefs))).max() < 1)
+
+    order = range(neqs)
+    permutations = list(itertools.permutations(order)) if orderings == 'all' else [tuple(order)]
+    # Reordering the variables and taking the Cholesky factor of the reordered covariance gives the
+    # responses under that ordering, so all orderings are one batch of the same model
+    batch = np.array(permutations)
+    irfs = orthogonal_irfs(coefs[:, batch[:, :, None], batch[:, None, :]].transpose(1, 0, 2, 3),
+                           sigma_u[batch[:, :, None], batch[:, None, :]], periods)
+    cumulative = irfs[:, :horizon + 1].sum(axis=1)
+
+    target = specification.variables.index(response)
+    summaries = []
+    for index, permutation in enumerate(permutations):
+        summary = {'Stable': stable, 'Ordering': ' < '.join(label(specification.variables[i]) for i in permutation)}
+        for hypothesis, (impulse, _) in HYPOTHESES.items():
+            column = f'{hypothesis}: {label(impulse)} -> {label(response)}'
+            if impulse in specification.variables:
+                shock = permutation.index(specification.variables.index(impulse))
+                summary[column] = cumulative[index, permutation.index(target), shock]
+            else:
+                summary[column] = np.nan
+        summaries.append(summary)
+    return summaries
+
+
+@profiled
+def search_specifications(data: pd.DataFrame, specifications: Optional[Sequence[Specification]] = None,
+                          maxlags: int = 12, criteria: Sequence[str] = CRITERIA, orderings: str = 'default',
+                          periods: int = 20, horizon: int = RESPONSE_HORIZON, response: str = 'LAYOFFS',
+                          rank_by: str = 'AIC', executor: Optional[str] = 'process',
+                          max_workers: Optional[int] = None, batch_size: int = 40) -> pd.DataFrame:
+    """
+    Fits a grid of VAR specifications and ranks them.
+
+    All specifications are blocks of one lagged design over every variable in levels
+    and differenced, so its cross-product matrices are computed once per lag order
+    and shared with the workers through shared memory instead of being pickled into
+    every task. Each specification's lag order is chosen by each criterion, every
+    chosen model is fitted once, and the orthogonalized responses of the response
+    variable are summed over the first months after each hypothesis' shock.
+
+    Parameters:
+        data (pd.DataFrame): The macro data in levels, as returned by var.prepare_raw_data.
+        specifications (Optional[Sequence[Specification]]): The specifications; defaults to specification_grid().
+        maxlags (int): The largest lag order to consider.
+        criteria (Sequence[str]): The information criteria that choose the lag order.
+        orderings (str): 'default' for the order of each specification's variables, or 'all' for every Cholesky ordering.
+        periods (int): The number of IRF periods.
+        horizon (int): The number of months after the impact the responses are summed over.
+        response (str): The responding variable.
+        rank_by (str): The criterion the table is sorted by, within stable and then unstable models. Values
+            are only a rough guide across specifications with different variables or differencing.
+        executor (Optional[str]): 'thread', 'process', or None to fit every specification in this thread.
+        max_workers (Optional[int]): The number of workers in the pool.
+        batch_size (int): The number of specifications per task.
+
+    Returns:
+        pd.DataFrame: One row per specification, criterion and ordering, indexed by rank, with the
+        chosen lag order, the information criteria, stability and the summed responses.
+    """
+    if executor not in ('thread', 'process', None):
+        raise ValueError(f"Unknown executor: {executor}")
+    if orderings not in ('default', 'all'):
+        raise ValueError(f"Unknown orderings: {orderings}")
+    specifications = specification_grid() if specifications is None else list(specifications)
+    variables = [variable for variable in RAW_VARIABLES
+                 if any(variable in specification.variables for specification in specifications)]
+    variables += sorted({variable for specification in specifications for variable in specification.variables}
+                        - set(variables))
+    panel = specification_panel(data, variables)
+    columns = list(panel.columns)
+    stacks = _cross_product_stacks(panel.to_numpy(), maxlags)
+    stacks['nobs'] = np.array([len(panel)])
+
+    batches = [specifications[i:i + batch_size] for i in range(0, len(specifications), batch_size)]
+    settings = (maxlags, criteria, orderings, periods, horizon, response)
+    if executor is None or len(batches) == 1:
+        results = [_search_batch(stacks, columns, batch, *settings) for batch in batches]
+    elif executor == 'thread':
+        with worker_pool('thread', max_workers) as pool:
+            results = list(pool.map(lambda batch: _search_batch(stacks, columns, batch, *settings), batches))
+    else:
+        block, layout = _share(stacks)
+        try:
+            with worker_pool('process', max_workers) as pool:
+                results = list(pool.map(_search_batch, itertools.repeat(layout), itertools.repeat(columns), batches,
+                                        *(itertools.repeat(setting) for setting in settings)))
+        finally:
+            block.close()
+            block.unlink()
+
+    table = pd.DataFrame([row for rows in results for row in rows])
+    table = table.sort_values(['Stable', rank_by], ascending=[False, True], kind='stable', ignore_index=True)
+    table.index = pd.RangeIndex(1, len(table) + 1, name='Rank')
+    return table
+
+
+def hypothesis_support(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarizes how often each hypothesis holds across the stable specifications of a search.
+
+    Parameters:
+        table (pd.DataFrame): The output of search_specifications.
+
+    Returns:
+        pd.DataFrame: For each hypothesis, the number of stable models that include its shock, the
+        share in which the summed response has the expected sign, and the median summed response.
+    """
+    stable = table[table['Stable']]
+    rows = {}
+    for hypothesis, (_, sign) in HYPOTHESES.items():
+        column = next(column for column in table.columns if column.startswith(f'{hypothesis}: '))
+        responses = stable[column].dropna()
+        rows[column] = {'Models': len(responses),
+                        'Share supporting': (np.sign(responses) == sign).mean() if len(responses) else np.nan,
+                        'Median response': responses.median()}
+    return pd.DataFrame.from_dict(rows, orient='index')
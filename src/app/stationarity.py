@@ -0,0 +1,114 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.lazy import LazyCallable
+from app.pools import worker_pool
+from app.profiling import profiled
+
+# Loaded on the first test rather than when the app starts
+adfuller = LazyCallable('statsmodels.tsa.stattools', 'adfuller')
+
+# Columns of the table returned by adf_tests, in the order of the adfuller result tuple
+ADF_COLUMNS = ['Variable', 'ADF Statistic', 'p-value', 'Used Lag', 'Observations',
+               'Critical 1%', 'Critical 5%', 'Critical 10%', 'IC Best']
+
+# Results are kept for this many distinct series and test settings
+ADF_CACHE_SIZE = 256
+
+_adf_cache: 'OrderedDict[str, Tuple]' = OrderedDict()
+_adf_cache_lock = threading.Lock()
+
+
+def series_key(series: pd.Series, maxlag: Optional[int], regression: str, autolag: Optional[str]) -> str:
+    """
+    Computes the cache key of an ADF test from the series values and the test settings.
+
+    Parameters:
+        series (pd.Series): The series to test, without missing values.
+        maxlag (Optional[int]): The maximum lag passed to adfuller.
+        regression (str): The deterministic terms passed to adfuller.
+        autolag (Optional[str]): The lag selection method passed to adfuller.
+
+    Returns:
+        str: A SHA-256 hex digest.
+    """
+    digest = hashlib.sha256(pd.util.hash_pandas_object(series, index=False).values.tobytes())
+    digest.update(repr((maxlag, regression, autolag)).encode())
+    return digest.hexdigest()
+
+
+def _run_adf(values: np.ndarray, maxlag: Optional[int], regression: str, autolag: Optional[str]) -> Tuple:
+    """Runs one ADF test and flattens its result into a table row without the variable name."""
+    result = adfuller(values, maxlag, regression, autolag)
+    stat, pvalue, usedlag, nobs, critical = result[:5]
+    # Without lag selection there is no best information criterion, and the lag used is maxlag
+    icbest = result[5] if autolag is not None else np.nan
+    return (stat, pvalue, usedlag, nobs, critical['1%'], critical['5%'], critical['10%'], icbest)
+
+
+@profiled
+def adf_tests(data: pd.DataFrame, columns: List[str], maxlag: Optional[int] = None, regression: str = 'c',
+              autolag: Optional[str] = 'AIC', executor: Optional[str] = 'thread',
+              max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Runs the Augmented Dickey-Fuller test on several columns at once.
+
+    Missing values are dropped from each column. Results are cached by the series
+    values and the test settings, so only new or changed series are tested; those
+    run concurrently in a thread or process pool.
+
+    Parameters:
+        data (pd.DataFrame): The data containing the columns.
+        columns (List[str]): The columns to test.
+        maxlag (Optional[int]): The maximum lag passed to adfuller.
+        regression (str): The deterministic terms passed to adfuller.
+        autolag (Optional[str]): The lag selection method passed to adfuller.
+        executor (Optional[str]): 'thread', 'process', or None to run the tests one after another.
+        max_workers (Optional[int]): The number of workers in the pool.
+
+    Returns:
+        pd.DataFrame: One row per column with the columns listed in ADF_COLUMNS.
+    """
+    if executor not in ('thread', 'process', None):
+        raise ValueError(f"Unknown executor: {executor}")
+
+    rows = {}
+    pending = {}
+    for column in columns:
+        series = data[column].dropna()
+        key = series_key(series, maxlag, regression, autolag)
+        with _adf_cache_lock:
+            if key in _adf_cache:
+                _adf_cache.move_to_end(key)
+                rows[column] = _adf_cache[key]
+                continue
+        pending[column] = (key, series.to_numpy(dtype=float))
+
+    if pending:
+        if executor is None or len(pending) == 1:
+            results = [_run_adf(values, maxlag, regression, autolag) for _, values in pending.values()]
+        else:
+            with worker_pool(executor, max_workers) as pool:
+                futures = [pool.submit(_run_adf, values, maxlag, regression, autolag)
+                           for _, values in pending.values()]
+                results = [future.result() for future in futures]
+        with _adf_cache_lock:
+            for (column, (key, _)), result in zip(pending.items(), results):
+                rows[column] = result
+                _adf_cache[key] = result
+                _adf_cache.move_to_end(key)
+            while len(_adf_cache) > ADF_CACHE_SIZE:
+                _adf_cache.popitem(last=False)
+
+    return pd.DataFrame([(column, *rows[column]) for column in columns], columns=ADF_COLUMNS)
+
+
+def clear_adf_cache() -> None:
+    """Removes every cached ADF result."""
+    with _adf_cache_lock:
+        _adf_cache.clear()
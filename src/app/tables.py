@@ -0,0 +1,136 @@
+import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Page sizes offered on the Data Tables page; only one page of rows is sent to the browser
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Columns of the layoffs table that can be filtered by value
+FILTER_COLUMNS = ['Industry', 'Stage']
+
+
+class LayoffsTable:
+    """
+    Server-side filtering, column projection and paging of the layoffs table.
+
+    The row positions of every category of the filter columns, and the row order by
+    date, are computed once. A query then only touches the positions of the selected
+    categories and the rows inside the date range, instead of comparing whole
+    columns, and a page is cut from the table by position without copying the rest.
+    """
+
+    def __init__(self, data: pd.DataFrame, filter_columns: Sequence[str] = FILTER_COLUMNS, date_column: str = 'Date'):
+        """
+        Builds the indexes of a table.
+
+        Parameters:
+            data (pd.DataFrame): The layoffs data; it is referenced, not copied, and must not be modified.
+            filter_columns (Sequence[str]): The columns to index by value.
+            date_column (str): The column to index by date.
+        """
+        self.data = data
+        self.columns = list(data.columns)
+        self._positions: Dict[str, Dict[str, np.ndarray]] = {}
+        for column in filter_columns:
+            categories = pd.Categorical(data[column])
+            order = np.argsort(categories.codes, kind='stable').astype(np.int32)
+            # Missing values have code -1 and sort first; they match no category
+            counts = np.bincount(categories.codes + 1, minlength=len(categories.categories) + 1)
+            groups = np.split(order, np.cumsum(counts)[:-1])[1:]
+            self._positions[column] = {str(category): rows for category, rows in zip(categories.categories, groups)
+                                       if len(rows)}
+        dates = data[date_column].to_numpy(dtype='datetime64[ns]')
+        self._date_order = np.argsort(dates, kind='stable').astype(np.int32)
+        self._sorted_dates = dates[self._date_order]
+        # NaT sorts last, so the dated rows are a prefix of the order
+        self._dated = int(np.count_nonzero(~np.isnat(dates)))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def options(self, column: str) -> List[str]:
+        """
+        Lists the values of an indexed column that occur in the table.
+
+        Parameters:
+            column (str): One of the filter columns.
+
+        Returns:
+            List[str]: The values, in category order.
+        """
+        return list(self._positions[column])
+
+    @property
+    def date_bounds(self) -> Optional[Tuple[datetime.date, datetime.date]]:
+        """The first and last date in the table, or None when no row has a date."""
+        if not self._dated:
+            return None
+        first, last = self._sorted_dates[[0, self._dated - 1]]
+        return pd.Timestamp(first).date(), pd.Timestamp(last).date()
+
+    def select(self, filters: Optional[Dict[str, Sequence[str]]] = None, start: Optional[datetime.date] = None,
+               end: Optional[datetime.date] = None) -> np.ndarray:
+        """
+        Finds the rows matching every filter.
+
+        Parameters:
+            filters (Optional[Dict[str, Sequence[str]]]): The accepted values of each filter column;
+                a column with no values selected is not filtered.
+            start (Optional[datetime.date]): The first date to include.
+            end (Optional[datetime.date]): The last date to include.
+
+        Returns:
+            np.ndarray: The positions of the matching rows, in table order.
+        """
+        mask = None
+        for column, values in (filters or {}).items():
+            if not values:
+                continue
+            index = self._positions[column]
+            column_mask = np.zeros(len(self.data), dtype=bool)
+            for value in values:
+                column_mask[index.get(value, [])] = True
+            mask = column_mask if mask is None else mask & column_mask
+
+        if start is None and end is None:
+            return np.flatnonzero(mask) if mask is not None else np.arange(len(self.data))
+        low = 0 if start is None else np.searchsorted(self._sorted_dates[:self._dated], np.datetime64(start, 'ns'))
+        high = self._dated if end is None else np.searchsorted(self._sorted_dates[:self._dated],
+                                                               np.datetime64(end, 'ns') + np.timedelta64(1, 'D'))
+        rows = self._date_order[low:high]
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return np.sort(rows)
+
+    def page(self, rows: np.ndarray, number: int, size: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Cuts one page of selected rows and columns out of the table.
+
+        Parameters:
+            rows (np.ndarray): The selected positions, from select.
+            number (int): The page number, starting at 1.
+            size (int): The number of rows per page.
+            columns (Optional[Sequence[str]]): The columns to show; defaults to all of them.
+
+        Returns:
+            pd.DataFrame: The page, indexed by the rows' original labels.
+        """
+        positions = rows[(number - 1) * size:number * size]
+        column_positions = [self.columns.index(column) for column in (columns or self.columns)]
+        return self.data.iloc[positions, column_positions]
+
+
+def page_count(rows: int, size: int) -> int:
+    """
+    Counts the pages needed to show a number of rows, with at least one page.
+
+    Parameters:
+        rows (int): The number of rows.
+        size (int): The number of rows per page.
+
+    Returns:
+        int: The number of pages.
+    """
+    return max(-(-rows // size), 1)
@@ -1,7 +1,17 @@
 from typing import Tuple
+import numpy as np
 import pandas as pd
-from statsmodels.tsa.api import VAR
 
+from app.lazy import LazyCallable
+from app.profiling import profiled
+
+# statsmodels takes over a second to import, so it is loaded on the first fit
+VAR = LazyCallable('statsmodels.tsa.api', 'VAR')
+
+# Number of deterministic columns for each statsmodels trend specification
+TREND_ORDERS = {'n': 0, 'c': 1, 'ct': 2, 'ctt': 3}
+
+@profiled
 def load_data(relative_path: str) -> pd.DataFrame:
     """
     Load data from a CSV file.
@@ -14,6 +24,7 @@ def load_data(relative_path: str) -> pd.DataFrame:
     """
     return pd.read_csv(relative_path)
 
+@profiled
 def prepare_raw_data(data: pd.DataFrame) -> pd.DataFrame:
     """
     Prepares raw data for analysis by converting dates and setting the index.
@@ -30,19 +41,22 @@ def prepare_raw_data(data: pd.DataFrame) -> pd.DataFrame:
     data.index.freq = 'MS'
     return data
 
-def get_irf(fitted_model):
+@profiled
+def get_irf(fitted_model, periods: int = 20):
     """
     Generates impulse response functions from a fitted VAR model.
 
     Parameters:
         fitted_model (VARResultsWrapper): The fitted VAR model.
+        periods (int): The number of periods after the shock.
 
     Returns:
         VARResultsWrapper: The impulse response functions.
     """
-    irf = fitted_model.irf(periods=20)
+    irf = fitted_model.irf(periods=periods)
     return irf
 
+@profiled
 def difference_variables(data: pd.DataFrame) -> pd.DataFrame:
     """
     Differences specific variables to ensure stationarity.
@@ -58,10 +72,128 @@ def difference_variables(data: pd.DataFrame) -> pd.DataFrame:
     var_df = data[['D_INDPRO', 'INFLATION', 'FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS']].dropna()
     return var_df
 
+def build_lag_matrix(values: np.ndarray, maxlags: int, trend: str = 'c') -> np.ndarray:
+    """
+    Builds the lagged design matrix for the largest lag order in a single pass.
+
+    Row t holds the trend terms followed by y[t-1], ..., y[t-maxlags]; lags that fall
+    before the start of the sample are zero. The design for a VAR(p) estimated on
+    its own sample is then the block of rows p onward and the first
+    k_trend + neqs * p columns, which is exactly what statsmodels builds for it.
+
+    Parameters:
+        values (np.ndarray): The endogenous data with shape (nobs, neqs).
+        maxlags (int): The largest lag order the matrix must support.
+        trend (str): The deterministic terms, one of 'n', 'c', 'ct' or 'ctt'.
+
+    Returns:
+        np.ndarray: The design matrix with shape (nobs, k_trend + neqs * maxlags).
+    """
+    nobs, neqs = values.shape
+    k_trend = TREND_ORDERS[trend]
+    design = np.zeros((nobs, k_trend + neqs * maxlags))
+    # statsmodels counts the time trend from the first observation of the series
+    time = np.arange(1, nobs + 1, dtype=float)
+    for power in range(k_trend):
+        design[:, power] = time ** power
+    for lag in range(1, maxlags + 1):
+        start = k_trend + neqs * (lag - 1)
+        design[lag:, start:start + neqs] = values[:-lag]
+    return design
+
+def information_criteria(sse: np.ndarray, nobs: int, lags: int, k_trend: int) -> dict:
+    """
+    Computes AIC, HQIC and BIC of a VAR from its residual cross-product matrix, as statsmodels does.
+
+    Parameters:
+        sse (np.ndarray): The residual cross-product matrix with shape (neqs, neqs).
+        nobs (int): The number of observations used in the estimation.
+        lags (int): The lag order.
+        k_trend (int): The number of deterministic terms.
+
+    Returns:
+        dict: The 'AIC', 'HQIC' and 'BIC' values.
+    """
+    neqs = sse.shape[0]
+    _, logdet = np.linalg.slogdet(sse / nobs)
+    free_params = lags * neqs ** 2 + neqs * k_trend
+    return {
+        'AIC': logdet + (2. / nobs) * free_params,
+        'HQIC': logdet + (2. * np.log(np.log(nobs)) / nobs) * free_params,
+        'BIC': logdet + (np.log(nobs) / nobs) * free_params,
+    }
+
+@profiled
+def select_lag_order(data: pd.DataFrame, maxlags: int, trend: str = 'c') -> pd.DataFrame:
+    """
+    Computes AIC, HQIC and BIC for every lag order from 1 to maxlags without refitting.
+
+    Each lag order is estimated on its own sample, as VAR(data).fit(lag) does. The
+    cross-product matrices of all orders come from one design matrix: moving from
+    lag p to lag p - 1 adds a single row to the sample, so the Gram matrices are
+    accumulated by rank-one updates and each order only needs a Cholesky
+    factorization of its leading block.
+
+    Parameters:
+        data (pd.DataFrame): The input data for the VAR model.
+        maxlags (int): The maximum number of lags to consider.
+        trend (str): The deterministic terms, one of 'n', 'c', 'ct' or 'ctt'.
+
+    Returns:
+        pd.DataFrame: A DataFrame with AIC, HQIC, and BIC for each lag, indexed by lag.
+    """
+    values = np.asarray(data, dtype=float)
+    nobs_total, neqs = values.shape
+    k_trend = TREND_ORDERS[trend]
+    design = build_lag_matrix(values, maxlags, trend)
+
+    tail_design = design[maxlags:]
+    tail_endog = values[maxlags:]
+    gram = tail_design.T @ tail_design
+    cross = tail_design.T @ tail_endog
+    endog_gram = tail_endog.T @ tail_endog
+
+    criteria = {}
+    for lag in range(maxlags, 0, -1):
+        if lag < maxlags:
+            row, obs = design[lag], values[lag]
+            gram += np.outer(row, row)
+            cross += np.outer(row, obs)
+            endog_gram += np.outer(obs, obs)
+        ncols = k_trend + neqs * lag
+        nobs = nobs_total - lag
+        df_resid = nobs - ncols
+        if df_resid <= 0:
+            raise ValueError(f"Too few observations to estimate a VAR({lag}) with {neqs} variables.")
+        # With G = L L', the residual cross product is Y'Y - (L^-1 Z'Y)'(L^-1 Z'Y)
+        chol = np.linalg.cholesky(gram[:ncols, :ncols])
+        projected = np.linalg.solve(chol, cross[:ncols])
+        criteria[lag] = information_criteria(endog_gram - projected.T @ projected, nobs, lag, k_trend)
+    results_df = pd.DataFrame.from_dict(criteria, orient='index').sort_index()
+    results_df.index.name = 'Lag'
+    return results_df
+
+@profiled
+def fit_var_model(data: pd.DataFrame, lags: int):
+    """
+    Fits a VAR model with a constant and a given number of lags.
+
+    Parameters:
+        data (pd.DataFrame): The input data for the VAR model.
+        lags (int): The number of lags.
+
+    Returns:
+        VARResultsWrapper: The fitted VAR model.
+    """
+    return VAR(data).fit(lags)
+
 def fit_var_model_and_select_lags(data: pd.DataFrame, maxlags: int) -> Tuple[VAR, pd.DataFrame]:
     """
     Fits a VAR model and selects the optimal number of lags based on AIC.
 
+    The information criteria for all candidate lags come from select_lag_order, so
+    only the winning lag order is fitted with statsmodels.
+
     Parameters:
         data (pd.DataFrame): The input data for the VAR model.
         maxlags (int): The maximum number of lags to consider.
@@ -69,12 +201,7 @@ def fit_var_model_and_select_lags(data: pd.DataFrame, maxlags: int) -> Tuple[VAR
     Returns:
         Tuple[VARResultsWrapper, pd.DataFrame]: The fitted VAR model and a DataFrame with AIC, HQIC, and BIC for each lag.
     """
-    model = VAR(data)
-    results_aic = []
-    for i in range(1, maxlags + 1):
-        result = model.fit(i, trend='c')
-        results_aic.append({'Lag': i, 'AIC': result.aic, 'HQIC': result.hqic, 'BIC': result.bic})
-    results_df = pd.DataFrame(results_aic).set_index('Lag')
+    results_df = select_lag_order(data, maxlags, trend='c')
     best_lag = results_df['AIC'].idxmin()
-    fitted_model = model.fit(best_lag)
+    fitted_model = fit_var_model(data, best_lag)
     return fitted_model, results_df
@@ -0,0 +1,119 @@
+import sys
+sys.path.append("../src")
+
+from app import artifacts
+from app.pipeline import Pipeline
+from app.regression import fit_regression
+from app.rolling import RollingIRFs
+
+import os
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def test_tables_round_trip_through_parquet(tmp_path):
+    """Test that a table keeps its values, types and index."""
+    table = pd.DataFrame({'AIC': [1.5, 0.5], 'Industry': pd.Categorical(['AI', 'Retail'])},
+                         index=pd.Index([1, 2], name='Lag'))
+    file_name = artifacts.save_artifact(str(tmp_path), 'lag_selection', table)
+
+    assert file_name == 'lag_selection.parquet'
+    pd.testing.assert_frame_equal(artifacts.load_artifact(str(tmp_path / file_name)), table)
+
+
+def test_tables_keep_their_date_frequency(tmp_path):
+    """Test that a monthly table reads back with the frequency of its date index."""
+    table = pd.DataFrame({'FEDFUNDS': [1., 2., 3.]}, index=pd.date_range('2020-01-01', periods=3, freq='MS'))
+    loaded = artifacts.load_artifact(str(tmp_path / artifacts.save_artifact(str(tmp_path), 'macro', table)))
+
+    assert loaded.index.freq == table.index.freq
+    pd.testing.assert_frame_equal(loaded, table)
+
+
+def test_results_round_trip_through_json(tmp_path):
+    """Test that regression results and rolling IRFs are written as JSON and read back unchanged."""
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'$ Raised (mm)': rng.uniform(size=50), '$ Raised (mm)^2': rng.uniform(size=50),
+                         'Industry': rng.choice(['AI', 'Retail'], size=50), 'Stage': 'Seed',
+                         '# Laid Off': rng.uniform(size=50)})
+    regression = fit_regression(data)
+    rolling = RollingIRFs(pd.date_range('2010-01-01', periods=3, freq='MS'), rng.normal(size=(3, 4, 2)),
+                          ['FEDFUNDS', 'UNCERTAINTY'], 'LAYOFFS')
+
+    loaded = [artifacts.load_artifact(str(tmp_path / artifacts.save_artifact(str(tmp_path), name, value)))
+              for name, value in [('regression', regression), ('rolling_irfs', rolling)]]
+
+    pd.testing.assert_series_equal(loaded[0].params, regression.params)
+    assert loaded[0].rsquared == regression.rsquared and loaded[0].nobs == regression.nobs
+    np.testing.assert_array_equal(loaded[1].irfs, rolling.irfs)
+    pd.testing.assert_index_equal(loaded[1].ends, rolling.ends, exact=True)
+    assert loaded[1].ends.freq == rolling.ends.freq and loaded[1].impulses == rolling.impulses
+
+
+def test_other_values_are_pickled(tmp_path):
+    """Test that values without a portable format fall back to a pickle."""
+    file_name = artifacts.save_artifact(str(tmp_path), 'fit', {'coefs': [1, 2]})
+    assert file_name == 'fit.pickle'
+    assert artifacts.load_artifact(str(tmp_path / file_name)) == {'coefs': [1, 2]}
+
+
+def make_pipeline(runner=None, token=1):
+    """Builds a two-stage pipeline whose stages record their calls."""
+    pipeline = Pipeline(runner)
+    source = Mock(return_value=pd.DataFrame({'x': [1.0, 2.0]}))
+    pipeline.add_stage('source', source, token=token)
+    pipeline.add_stage('doubled', lambda data: data * 2, 'source')
+    return pipeline, source
+
+
+def test_store_serves_artifacts_without_computing(tmp_path):
+    """Test that a pipeline reading from the store evaluates nothing when every key matches."""
+    writer, _ = make_pipeline()
+    manifest = artifacts.write_artifacts(writer, str(tmp_path), ['source', 'doubled'])
+    assert manifest['stages']['doubled']['key'] == writer.key('doubled')
+    assert os.path.exists(tmp_path / artifacts.MANIFEST_NAME)
+
+    store = artifacts.ArtifactStore(str(tmp_path))
+    reader, source = make_pipeline(store.run)
+    assert list(reader.get('doubled')['x']) == [2.0, 4.0]
+    source.assert_not_called()
+
+    changed, source = make_pipeline(store.run, token=2)
+    assert changed.key('doubled') != writer.key('doubled')
+    changed.get('doubled')
+    source.assert_called_once()
+
+
+def test_store_picks_up_a_new_manifest(tmp_path):
+    """Test that artifacts written after the store was created are found."""
+    store = artifacts.ArtifactStore(str(tmp_path))
+    pipeline, _ = make_pipeline()
+    assert pipeline.key('source') not in store
+
+    artifacts.write_artifacts(pipeline, str(tmp_path), ['source'])
+    assert pipeline.key('source') in store
+
+
+def test_store_ignores_artifacts_of_other_code(tmp_path):
+    """Test that artifacts written by another code version are not served under the same keys."""
+    pipeline, _ = make_pipeline()
+    manifest = artifacts.write_artifacts(pipeline, str(tmp_path), ['source'])
+    assert manifest['code_version'] == artifacts.code_version()
+    assert pipeline.key('source') in artifacts.ArtifactStore(str(tmp_path))
+
+    stale = artifacts.ArtifactStore(str(tmp_path), version='older code')
+    reader, source = make_pipeline(stale.run)
+    assert pipeline.key('source') not in stale
+    reader.get('source')
+    source.assert_called_once()
+
+
+def test_unknown_json_artifacts_raise(tmp_path):
+    """Test that a JSON file of an unknown type is rejected."""
+    path = tmp_path / 'other.json'
+    path.write_text('{"type": "Other"}')
+    with pytest.raises(ValueError):
+        artifacts.load_artifact(str(path))
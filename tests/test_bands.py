@@ -0,0 +1,69 @@
+import sys
+sys.path.append("../src")
+
+from app import bands
+
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+
+@pytest.fixture(scope="module")
+def fitted_model():
+    """Fits a small two-lag VAR on simulated stationary data."""
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame(rng.normal(size=(80, 3)), columns=["FEDFUNDS", "UNCERTAINTY", "LAYOFFS"])
+    return VAR(data).fit(2)
+
+
+def test_orthogonal_irfs_match_statsmodels(fitted_model):
+    """Test that the batched responses equal the statsmodels orthogonalized IRFs."""
+    coefs = np.stack([fitted_model.coefs, fitted_model.coefs])
+    sigma_u = np.stack([fitted_model.sigma_u, fitted_model.sigma_u])
+    responses = bands.orthogonal_irfs(coefs, sigma_u, 10)
+
+    assert responses.shape == (2, 11, 3, 3)
+    np.testing.assert_allclose(responses[0], fitted_model.irf(10).orth_irfs)
+    np.testing.assert_allclose(responses[1], responses[0])
+
+
+@pytest.mark.parametrize("method", ["bootstrap", "mc"])
+def test_error_bands_are_reproducible_across_workers(fitted_model, method):
+    """Test that the bands depend only on the seed, not on serial or pooled execution."""
+    _, serial_lower, serial_upper = bands.irf_error_bands(fitted_model, periods=8, repl=60, seed=3, method=method,
+                                                          batch_size=25, max_workers=0)
+    _, pooled_lower, pooled_upper = bands.irf_error_bands(fitted_model, periods=8, repl=60, seed=3, method=method,
+                                                          batch_size=25, max_workers=2)
+
+    assert serial_lower.shape == (9, 3, 3)
+    np.testing.assert_array_equal(serial_lower, pooled_lower)
+    np.testing.assert_array_equal(serial_upper, pooled_upper)
+    assert (serial_lower <= serial_upper).all()
+
+
+def test_iter_irf_error_bands_yields_partial_results(fitted_model):
+    """Test that the bands are reported after every finished batch."""
+    updates = list(bands.iter_irf_error_bands(fitted_model, periods=5, repl=50, batch_size=20, max_workers=0))
+
+    assert [finished for finished, _, _ in updates] == [20, 40, 50]
+    # The first shock hits its own variable with the Cholesky factor exactly, so the bands straddle it
+    lower, upper = updates[-1][1], updates[-1][2]
+    assert lower[0, 0, 0] <= np.sqrt(fitted_model.sigma_u.iloc[0, 0]) <= upper[0, 0, 0]
+
+
+def test_closing_iter_irf_error_bands_does_not_wait_for_pending_batches(fitted_model):
+    """Test that abandoning the bands after the first update returns without simulating the remaining batches."""
+    updates = bands.iter_irf_error_bands(fitted_model, periods=5, repl=200000, batch_size=100, max_workers=1)
+    next(updates)
+
+    start = time.perf_counter()
+    updates.close()
+    assert time.perf_counter() - start < 1
+
+
+def test_iter_irf_error_bands_rejects_unknown_method(fitted_model):
+    """Test that an unknown simulation method raises an error."""
+    with pytest.raises(ValueError):
+        next(bands.iter_irf_error_bands(fitted_model, method="jackknife"))
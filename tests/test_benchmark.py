@@ -0,0 +1,54 @@
+import sys
+sys.path.append("../src")
+
+from app import benchmark
+from app.var import difference_variables, prepare_raw_data
+
+import json
+
+
+def test_synthetic_macro_fits_the_pipeline():
+    """Test that the synthetic panel goes through preparation and differencing like the shipped data."""
+    raw = benchmark.synthetic_macro(60, extra_variables=2)
+    assert list(raw.columns) == ['observation_date'] + benchmark.MACRO_COLUMNS + ['X1', 'X2']
+
+    differenced = difference_variables(prepare_raw_data(raw.copy()))
+    assert list(differenced.columns) == ['D_INDPRO', 'INFLATION', 'FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS']
+    assert len(differenced) == 59
+
+
+def test_synthetic_layoffs_has_dummies_and_categories():
+    """Test that the layoffs table carries the dummy columns and the categorical columns."""
+    layoffs = benchmark.synthetic_layoffs(200)
+    assert len(layoffs) == 200
+    assert 'Industry_Crypto' in layoffs and 'Stage_Series A' in layoffs
+    assert 'Stage_Seed' not in layoffs
+    assert layoffs['Industry'].dtype == 'category'
+
+
+def test_compare_flags_slower_and_larger_stages():
+    """Test that only increases beyond the threshold and the noise floors are reported."""
+    baseline = {'fit[small]': {'seconds': 0.1, 'peak_bytes': 1e6},
+                'irf[small]': {'seconds': 0.001, 'peak_bytes': 1e3}}
+    results = {'fit[small]': {'seconds': 0.2, 'peak_bytes': 2e6},
+               'irf[small]': {'seconds': 0.004, 'peak_bytes': 4e3},
+               'new[small]': {'seconds': 9.0, 'peak_bytes': 9e9}}
+
+    regressions = benchmark.compare(results, baseline, threshold=0.5)
+    assert len(regressions) == 2
+    assert all(message.startswith('fit[small]') for message in regressions)
+    assert benchmark.compare(results, baseline, threshold=1.5) == []
+
+
+def test_main_writes_and_checks_a_baseline(tmp_path):
+    """Test that a stored baseline passes against itself and fails against an impossible threshold."""
+    baseline = tmp_path / "baseline.json"
+    assert benchmark.main(['--baseline', str(baseline), '--update', '--sizes', 'small', '--repeat', '1']) == 0
+
+    stored = json.loads(baseline.read_text())
+    assert 'fit_var_model_and_select_lags[small]' in stored['results']
+    assert stored['environment']['numpy']
+
+    stored['results']['fit_regression[small]'] = {'seconds': 0.0, 'peak_bytes': 0}
+    baseline.write_text(json.dumps(stored))
+    assert benchmark.main(['--baseline', str(baseline), '--sizes', 'small', '--repeat', '1']) == 1
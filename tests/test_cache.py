@@ -0,0 +1,84 @@
+import sys
+sys.path.append("../src")
+
+from app import cache
+
+from unittest.mock import Mock
+import numpy as np
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Starts every test with empty Streamlit caches."""
+    cache.run_cached_stage.clear()
+    yield
+
+
+def test_file_fingerprint_follows_contents(tmp_path):
+    """The fingerprint changes with the file contents, not with the path."""
+    first = tmp_path / "first.csv"
+    second = tmp_path / "second.csv"
+    first.write_text("a,b\n1,2\n")
+    second.write_text("a,b\n1,2\n")
+    assert cache.file_fingerprint(str(first)) == cache.file_fingerprint(str(second))
+
+    second.write_text("a,b\n1,3\n")
+    assert cache.file_fingerprint(str(first)) != cache.file_fingerprint(str(second))
+
+
+def test_run_cached_stage_computes_once_per_key():
+    """A stage is computed once per key and recomputed for a new key."""
+    compute = Mock(return_value="value")
+    assert cache.run_cached_stage("key-1", compute) == "value"
+    assert cache.run_cached_stage("key-1", compute) == "value"
+    assert compute.call_count == 1
+
+    cache.run_cached_stage("key-2", compute)
+    assert compute.call_count == 2
+
+
+def test_cached_pipeline_shares_stages_between_reruns(tmp_path):
+    """A rebuilt pipeline reuses cached stages until the input file changes."""
+    header = "observation_date,FEDFUNDS,CORESTICKM159SFRBATL,INDPRO,LAYOFFS,UNCERTAINTY\n"
+    macro = tmp_path / "macro.csv"
+    macro.write_text(header + "1/1/2020,1.5,2,100,20,90\n2/1/2020,1.6,2,100,20,90\n")
+
+    first = cache.build_cached_pipeline("layoffs.csv", str(macro), 2)
+    second = cache.build_cached_pipeline("layoffs.csv", str(macro), 2)
+    assert first.get('macro') is second.get('macro')
+
+    macro.write_text(header + "1/1/2020,1.5,2,100,20,90\n2/1/2020,1.7,2,100,20,90\n")
+    third = cache.build_cached_pipeline("layoffs.csv", str(macro), 2)
+    assert third.key('macro') != first.key('macro')
+    assert third.get('macro')['FEDFUNDS'].iloc[-1] == 1.7
+
+
+def test_cached_pipeline_reads_precomputed_artifacts(tmp_path):
+    """A stage written by the batch runner is read instead of computed."""
+    from app.artifacts import write_artifacts
+    from app.pipeline import build_pipeline
+    header = "observation_date,FEDFUNDS,CORESTICKM159SFRBATL,INDPRO,LAYOFFS,UNCERTAINTY\n"
+    macro = tmp_path / "macro.csv"
+    macro.write_text(header + "1/1/2020,1.5,2,100,20,90\n2/1/2020,1.6,2,100,20,90\n")
+    batch = build_pipeline("layoffs.csv", str(macro), 2, fingerprint=cache.file_fingerprint)
+    stored = batch.get('macro').assign(FEDFUNDS=[9.0, 9.0])
+    batch._values['macro'] = stored
+    write_artifacts(batch, str(tmp_path / "artifacts"), ['macro'])
+
+    pipeline = cache.build_cached_pipeline("layoffs.csv", str(macro), 2, str(tmp_path / "artifacts"))
+    assert list(pipeline.get('macro')['FEDFUNDS']) == [9.0, 9.0]
+
+
+def test_figure_cache_is_shared():
+    """The figure store is created once and shared between reruns."""
+    assert cache.get_figure_cache() is cache.get_figure_cache()
+
+
+def test_forecaster_is_built_once_per_model_and_horizon():
+    """A forecaster is reused for the same model key, horizon and conditioned variables."""
+    snapshot = Mock(names=['FEDFUNDS', 'LAYOFFS'], lags=1, nobs=10, params=np.zeros((3, 2)),
+                    coefs=np.zeros((1, 2, 2)), sigma_u=np.eye(2), history=np.zeros((1, 2)))
+    first = cache.get_forecaster("model", snapshot, 4, ('FEDFUNDS',))
+    assert cache.get_forecaster("model", snapshot, 4, ('FEDFUNDS',)) is first
+    assert cache.get_forecaster("model", snapshot, 6, ('FEDFUNDS',)) is not first
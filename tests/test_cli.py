@@ -0,0 +1,33 @@
+import sys
+sys.path.append("../src")
+
+from app import cli
+from app.artifacts import ArtifactStore, MANIFEST_NAME
+
+import json
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+LAYOFFS = str(ROOT / 'src/data/filtered_US_data.csv')
+MACRO = str(ROOT / 'src/data/macro_seasonal_variables_data.csv')
+
+
+def test_cli_writes_the_requested_stages(tmp_path):
+    """Test that the batch runner writes each requested stage and a manifest of their keys."""
+    status = cli.main(['--layoffs', LAYOFFS, '--macro', MACRO, '--maxlags', '2', '--out', str(tmp_path),
+                       '--stages', 'lag_selection', 'fit', 'regression', '--quiet'])
+
+    assert status == 0
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert set(manifest['stages']) == {'lag_selection', 'fit', 'regression'}
+    assert {path.name for path in tmp_path.iterdir()} >= {'lag_selection.parquet', 'fit.pickle', 'regression.json'}
+    assert manifest['stages']['fit']['key'] in ArtifactStore(str(tmp_path))
+
+
+def test_cli_does_not_import_streamlit():
+    """Test that the batch runner can run where Streamlit is not installed."""
+    code = "import sys, runpy; runpy.run_path(sys.argv[1]); print('streamlit' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code, str(ROOT / 'src/app/cli.py')], capture_output=True,
+                            text=True, check=True)
+    assert output.stdout.strip() == 'False'
@@ -37,27 +37,151 @@ def test_plot_irfs():
         mock_pyplot.assert_called_once_with(mock_fig)
 
 
+def test_display_irf_figures():
+    """
+    Test that every heading is written before the figures are waited on, and each figure fills its placeholder.
+    """
+    from concurrent.futures import Future
+    futures = {'FEDFUNDS': Future(), 'INDPRO': Future()}
+    for impulse, future in futures.items():
+        future.set_result(impulse.encode())
+
+    with patch('app.display.st') as mock_st:
+        display.display_irf_figures(futures, ["first", "second"])
+
+        mock_st.write.assert_any_call("**Graph for INDPRO**")
+        assert mock_st.empty.call_count == 2
+        mock_st.empty.return_value.image.assert_called_with(b'INDPRO')
+
+
+def test_display_irf_bands():
+    """
+    Test that display_irf_bands redraws for every update and returns the final bands.
+    """
+    mock_irf = Mock()
+    mock_irf.model.names = ['FEDFUNDS', 'LAYOFFS']
+    mock_irf.orth_irfs = np.zeros((4, 2, 2))
+    first = (np.full((4, 2, 2), -1.0), np.full((4, 2, 2), 1.0))
+    final = (np.full((4, 2, 2), -2.0), np.full((4, 2, 2), 2.0))
+    updates = [(10, *first), (20, *final)]
+
+    with patch('app.display.st') as mock_st:
+        lower, upper = display.display_irf_bands(mock_irf, updates, ['FEDFUNDS'], 20)
+
+        placeholder = mock_st.empty.return_value
+        assert placeholder.pyplot.call_count == 2
+        mock_st.progress.return_value.progress.assert_called_with(1.0, text="20 of 20 replications")
+        assert lower is final[0] and upper is final[1]
+
+
+def test_display_rolling_irfs():
+    """
+    Test that the rolling responses are drawn as one heatmap per impulse and the figure is closed.
+    """
+    from app.rolling import RollingIRFs
+    ends = pd.date_range('2010-01-01', periods=12, freq='MS')
+    rolling = RollingIRFs(ends, np.ones((12, 5, 2)), ['FEDFUNDS', 'UNCERTAINTY'], 'LAYOFFS')
+
+    with patch('app.display.st') as mock_st, patch('app.display.plt.close') as mock_close:
+        display.display_rolling_irfs(rolling)
+
+        fig = mock_st.pyplot.call_args[0][0]
+        assert [ax.get_title() for ax in fig.axes[:2]] == ['FEDFUNDS -> LAYOFFS', 'UNCERTAINTY -> LAYOFFS']
+        mock_close.assert_called_once_with(fig)
+
+
+def test_display_forecasts():
+    """
+    Test that each scenario is drawn after the observed history and tabulated by month.
+    """
+    from app.forecast import ForecastResult
+    history = pd.DataFrame({'FEDFUNDS': np.zeros(60), 'LAYOFFS': np.arange(60.)},
+                           index=pd.date_range('2019-01-01', periods=60, freq='MS'))
+    point = np.ones((2, 3, 2))
+    result = ForecastResult(['FEDFUNDS', 'LAYOFFS'], point, point - 1, point + 1, [])
+
+    with patch('app.display.st') as mock_st, patch('app.display.plt.close') as mock_close:
+        display.display_forecasts(result, history, ['Base', 'Cut'])
+
+        fig = mock_st.pyplot.call_args[0][0]
+        assert [line.get_label() for line in fig.axes[0].get_lines()] == ['Observed', 'Base', 'Cut']
+        mock_close.assert_called_once_with(fig)
+        table = mock_st.dataframe.call_args[0][0]
+        assert list(table.index) == ['2024-01', '2024-02', '2024-03']
+        assert list(table.columns) == ['Base', 'Cut']
+
+
+def test_display_diagnostics():
+    """
+    Test that the recorded stages are tabulated with their memory in MiB.
+    """
+    from app.profiling import Profiler
+    profiler = Profiler()
+    profiler.record('var.select_lag_order', 0.2, 0.2, 2 ** 21)
+
+    with patch('app.display.st') as mock_st:
+        mock_st.button.return_value = False
+        display.display_diagnostics(profiler)
+
+        table = mock_st.dataframe.call_args[0][0]
+        assert list(table.index) == ['var.select_lag_order']
+        assert table.loc['var.select_lag_order', 'Peak memory (MiB)'] == 2
+        mock_st.code.assert_called_once()
+        mock_st.caption.assert_not_called()
+
+    profiler.enable(trace_memory=True)
+    try:
+        with patch('app.display.st') as mock_st:
+            mock_st.button.return_value = False
+            display.display_diagnostics(profiler)
+            assert 'has no peak' in mock_st.caption.call_args[0][0]
+    finally:
+        profiler.disable()
+
+
+def test_display_specification_search():
+    """
+    Test that the ranked table is filtered to stable models and the selected criteria.
+    """
+    table = pd.DataFrame({'Criterion': ['AIC', 'BIC', 'AIC'], 'Stable': [True, True, False], 'Lags': [2, 1, 3]},
+                         index=pd.RangeIndex(1, 4, name='Rank'))
+    support = pd.DataFrame({'Models': [2], 'Share supporting': [0.5], 'Median response': [0.1]})
+
+    with patch('app.display.st') as mock_st:
+        mock_st.multiselect.return_value = ['AIC']
+        mock_st.checkbox.return_value = True
+        display.display_specification_search(table, support)
+
+        shown = mock_st.dataframe.call_args_list[1][0][0]
+        assert list(shown.index) == [1]
+
+
 def test_display_data_tables():
-    data = pd.DataFrame({"Company": ["A", "B"], "Layoffs": [100, 200]})
+    """
+    Test that only the selected page and columns of the layoffs table are sent, followed by the macro table.
+    """
+    from app.tables import LayoffsTable
+    data = pd.DataFrame({"Company": [f"C{i}" for i in range(120)],
+                         "Industry": pd.Categorical(["Retail", "Crypto"] * 60),
+                         "Stage": pd.Categorical(["Seed"] * 120),
+                         "Date": pd.date_range("2023-01-01", periods=120, freq="D")})
     var_data = pd.DataFrame({"Variable": ["GDP", "Unemployment"], "Value": [1.5, 7.2]})
-    
-    with patch('app.display.st.title') as mock_title, \
-         patch('app.display.st.dataframe') as mock_dataframe:
-        display.display_data_tables(data, var_data)
-        
-        # Instead of using assert_any_call, verify call counts and types
-        assert mock_title.call_count == 2
-        assert mock_dataframe.call_count == 2
-        
-        # Verify that the first call to mock_dataframe was made with a DataFrame
-        first_call_arg = mock_dataframe.call_args_list[0][0][0]
-        assert isinstance(first_call_arg, pd.DataFrame)
-        # Optionally, verify the columns of the DataFrame in the first call match expected
-        assert list(first_call_arg.columns) == ["Company", "Layoffs"]
-        
-        # Similarly for the second call
-        second_call_arg = mock_dataframe.call_args_list[1][0][0]
-        assert isinstance(second_call_arg, pd.DataFrame)
+
+    with patch('app.display.st') as mock_st:
+        mock_st.multiselect.side_effect = [["Company", "Date"], ["Retail"], []]
+        mock_st.date_input.return_value = (pd.Timestamp("2023-01-01").date(), pd.Timestamp("2023-04-30").date())
+        mock_st.selectbox.return_value = 25
+        mock_st.number_input.return_value = 2
+        display.display_data_tables(LayoffsTable(data), var_data)
+
+        assert mock_st.title.call_count == 2
+        assert mock_st.number_input.call_args.kwargs['max_value'] == 3
+        first_call_arg = mock_st.dataframe.call_args_list[0][0][0]
+        assert list(first_call_arg.columns) == ["Company", "Date"]
+        assert list(first_call_arg.index) == list(range(50, 100, 2))
+        mock_st.caption.assert_called_once_with("Rows 26–50 of 60")
+
+        second_call_arg = mock_st.dataframe.call_args_list[1][0][0]
         assert list(second_call_arg.columns) == ["Variable", "Value"]
 
 
@@ -100,6 +224,33 @@ def test_perform_regression_analysis(mock_ols, mock_st, sample_data):
 
 
 
+def test_display_regression_results():
+    """Tests that significant and non-significant predictors are split by p-value."""
+    model = MagicMock()
+    model.pvalues = pd.Series([0.01, 0.2], index=['const', 'Industry_AI'])
+    model.rsquared = 0.5
+    model.rsquared_adj = 0.4
+
+    with patch('app.display.st') as mock_st:
+        display.display_regression_results(model)
+
+        tables = [call[0][0] for call in mock_st.table.call_args_list]
+        assert list(tables[0]['Predictor']) == ['const']
+        assert list(tables[-1]['Predictor']) == ['Industry_AI']
+        mock_st.write.assert_any_call("R-squared: 0.5")
+
+
+def test_display_grouped_regressions():
+    """Tests that the group column is labelled before the table is shown."""
+    summary = pd.DataFrame({'Group': [2022], 'Observations': [10], 'R-squared': [0.3], 'Adjusted R-squared': [0.2]})
+
+    with patch('app.display.st') as mock_st:
+        display.display_grouped_regressions(summary, "Year")
+
+        mock_st.subheader.assert_called_once_with("R-squared by year:")
+        assert list(mock_st.table.call_args[0][0].columns)[0] == "Year"
+
+
 @pytest.mark.parametrize("variable,result,expected_call", [
     ("CORESTICKM159SFRBATL", (None, 0.01, None, None, None, None), "success"),
     ("FEDFUNDS", (None, 0.06, None, None, None, None), "error"),
@@ -118,4 +269,42 @@ def test_print_adf_result(variable, result, expected_call):
         if expected_call == "success":
             mock_st.success.assert_called()
         elif expected_call == "error":
-            mock_st.error.assert_called()
\ No newline at end of file
+            mock_st.error.assert_called()
+
+
+def test_print_adf_table():
+    """
+    Test that print_adf_table renders one result per row with the row's p-value.
+    """
+    table = pd.DataFrame([
+        ('LAYOFFS', -4.0, 0.001, 1, 100, -3.5, -2.9, -2.6, 10.0),
+        ('FEDFUNDS', -1.0, 0.7, 1, 100, -3.5, -2.9, -2.6, 12.0),
+    ], columns=['Variable', 'ADF Statistic', 'p-value', 'Used Lag', 'Observations',
+                'Critical 1%', 'Critical 5%', 'Critical 10%', 'IC Best'])
+
+    with patch('app.display.print_adf_result') as mock_print:
+        display.print_adf_table(table)
+
+        assert mock_print.call_count == 2
+        variable, result = mock_print.call_args_list[1][0]
+        assert variable == 'FEDFUNDS'
+        assert result[1] == 0.7
+        assert result[4]['5%'] == -2.9
+
+
+def test_print_adf_table_reads_columns_by_name():
+    """
+    Test that print_adf_table finds each value by its column name, whatever the column order or extra columns.
+    """
+    table = pd.DataFrame({'Note': ['level'], 'IC Best': [12.0], 'Critical 10%': [-2.6], 'Critical 5%': [-2.9],
+                          'Critical 1%': [-3.5], 'Observations': [100], 'Used Lag': [1], 'p-value': [0.7],
+                          'ADF Statistic': [-1.0], 'Variable': ['FEDFUNDS']})
+
+    with patch('app.display.print_adf_result') as mock_print:
+        display.print_adf_table(table)
+
+        variable, result = mock_print.call_args[0]
+        assert variable == 'FEDFUNDS'
+        assert result[:4] == (-1.0, 0.7, 1, 100)
+        assert result[4] == {'1%': -3.5, '5%': -2.9, '10%': -2.6}
+        assert result[5] == 12.0
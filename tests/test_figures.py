@@ -0,0 +1,91 @@
+import sys
+sys.path.append("../src")
+
+from app import figures
+from app.snapshot import take_snapshot
+
+import threading
+from unittest.mock import Mock, patch
+
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+
+@pytest.fixture(scope="module")
+def irf():
+    """Provides the impulse responses of a small VAR fitted to simulated data."""
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(size=(80, 2)), columns=['FEDFUNDS', 'LAYOFFS'])
+    return VAR(data).fit(1).irf(5)
+
+
+@pytest.fixture(scope="module")
+def snapshot(irf):
+    """Provides the snapshot of the same model."""
+    return take_snapshot(irf.model, irf)
+
+
+def test_render_irf_png_matches_the_statsmodels_plot(irf, snapshot):
+    """Test that the figure draws the same lines as IRAnalysis.plot, without touching pyplot."""
+    open_figures = plt.get_fignums()
+    with patch.object(Figure, 'savefig', autospec=True) as mock_savefig:
+        figures.render_irf_png(snapshot, 'FEDFUNDS')
+    assert plt.get_fignums() == open_figures
+
+    drawn = mock_savefig.call_args[0][0].axes[0].lines
+    reference = irf.plot(impulse='FEDFUNDS', response='LAYOFFS', orth=True)
+    expected = reference.axes[0].lines
+    plt.close(reference)
+    assert len(drawn) == len(expected)
+    for line, expected_line in zip(drawn, expected):
+        np.testing.assert_allclose(line.get_ydata(), expected_line.get_ydata())
+
+    assert figures.render_irf_png(snapshot, 'FEDFUNDS').startswith(b'\x89PNG')
+
+
+def test_figure_cache_evicts_least_recently_used():
+    """Test that the cache stays within its size limit, evicting the oldest unused figure."""
+    cache = figures.FigureCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    cache.get('a')
+    cache.put('c', b'1234')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1234' and cache.get('c') == b'1234'
+    assert cache.nbytes == 8 and len(cache) == 2
+
+
+def test_submit_renders_each_key_once():
+    """Test that queued and stored figures are not rendered again."""
+    cache = figures.FigureCache()
+    release = threading.Event()
+
+    def render():
+        release.wait(5)
+        return b'image'
+
+    render = Mock(side_effect=render)
+    first = cache.submit('key', render)
+    second = cache.submit('key', render)
+    release.set()
+
+    assert first.result(5) == second.result(5) == b'image'
+    assert cache.submit('key', render).result() == b'image'
+    assert render.call_count == 1
+
+
+def test_prerender_irfs_keys_figures_by_fingerprint(snapshot):
+    """Test that each impulse gets its own figure, shared between calls with the same fingerprint."""
+    cache = figures.FigureCache()
+    first = figures.prerender_irfs(cache, 'model-1', snapshot, ['FEDFUNDS', 'LAYOFFS'])
+    images = {impulse: future.result(30) for impulse, future in first.items()}
+
+    assert images['FEDFUNDS'] != images['LAYOFFS']
+    again = figures.prerender_irfs(cache, 'model-1', snapshot, ['FEDFUNDS'])
+    assert again['FEDFUNDS'].done() and again['FEDFUNDS'].result() is images['FEDFUNDS']
+    assert len(cache) == 2
@@ -0,0 +1,81 @@
+import sys
+sys.path.append("../src")
+
+from app import forecast
+from app.snapshot import take_snapshot
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+
+@pytest.fixture(scope="module")
+def fitted_model():
+    """Provides a VAR(3) with a constant and a trend fitted to simulated data."""
+    rng = np.random.default_rng(4)
+    data = pd.DataFrame(rng.normal(size=(120, 3)), columns=['FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS'])
+    return VAR(data).fit(3, trend='ct')
+
+
+@pytest.fixture(scope="module")
+def snapshot(fitted_model):
+    """Provides the snapshot of the fitted model."""
+    return take_snapshot(fitted_model, fitted_model.irf(4))
+
+
+def test_companion_matrix_steps_the_var_forward(fitted_model):
+    """Test that the companion matrix reproduces one VAR step without deterministic terms."""
+    companion = forecast.companion_matrix(fitted_model.coefs)
+    state = np.arange(9.)
+    expected = sum(fitted_model.coefs[lag] @ state[3 * lag:3 * lag + 3] for lag in range(3))
+    np.testing.assert_allclose((companion @ state)[:3], expected)
+    np.testing.assert_array_equal((companion @ state)[3:], state[:6])
+
+
+def test_unconditional_forecast_matches_statsmodels(fitted_model, snapshot):
+    """Test that forecasts without conditions equal VARResults.forecast_interval."""
+    result = forecast.Forecaster(snapshot, 10).forecast()
+    point, lower, upper = fitted_model.forecast_interval(fitted_model.endog[-3:], 10)
+
+    assert result.point.shape == (1, 10, 3)
+    np.testing.assert_allclose(result.point[0], point)
+    np.testing.assert_allclose(result.lower[0], lower)
+    np.testing.assert_allclose(result.upper[0], upper)
+
+
+def test_conditioned_variable_follows_its_path(fitted_model, snapshot):
+    """Test that a scenario holds the conditioned variable to its path and feeds it to the other equations."""
+    steps = 6
+    path = np.linspace(1., 2., steps)
+    result = forecast.Forecaster(snapshot, steps, ['FEDFUNDS']).forecast(path[None, :, None])
+
+    history = list(fitted_model.endog[-3:])
+    for step in range(steps):
+        ahead = fitted_model.params.values[0] + fitted_model.params.values[1] * (fitted_model.nobs + 3 + step + 1)
+        ahead = ahead + sum(fitted_model.coefs[lag] @ history[-1 - lag] for lag in range(3))
+        ahead[0] = path[step]
+        history.append(ahead)
+    np.testing.assert_allclose(result.point[0], history[3:])
+    # The conditioned variable is known, so its interval collapses to the path
+    np.testing.assert_allclose(result.upper[0, :, 0], path)
+    np.testing.assert_allclose(result.lower[0, :, 0], path)
+
+
+def test_batched_scenarios_match_individual_forecasts(snapshot):
+    """Test that a batch of scenarios gives the same forecasts as one scenario at a time."""
+    forecaster = forecast.Forecaster(snapshot, 8, ['FEDFUNDS', 'UNCERTAINTY'])
+    paths = np.random.default_rng(0).normal(size=(5, 8, 2))
+    batched = forecaster.forecast(paths)
+
+    for scenario in range(5):
+        single = forecaster.forecast(paths[scenario:scenario + 1])
+        np.testing.assert_allclose(batched.point[scenario], single.point[0])
+
+
+def test_scenario_paths_move_from_the_last_value():
+    """Test that each path changes by its monthly amount from the last observation."""
+    paths = forecast.scenario_paths(5., 3, [0., 0.25, -0.5])
+
+    assert paths.shape == (3, 3, 1)
+    np.testing.assert_allclose(paths[:, :, 0], [[5., 5., 5.], [5.25, 5.5, 5.75], [4.5, 4., 3.5]])
@@ -0,0 +1,104 @@
+import sys
+sys.path.append("../src")
+
+from app import incremental, var
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+from statsmodels.tsa.api import VAR
+
+
+@pytest.fixture
+def levels():
+    """Provides the prepared test macro data in levels."""
+    return var.prepare_raw_data(var.load_data("./test_data/test_var.csv"))
+
+
+@pytest.mark.parametrize("trend", ['c', 'ct'])
+def test_appended_rows_match_full_estimation(levels, trend):
+    """Test that row-by-row updates give the same criteria, coefficients and sigma_u as a refit."""
+    model = incremental.IncrementalVAR(levels.iloc[:60], 3, trend=trend)
+    for i in range(60, len(levels)):
+        model.append(levels.iloc[i:i + 1])
+
+    full = var.difference_variables(levels.copy())
+    assert model.data.equals(full)
+    np.testing.assert_allclose(model.results_df.to_numpy(), var.select_lag_order(full, 3, trend).to_numpy())
+
+    for lag in (1, 3):
+        fitted = VAR(full).fit(lag, trend=trend)
+        np.testing.assert_allclose(model.params(lag), fitted.params.to_numpy(), atol=1e-8)
+        np.testing.assert_allclose(model.coefs(lag), fitted.coefs, atol=1e-8)
+        np.testing.assert_allclose(model.sigma_u(lag), fitted.sigma_u.to_numpy(), rtol=1e-8)
+
+
+def test_append_accepts_several_rows_and_refit_agrees(levels):
+    """Test that a block of new rows is differenced against the stored levels and matches a refit."""
+    model = incremental.IncrementalVAR(levels.iloc[:80], 2)
+    new_rows = model.append(levels.iloc[80:])
+
+    assert len(new_rows) == len(levels) - 80
+    assert new_rows['INFLATION'].iloc[0] == pytest.approx(
+        levels['CORESTICKM159SFRBATL'].iloc[80] - levels['CORESTICKM159SFRBATL'].iloc[79])
+
+    fitted_model, results_df = model.refit()
+    np.testing.assert_allclose(model.results_df.to_numpy(), results_df.to_numpy())
+    assert fitted_model.k_ar == model.best_lag
+
+
+def test_empty_append_keeps_the_last_level(levels):
+    """Test that appending no rows changes nothing, so the next block is still differenced against the last level."""
+    model = incremental.IncrementalVAR(levels.iloc[:80], 2)
+    assert model.append(levels.iloc[80:80]).empty
+
+    new_rows = model.append(levels.iloc[80:83])
+    assert len(new_rows) == 3
+    assert model.data.equals(var.difference_variables(levels.iloc[:83].copy()))
+
+
+def test_append_rejects_missing_values(levels):
+    """Test that a row with a missing value is refused rather than silently dropped, leaving the model unchanged."""
+    model = incremental.IncrementalVAR(levels.iloc[:80], 2)
+    before = model.results_df
+    gappy = levels.iloc[80:83].copy()
+    gappy.iloc[1, gappy.columns.get_loc('INDPRO')] = np.nan
+
+    with pytest.raises(ValueError):
+        model.append(gappy)
+    assert model.results_df.equals(before)
+    assert len(model.append(levels.iloc[80:83])) == 3
+
+
+def test_too_few_observations_raise(levels):
+    """Test that a lag order without residual degrees of freedom is rejected."""
+    with pytest.raises(ValueError):
+        incremental.IncrementalVAR(levels.iloc[:12], 3)
+
+
+def test_lag_selection_appends_new_months_instead_of_refitting(levels):
+    """Test that data which only gained rows is absorbed by updates and selects like a fresh search."""
+    selection = incremental.IncrementalLagSelection(3)
+    selection.select(levels.iloc[:80])
+
+    with patch.object(incremental, '_LagState', wraps=incremental._LagState) as estimate:
+        results_df = selection.select(levels)
+        estimate.assert_not_called()
+    expected = var.select_lag_order(var.difference_variables(levels.copy()), 3)
+    np.testing.assert_allclose(results_df.to_numpy(), expected.to_numpy())
+    assert results_df.index.equals(expected.index) and list(results_df.columns) == list(expected.columns)
+
+
+def test_lag_selection_refits_revised_data(levels):
+    """Test that a change to rows already seen, or a shorter table, re-estimates every lag order."""
+    selection = incremental.IncrementalLagSelection(3)
+    selection.select(levels)
+    revised = levels.copy()
+    revised.iloc[10, 0] += 1.
+
+    for changed in (revised, levels.iloc[:80]):
+        with patch.object(incremental, '_LagState', wraps=incremental._LagState) as estimate:
+            results_df = selection.select(changed)
+            assert estimate.call_count == 3
+        expected = var.select_lag_order(var.difference_variables(changed.copy()), 3)
+        np.testing.assert_allclose(results_df.to_numpy(), expected.to_numpy())
@@ -0,0 +1,88 @@
+import sys
+sys.path.append("../src")
+
+from app import ingest
+
+import os
+import time
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+LAYOFFS_CSV = (
+    "Company,Location HQ,# Laid Off,Date,%,Industry,Source,List of Employees Laid Off,Stage,$ Raised (mm),Country\n"
+    "MariaDB,SF Bay Area,84,10/12/2023,0.28,Data,https://example.com/a,,Post-IPO,272,United States\n"
+    "Deepgram,SF Bay Area,20,10/11/2023,,AI,https://example.com/b,,Series B,86,United States\n"
+)
+
+
+@pytest.fixture
+def layoffs_file(tmp_path):
+    """Writes a small layoffs extract whose modification time is safely in the past."""
+    path = tmp_path / "layoffs.csv"
+    path.write_text(LAYOFFS_CSV)
+    past = time.time() - 60
+    os.utime(path, (past, past))
+    return path
+
+
+def test_read_csv_typed_projects_and_types_columns(layoffs_file):
+    """Test that only the schema's columns are read, with the requested types."""
+    data = ingest.read_csv_typed(str(layoffs_file), ingest.LAYOFFS_DTYPES, ingest.LAYOFFS_DATES)
+
+    assert 'Source' not in data.columns
+    assert 'List of Employees Laid Off' not in data.columns
+    assert isinstance(data['Industry'].dtype, pd.CategoricalDtype)
+    assert isinstance(data['Stage'].dtype, pd.CategoricalDtype)
+    assert data['Date'].iloc[0] == pd.Timestamp('2023-10-12')
+    assert data['# Laid Off'].dtype == 'float64'
+
+
+def test_ingest_table_reuses_cache_until_contents_change(layoffs_file, tmp_path):
+    """Test that the columnar cache is built once and rebuilt only when the file changes."""
+    cache_dir = str(tmp_path / "cache")
+    first, report = ingest.ingest_table(str(layoffs_file), ingest.LAYOFFS_DTYPES, ingest.LAYOFFS_DATES, cache_dir)
+    assert report.source == 'csv'
+    assert report.rows == 2 and report.memory_bytes > 0
+
+    second, report = ingest.ingest_table(str(layoffs_file), ingest.LAYOFFS_DTYPES, ingest.LAYOFFS_DATES, cache_dir)
+    assert report.source == 'cache'
+    pd.testing.assert_frame_equal(first, second)
+
+    # A touched but unchanged file is hashed, found identical and served from the cache
+    os.utime(layoffs_file)
+    with patch('app.ingest.read_csv_typed') as mock_read:
+        _, report = ingest.ingest_table(str(layoffs_file), ingest.LAYOFFS_DTYPES, ingest.LAYOFFS_DATES, cache_dir)
+        mock_read.assert_not_called()
+    assert report.source == 'cache'
+
+    layoffs_file.write_text(LAYOFFS_CSV.replace(",84,", ",85,"))
+    changed, report = ingest.ingest_table(str(layoffs_file), ingest.LAYOFFS_DTYPES, ingest.LAYOFFS_DATES, cache_dir)
+    assert report.source == 'csv'
+    assert changed['# Laid Off'].iloc[0] == 85
+
+
+def test_recently_modified_file_is_hashed(tmp_path):
+    """Test that a same-size rewrite within the timestamp window is still detected."""
+    path = tmp_path / "fresh.csv"
+    path.write_text(LAYOFFS_CSV)
+    cache_dir = str(tmp_path / "cache")
+    ingest.ingest_table(str(path), ingest.LAYOFFS_DTYPES, ingest.LAYOFFS_DATES, cache_dir)
+
+    # Same size and the same mtime, as when both writes land in one timestamp tick
+    stat = os.stat(path)
+    path.write_text(LAYOFFS_CSV.replace(",84,", ",85,"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    data, report = ingest.ingest_table(str(path), ingest.LAYOFFS_DTYPES, ingest.LAYOFFS_DATES, cache_dir)
+    assert report.source == 'csv'
+    assert data['# Laid Off'].iloc[0] == 85
+
+
+def test_load_macro_is_ready_for_prepare_raw_data(tmp_path):
+    """Test that the macro loader parses the dates that prepare_raw_data indexes on."""
+    data = ingest.load_macro("./test_data/test_var.csv", cache_dir=str(tmp_path))
+
+    assert data['observation_date'].iloc[0] == pd.Timestamp('2011-07-01')
+    assert list(data.columns) == ["observation_date", "FEDFUNDS", "CORESTICKM159SFRBATL", "INDPRO", "LAYOFFS",
+                                  "UNCERTAINTY"]
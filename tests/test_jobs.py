@@ -0,0 +1,117 @@
+import sys
+sys.path.append("../src")
+
+from app.jobs import JobQueue, stage_job, submit_stage
+from app.pipeline import Pipeline
+
+import threading
+import pytest
+
+
+def test_identical_submissions_share_one_computation():
+    """Test that concurrent submissions of a key run the computation once and share its result."""
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def compute(report):
+        calls.append(1)
+        release.wait(5)
+        return 'fitted'
+
+    jobs = [queue.submit('key', compute) for _ in range(5)]
+    assert all(job is jobs[0] for job in jobs)
+    assert queue.pending == [jobs[0]]
+    release.set()
+    assert jobs[0].result(5) == 'fitted'
+
+    # A finished key is answered from the result store without queueing anything
+    again = queue.submit('key', compute)
+    assert again.done() and again.result() == 'fitted'
+    assert len(calls) == 1 and queue.pending == []
+
+
+def test_progress_is_reported():
+    """Test that a job's progress is visible while it runs and complete when it finishes."""
+    queue = JobQueue()
+    halfway, release = threading.Event(), threading.Event()
+
+    def compute(report):
+        report(0.5, 'Fitting')
+        halfway.set()
+        release.wait(5)
+        return 1
+
+    job = queue.submit('key', compute, name='fit')
+    halfway.wait(5)
+    assert job.progress == (0.5, 'Fitting') and not job.wait(0.01)
+    release.set()
+    assert job.wait(5) and job.progress == (1., 'Done')
+    assert repr(job) == "Job('fit', 100%)"
+
+
+def test_failures_are_not_stored():
+    """Test that a failed job raises for its waiters and is retried on the next submission."""
+    queue = JobQueue()
+    attempts = []
+
+    def compute(report):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+        return 'ok'
+
+    with pytest.raises(RuntimeError):
+        queue.submit('key', compute).result(5)
+    assert queue.get('key') is None
+    assert queue.submit('key', compute).result(5) == 'ok'
+    assert len(attempts) == 2
+
+
+def test_result_store_evicts_least_recently_used():
+    """Test that the store keeps a bounded number of results, dropping the least recently used."""
+    queue = JobQueue(max_results=2)
+    for key in 'abc':
+        queue.submit(key, lambda report, key=key: key).result(5)
+    assert queue.get('a') is None and queue.get('c').result() == 'c'
+    queue.clear()
+    assert queue.get('c') is None
+
+
+def test_stage_jobs_report_upstream_stages():
+    """Test that a pipeline stage job evaluates the stage's upstream stages in order, reporting each."""
+    pipeline = Pipeline()
+    pipeline.add_stage('data', lambda: [1, 2, 3])
+    pipeline.add_stage('unused', lambda: None)
+    pipeline.add_stage('total', sum, 'data')
+    pipeline.add_stage('report', lambda data, total: f'{len(data)} values, total {total}', 'data', 'total')
+    assert pipeline.upstream('report') == ['data', 'total', 'report']
+
+    reports = []
+    assert stage_job(pipeline, 'report')(lambda fraction, message: reports.append((fraction, message))) == \
+        '3 values, total 6'
+    assert reports == [(0., 'Computing data'), (1 / 3, 'Computing total'), (2 / 3, 'Computing report')]
+    assert pipeline.evaluated == ['data', 'total', 'report']
+
+    queue = JobQueue()
+    job = submit_stage(queue, pipeline, 'report')
+    assert job.result(5) == '3 values, total 6'
+    assert job.key == pipeline.key('report') and job.name == 'report'
+    assert submit_stage(queue, pipeline, 'report') is job
+
+
+def test_stage_jobs_use_stored_stages_by_key():
+    """Test that a stage the runner already holds is returned without evaluating anything upstream."""
+    stored = {}
+
+    def build():
+        pipeline = Pipeline(lambda key, compute: stored[key] if key in stored else compute())
+        pipeline.add_stage('data', lambda: [1, 2, 3])
+        pipeline.add_stage('total', sum, 'data')
+        return pipeline
+
+    pipeline = build()
+    stored[pipeline.key('total')] = 6
+    reports = []
+    assert stage_job(pipeline, 'total')(lambda fraction, message: reports.append(message)) == 6
+    assert pipeline.evaluated == ['total'] and reports == []
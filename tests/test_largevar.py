@@ -0,0 +1,102 @@
+import sys
+sys.path.append("../src")
+
+from app import largevar
+from app.pipeline import build_pipeline
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Provides a simulated stationary system of five series."""
+    rng = np.random.default_rng(3)
+    values = np.zeros((200, 5))
+    for t in range(1, 200):
+        values[t] = 0.4 * values[t - 1] + rng.normal(size=5)
+    return pd.DataFrame(values, columns=['A', 'B', 'C', 'D', 'LAYOFFS'])
+
+
+def test_flat_prior_matches_ols(data):
+    """Test that with a very loose prior the posterior mean is the statsmodels OLS estimate."""
+    results = largevar.fit_large_var(data, 3, largevar.MinnesotaPrior(tightness=1e8, constant=1e8), batch_size=2)
+    fitted = VAR(data).fit(3)
+    np.testing.assert_allclose(results.params, fitted.params, atol=1e-8)
+    np.testing.assert_allclose(results.coefs, fitted.coefs, atol=1e-8)
+    np.testing.assert_allclose(results.resid, fitted.resid, atol=1e-8)
+    assert results.names == list(data.columns) and results.k_ar == 3 and results.nobs == fitted.nobs
+
+
+def test_tight_prior_shrinks_to_the_prior_mean(data):
+    """Test that a tight prior pulls the lag coefficients to the prior mean, own first lags included."""
+    results = largevar.fit_large_var(data, 2, largevar.MinnesotaPrior(tightness=1e-6, own_mean=0.5))
+    expected = np.zeros((2, 5, 5))
+    expected[0] = 0.5 * np.eye(5)
+    np.testing.assert_allclose(results.coefs, expected, atol=1e-6)
+
+
+def test_prior_tightens_with_lag_and_across_variables():
+    """Test the Minnesota standard deviations: own lags loosest, decaying with the lag, scaled by the variables."""
+    scales = np.array([1., 2.])
+    prior = largevar.MinnesotaPrior(tightness=0.2, cross_tightness=0.5, decay=2., constant=10.)
+    means, precisions = largevar.minnesota_moments(scales, 2, prior)
+    stds = precisions ** -0.5
+    # Columns: constant, lag 1 of both variables, lag 2 of both variables
+    np.testing.assert_allclose(stds[0], [10., 0.2, 0.2 * 0.5 / 2, 0.2 / 4, 0.2 * 0.5 / 2 / 4])
+    np.testing.assert_allclose(stds[1], [20., 0.2 * 0.5 * 2, 0.2, 0.2 * 0.5 * 2 / 4, 0.2 / 4])
+    assert not means.any()
+
+
+def test_more_coefficients_than_observations():
+    """Test that a system with more coefficients per equation than observations is still estimated."""
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(120, 30))
+    results = largevar.fit_large_var(values, 12)
+    assert results.params.shape == (1 + 30 * 12, 30)
+    assert np.isfinite(results.params).all()
+    assert np.all(np.linalg.eigvalsh(results.sigma_u) > 0)
+    assert results.names[0] == 'y1'
+
+
+def test_selected_irfs_match_the_full_array(data):
+    """Test that the responses of chosen pairs equal the matching entries of the statsmodels IRFs."""
+    fitted = VAR(data).fit(2)
+    pairs = [(0, 4), (2, 4), (4, 4), (1, 3)]
+    responses = largevar.selected_irfs(fitted.coefs, np.asarray(fitted.sigma_u), pairs, 10)
+    orth_irfs = fitted.irf(10).orth_irfs
+    for column, (impulse, response) in enumerate(pairs):
+        np.testing.assert_allclose(responses[:, column], orth_irfs[:, response, impulse], atol=1e-12)
+
+
+def test_equation_statistics_matches_per_equation_loop(data):
+    """Test that the vectorized RMSE and R-squared agree with computing them equation by equation."""
+    fitted = VAR(data).fit(2)
+    table = largevar.equation_statistics(fitted)
+    assert list(table.index) == list(data.columns)
+    for i, name in enumerate(data.columns):
+        actuals = fitted.endog[2:, i]
+        resid = np.asarray(fitted.resid)[:, i]
+        r_squared = 1 - np.sum(resid ** 2) / np.sum((actuals - actuals.mean()) ** 2)
+        assert table.loc[name, 'R-squared'] == pytest.approx(r_squared)
+        assert table.loc[name, 'RMSE'] == pytest.approx(np.sqrt(fitted.sigma_u.iloc[i, i]))
+
+
+def test_pipeline_large_var_stages():
+    """Test that the pipeline fits the large VAR on the differenced data and traces the layoffs responses only."""
+    pipeline = build_pipeline('missing_layoffs.csv', './test_data/test_var.csv', maxlags=4, periods=6)
+    results = pipeline.get('large_var')
+    irfs = pipeline.get('large_var_irfs')
+    assert results.names == list(pipeline.get('differenced').columns) and results.k_ar == 4
+    assert list(irfs.columns) == ['D_INDPRO', 'INFLATION', 'FEDFUNDS', 'UNCERTAINTY'] and len(irfs) == 7
+    assert 'fit' not in pipeline.evaluated
+    # FEDFUNDS, UNCERTAINTY and LAYOFFS stay in levels and are shrunk towards a random walk
+    assert results.prior.own_mean == (0., 0., 1., 1., 1.)
+
+
+def test_own_means_can_differ_by_variable(data):
+    """Test that a tight prior pulls each own first lag to its own prior mean."""
+    results = largevar.fit_large_var(data, 1, largevar.MinnesotaPrior(tightness=1e-6, own_mean=(1., 0., 1., 0., 0.5)))
+    np.testing.assert_allclose(results.coefs[0], np.diag([1., 0., 1., 0., 0.5]), atol=1e-6)
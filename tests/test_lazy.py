@@ -0,0 +1,32 @@
+import sys
+sys.path.append("../src")
+
+from app import lazy
+
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_lazy_module_imports_on_first_attribute():
+    """Test that the module is imported only when an attribute is used."""
+    module = lazy.lazy_import('email.mime.audio')
+    assert 'loaded' not in repr(module)
+
+    assert module.MIMEAudio.__name__ == 'MIMEAudio'
+    assert 'loaded' in repr(module)
+
+
+def test_lazy_callable_forwards_arguments():
+    """Test that calling the stand-in calls the real function."""
+    dumps = lazy.LazyCallable('json', 'dumps')
+    assert dumps({'a': 1}, sort_keys=True) == '{"a": 1}'
+
+
+def test_app_starts_without_heavy_imports():
+    """Test that importing the app leaves statsmodels, scipy.stats and matplotlib for the pages that use them."""
+    code = ("import sys; sys.path.insert(0, 'src'); import app.main; "
+            "print([name for name in ('statsmodels', 'scipy.stats', 'matplotlib') if name in sys.modules])")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
@@ -0,0 +1,103 @@
+import sys
+sys.path.append("../src")
+
+from app import pipeline
+
+import pandas as pd
+import pytest
+from unittest.mock import Mock, patch
+
+
+def test_stages_are_lazy_and_memoized():
+    """Only the requested stage and its dependencies run, each at most once."""
+    load = Mock(return_value=2)
+    double = Mock(side_effect=lambda value: value * 2)
+    unused = Mock()
+
+    graph = pipeline.Pipeline()
+    graph.add_stage('load', load)
+    graph.add_stage('double', double, 'load')
+    graph.add_stage('unused', unused, 'load')
+
+    assert graph.get('double') == 4
+    assert graph.get('double') == 4
+    assert load.call_count == 1
+    assert double.call_count == 1
+    unused.assert_not_called()
+    assert graph.evaluated == ['load', 'double']
+
+
+def test_unknown_dependency_raises():
+    """A stage cannot depend on a stage that is not registered yet."""
+    graph = pipeline.Pipeline()
+    with pytest.raises(KeyError):
+        graph.add_stage('fit', Mock(), 'data')
+
+
+def test_keys_follow_tokens_and_dependencies():
+    """Changing a token changes the key of the stage and of everything downstream."""
+    def build(token):
+        graph = pipeline.Pipeline()
+        graph.add_stage('load', Mock(), token=token)
+        graph.add_stage('fit', Mock(), 'load', token=12)
+        graph.add_stage('other', Mock(), token='x')
+        return graph
+
+    first, same, changed = build('a'), build('a'), build('b')
+    assert first.key('fit') == same.key('fit')
+    assert first.key('load') != changed.key('load')
+    assert first.key('fit') != changed.key('fit')
+    assert first.key('other') == changed.key('other')
+
+
+def test_runner_can_skip_upstream_stages():
+    """A runner that already holds a result does not evaluate the dependencies."""
+    load = Mock()
+    store = {}
+    graph = pipeline.Pipeline(runner=lambda key, compute: store[key] if key in store else compute())
+    graph.add_stage('load', load)
+    graph.add_stage('fit', Mock(), 'load')
+    store[graph.key('fit')] = 'cached fit'
+
+    assert graph.get('fit') == 'cached fit'
+    load.assert_not_called()
+
+
+def test_build_pipeline_runs_var_stages(tmp_path):
+    """The VAR stages run on the test data without touching the layoffs data."""
+    graph = pipeline.build_pipeline('missing_layoffs.csv', './test_data/test_var.csv', maxlags=2, periods=5,
+                                    cache_dir=str(tmp_path))
+
+    irf = graph.get('irf')
+    assert irf.irfs.shape == (6, 5, 5)
+    assert list(graph.get('lag_selection').index) == [1, 2]
+    assert graph.get('fit').k_ar == graph.get('lag_selection')['AIC'].idxmin()
+    assert 'layoffs' not in graph.evaluated
+    # The levels are left as loaded when the differenced columns are added
+    assert 'INFLATION' not in graph.get('macro').columns
+
+    levels = graph.get('adf_levels')
+    assert list(levels['Variable']) == pipeline.LEVEL_VARIABLES
+    assert levels['p-value'].between(0, 1).all()
+
+
+def test_pipelines_share_a_lag_selection(tmp_path):
+    """Test that a lag selection passed in is used for the stage and must consider the same lags."""
+    selection = pipeline.IncrementalLagSelection(2)
+    with patch.object(selection, 'select', wraps=selection.select) as select:
+        graph = pipeline.build_pipeline('missing_layoffs.csv', './test_data/test_var.csv', maxlags=2,
+                                        cache_dir=str(tmp_path), lag_selection=selection)
+        assert list(graph.get('lag_selection').index) == [1, 2]
+        select.assert_called_once_with(graph.get('macro'))
+
+    with pytest.raises(ValueError):
+        pipeline.build_pipeline('missing_layoffs.csv', './test_data/test_var.csv', maxlags=3,
+                                lag_selection=selection)
+
+
+def test_add_squared_funding_does_not_modify_input():
+    """The squared funding column is added to a copy."""
+    data = pd.DataFrame({'$ Raised (mm)': [2.0, 3.0]})
+    result = pipeline.add_squared_funding(data)
+    assert list(result['$ Raised (mm)^2']) == [4.0, 9.0]
+    assert list(data.columns) == ['$ Raised (mm)']
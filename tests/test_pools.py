@@ -0,0 +1,29 @@
+import sys
+sys.path.append("../src")
+
+from app import pools
+
+import time
+from concurrent.futures import wait
+import pytest
+
+
+def test_process_workers_are_not_forked_from_this_process():
+    """Test that worker processes come from a fork server or are spawned, never forked from the app."""
+    assert pools.process_context().get_start_method() in ('forkserver', 'spawn')
+    with pools.worker_pool('process', 2) as pool:
+        assert list(pool.map(abs, [-1, -2, 3])) == [1, 2, 3]
+
+
+@pytest.mark.parametrize("executor", ['thread', 'process'])
+def test_leaving_a_pool_early_cancels_queued_tasks(executor):
+    """Test that an exception inside the block returns at once, cancelling the tasks not started."""
+    start = time.perf_counter()
+    with pytest.raises(KeyError):
+        with pools.worker_pool(executor, 1) as pool:
+            futures = [pool.submit(time.sleep, 0.5) for _ in range(10)]
+            raise KeyError('stop')
+    assert time.perf_counter() - start < 2
+    # A process pool cancels from its management thread, shortly after the block exits
+    wait(futures[-1:], timeout=2)
+    assert sum(future.cancelled() for future in futures) >= 8
@@ -0,0 +1,150 @@
+import sys
+sys.path.append("../src")
+
+from app import profiling
+
+import threading
+import tracemalloc
+import urllib.request
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def profiler():
+    """Provides the shared profiler, enabled and empty, and switches it off afterwards."""
+    profiling.PROFILER.reset()
+    profiling.PROFILER.enable()
+    yield profiling.PROFILER
+    profiling.PROFILER.disable()
+    profiling.PROFILER.reset()
+
+
+def test_disabled_profiler_records_nothing():
+    """Test that a disabled profiler hands out a shared no-op context and keeps no statistics."""
+    disabled = profiling.Profiler()
+    assert disabled.stage('a') is disabled.stage('b')
+    with disabled.stage('a'):
+        pass
+    assert disabled.to_frame().empty
+
+
+def test_profiled_records_calls_and_times(profiler):
+    """Test that the decorator counts calls and accumulates wall and CPU time under the function's name."""
+    @profiling.profiled
+    def busy(n):
+        return sum(range(n))
+
+    assert busy(100000) == sum(range(100000))
+    busy(100000)
+
+    table = profiler.to_frame()
+    row = table.loc['test_profiling.test_profiled_records_calls_and_times.<locals>.busy']
+    assert row['Calls'] == 2
+    assert row['Wall (s)'] > 0 and row['CPU (s)'] > 0
+    assert row['Mean wall (s)'] == pytest.approx(row['Wall (s)'] / 2)
+
+
+def test_profiled_passes_through_when_disabled():
+    """Test that a decorated function still runs, unmeasured, while profiling is off."""
+    @profiling.profiled(name='unmeasured')
+    def double(x):
+        return 2 * x
+
+    assert double(4) == 8
+    assert 'unmeasured' not in profiling.PROFILER.to_frame().index
+
+
+def test_nested_stages_report_their_own_peaks():
+    """Test that an inner allocation counts toward both stages and does not hide the outer stage's peak."""
+    traced = profiling.Profiler()
+    traced.enable(trace_memory=True)
+    try:
+        with traced.stage('outer'):
+            large = bytearray(8 * 2 ** 20)
+            del large
+            with traced.stage('inner'):
+                small = bytearray(2 ** 20)
+                del small
+    finally:
+        traced.disable()
+    assert not tracemalloc.is_tracing()
+
+    peaks = traced.to_frame()['Peak memory (bytes)']
+    assert 2 ** 20 <= peaks['inner'] < 2 * 2 ** 20
+    assert peaks['outer'] >= 8 * 2 ** 20
+
+
+def test_stages_overlapping_another_thread_record_no_peak():
+    """Test that only the calls that ran alone record a peak, and stages without one have no peak sample."""
+    traced = profiling.Profiler()
+    traced.enable(trace_memory=True)
+    entered, release = threading.Event(), threading.Event()
+
+    def worker():
+        with traced.stage('worker'):
+            entered.set()
+            release.wait(5)
+
+    try:
+        with traced.stage('alone'):
+            with traced.stage('nested'):
+                block = bytearray(2 ** 20)
+                del block
+        thread = threading.Thread(target=worker)
+        with traced.stage('overlapped'):
+            thread.start()
+            entered.wait(5)
+        release.set()
+        thread.join()
+    finally:
+        traced.disable()
+
+    peaks = traced.to_frame()['Peak memory (bytes)']
+    assert peaks['alone'] >= 2 ** 20 and peaks['nested'] >= 2 ** 20
+    assert pd.isna(peaks['overlapped']) and pd.isna(peaks['worker'])
+    text = traced.to_prometheus()
+    assert 'app_stage_calls_total{stage="worker"} 1' in text
+    assert 'app_stage_peak_bytes{stage="worker"}' not in text
+    assert not traced._traced
+
+
+def test_prometheus_text_lists_every_stage():
+    """Test that each metric has its help and type lines and one sample per stage."""
+    recorded = profiling.Profiler()
+    recorded.record('var.get_irf', 0.5, 0.25, 1024)
+    recorded.record('var.get_irf', 1.5, 0.75, 2048)
+
+    text = recorded.to_prometheus()
+    assert '# TYPE app_stage_wall_seconds_total counter' in text
+    assert 'app_stage_calls_total{stage="var.get_irf"} 2' in text
+    assert 'app_stage_wall_seconds_total{stage="var.get_irf"} 2' in text
+    assert 'app_stage_peak_bytes{stage="var.get_irf"} 2048' in text
+
+
+def test_metrics_are_served_over_http():
+    """Test that a local scraper can read the metrics from /metrics."""
+    recorded = profiling.Profiler()
+    recorded.record('pipeline.fit', 0.1, 0.1)
+    server = profiling.serve_metrics(0, recorded)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/metrics') as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert 'stage="pipeline.fit"' in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("setting, enabled, traced", [('', False, False), ('0', False, False), ('1', True, False),
+                                                       ('memory', True, True)])
+def test_configure_from_environment(monkeypatch, setting, enabled, traced):
+    """Test that APP_PROFILE switches timing and memory tracing on."""
+    monkeypatch.setenv(profiling.PROFILE_ENV, setting)
+    configured = profiling.Profiler()
+    profiling.configure_from_environment(configured)
+    try:
+        assert configured.enabled == enabled
+        assert tracemalloc.is_tracing() == traced
+    finally:
+        configured.disable()
@@ -0,0 +1,95 @@
+import sys
+sys.path.append("../src")
+
+from app import regression
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+
+
+@pytest.fixture
+def layoffs():
+    """Provides a synthetic layoffs table with funding, industry, stage and year."""
+    rng = np.random.default_rng(4)
+    nobs = 300
+    raised = rng.uniform(1, 500, size=nobs)
+    industry = rng.choice(['AI', 'Data', 'Retail', 'Travel'], size=nobs)
+    stage = rng.choice(['Seed', 'Series A', 'Post-IPO'], size=nobs)
+    laid_off = 20 + 0.3 * raised + 40 * (industry == 'Retail') + rng.normal(0, 10, size=nobs)
+    data = pd.DataFrame({
+        '$ Raised (mm)': raised,
+        '$ Raised (mm)^2': raised ** 2,
+        'Industry': pd.Categorical(industry),
+        'Stage': pd.Categorical(stage),
+        '# Laid Off': laid_off,
+        'Year': rng.choice([2021, 2022, 2023], size=nobs),
+    })
+    data.loc[[3, 7], '$ Raised (mm)'] = np.nan
+    return data
+
+
+def dense_reference(data):
+    """Fits the same regression with dense dummies and statsmodels."""
+    numeric = data[regression.REGRESSION_NUMERIC]
+    dummies = pd.get_dummies(data[regression.REGRESSION_CATEGORICAL], drop_first=True).astype(float)
+    X = sm.add_constant(pd.concat([numeric.fillna(numeric.mean()), dummies], axis=1))
+    return sm.OLS(data['# Laid Off'], X).fit()
+
+
+def test_encode_design_is_sparse_with_dropped_first_category(layoffs):
+    """Test that the design has a constant, the numeric columns and k-1 dummies per category."""
+    design, names = regression.encode_design(layoffs, regression.REGRESSION_NUMERIC, ['Industry', 'Stage'])
+
+    assert names[:3] == ['const', '$ Raised (mm)', '$ Raised (mm)^2']
+    assert names[3:] == ['Industry_Data', 'Industry_Retail', 'Industry_Travel', 'Stage_Seed', 'Stage_Series A']
+    assert design.shape == (300, 8)
+    assert design.format == 'csr'
+    assert design[3, 1] == pytest.approx(layoffs['$ Raised (mm)'].mean())
+
+
+def test_fit_regression_matches_statsmodels(layoffs):
+    """Test that the sparse fit reproduces the dense statsmodels estimates and statistics."""
+    result = regression.fit_regression(layoffs)
+    reference = dense_reference(layoffs)
+
+    assert list(result.params.index) == list(reference.params.index)
+    np.testing.assert_allclose(result.params, reference.params, rtol=1e-6)
+    np.testing.assert_allclose(result.bse, reference.bse, rtol=1e-6)
+    np.testing.assert_allclose(result.pvalues, reference.pvalues, rtol=1e-6, atol=1e-12)
+    assert result.rsquared == pytest.approx(reference.rsquared)
+    assert result.rsquared_adj == pytest.approx(reference.rsquared_adj)
+    assert result.df_resid == reference.df_resid
+
+
+def test_collinear_dummies_use_the_pseudo_inverse(layoffs):
+    """Test that a dummy duplicating another one is handled like statsmodels' pinv solver."""
+    layoffs['Sector'] = layoffs['Industry']
+    result = regression.fit_regression(layoffs, categorical=['Industry', 'Sector'])
+
+    assert result.df_resid == len(layoffs) - 6
+    assert np.isfinite(result.params).all()
+    reference = regression.fit_regression(layoffs, categorical=['Industry'])
+    assert result.rsquared == pytest.approx(reference.rsquared)
+
+
+@pytest.mark.parametrize("executor", [None, 'thread', 'process'])
+def test_grouped_regressions_match_separate_fits(layoffs, executor):
+    """Test that each group's fit equals a fit on that group alone."""
+    results = regression.fit_grouped_regressions(layoffs, layoffs['Year'], executor=executor, max_workers=2)
+
+    assert list(results) == [2021, 2022, 2023]
+    alone = regression.fit_regression(layoffs[layoffs['Year'] == 2022])
+    np.testing.assert_allclose(results[2022].params, alone.params)
+
+    summary = regression.summarize_groups(results)
+    assert list(summary['Group']) == [2021, 2022, 2023]
+    assert summary['Observations'].sum() == len(layoffs)
+
+
+def test_groups_without_degrees_of_freedom_are_dropped(layoffs):
+    """Test that a group too small to estimate is left out."""
+    layoffs.loc[:1, 'Year'] = 2020
+    results = regression.fit_grouped_regressions(layoffs, layoffs['Year'], executor=None)
+    assert 2020 not in results
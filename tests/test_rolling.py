@@ -0,0 +1,61 @@
+import sys
+sys.path.append("../src")
+
+from app import rolling
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+
+@pytest.fixture
+def var_sample():
+    """Provides a stationary five-variable monthly sample."""
+    rng = np.random.default_rng(1)
+    return pd.DataFrame(rng.normal(size=(90, 5)), index=pd.date_range('2000-01-01', periods=90, freq='MS'),
+                        columns=["D_INDPRO", "INFLATION", "FEDFUNDS", "UNCERTAINTY", "LAYOFFS"])
+
+
+def test_window_bounds_rolling_and_expanding():
+    """Test that rolling windows keep their length and expanding windows start at the first row."""
+    np.testing.assert_array_equal(rolling.window_bounds(10, 4, step=3), [[0, 4], [3, 7], [6, 10]])
+    np.testing.assert_array_equal(rolling.window_bounds(10, None, step=3, min_window=5), [[0, 5], [0, 8]])
+
+
+@pytest.mark.parametrize("trend", ['c', 'ct'])
+def test_rolling_irfs_match_statsmodels(var_sample, trend):
+    """Test that every window's responses equal those of a VAR fitted to that window alone."""
+    result = rolling.rolling_irfs(var_sample, 2, window=40, step=10, periods=6, trend=trend, executor=None)
+
+    assert result.irfs.shape == (6, 7, 2)
+    assert list(result.ends) == list(var_sample.index[[39, 49, 59, 69, 79, 89]])
+    for k, start in enumerate(range(0, 51, 10)):
+        expected = VAR(var_sample.iloc[start:start + 40]).fit(2, trend=trend).irf(6).orth_irfs
+        np.testing.assert_allclose(result.irfs[k], expected[:, 4, [2, 3]], atol=1e-10)
+
+
+def test_expanding_irfs_end_with_the_full_sample(var_sample):
+    """Test that the last expanding window is the full-sample model."""
+    result = rolling.rolling_irfs(var_sample, 1, window=None, min_window=30, periods=4,
+                                  impulses=['FEDFUNDS'], executor=None)
+
+    assert result.irfs.shape == (61, 5, 1)
+    expected = VAR(var_sample).fit(1).irf(4).orth_irfs
+    np.testing.assert_allclose(result.irfs[-1, :, 0], expected[:, 4, 2], atol=1e-10)
+
+
+@pytest.mark.parametrize("executor", ['thread', 'process'])
+def test_pooled_batches_match_a_single_batch(var_sample, executor):
+    """Test that splitting the windows across workers does not change the result."""
+    single = rolling.rolling_irfs(var_sample, 2, window=40, executor=None)
+    pooled = rolling.rolling_irfs(var_sample, 2, window=40, executor=executor, max_workers=2, batch_size=7)
+    np.testing.assert_allclose(pooled.irfs, single.irfs)
+
+
+def test_windows_too_short_for_the_model_raise(var_sample):
+    """Test that windows without enough observations for the lag order are rejected."""
+    with pytest.raises(ValueError):
+        rolling.rolling_irfs(var_sample, 6, window=35, executor=None)
+    with pytest.raises(ValueError):
+        rolling.rolling_irfs(var_sample, 1, window=120, executor=None)
@@ -0,0 +1,44 @@
+import sys
+sys.path.append("../src")
+
+from app import snapshot
+from app.artifacts import load_artifact, save_artifact
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+
+@pytest.fixture(scope="module")
+def fitted_model():
+    """Provides a VAR(2) fitted to simulated data."""
+    rng = np.random.default_rng(2)
+    data = pd.DataFrame(rng.normal(size=(80, 3)), columns=['FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS'])
+    return VAR(data).fit(2)
+
+
+def test_take_snapshot_copies_the_model_arrays(fitted_model):
+    """Test that the snapshot holds the coefficients, covariance and orthogonalized IRFs of the model."""
+    irf = fitted_model.irf(10)
+    taken = snapshot.take_snapshot(fitted_model, irf)
+
+    assert taken.names == ['FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS']
+    assert taken.lags == 2 and taken.periods == 10 and taken.nobs == 78
+    np.testing.assert_array_equal(taken.coefs, fitted_model.coefs)
+    np.testing.assert_array_equal(taken.sigma_u, fitted_model.sigma_u)
+    np.testing.assert_array_equal(taken.orth_irfs, irf.orth_irfs)
+    np.testing.assert_array_equal(taken.orth_stderr, irf.stderr(orth=True))
+    np.testing.assert_array_equal(taken.history, fitted_model.endog[-2:])
+
+
+def test_snapshot_round_trips_without_pickle(fitted_model, tmp_path):
+    """Test that a saved snapshot loads back unchanged from a plain .npz archive."""
+    taken = snapshot.take_snapshot(fitted_model, fitted_model.irf(4))
+    file_name = save_artifact(str(tmp_path), 'snapshot', taken)
+    assert file_name == 'snapshot.npz'
+
+    loaded = load_artifact(str(tmp_path / file_name))
+    assert loaded.names == taken.names and loaded.nobs == taken.nobs
+    for field in ('params', 'coefs', 'sigma_u', 'orth_irfs', 'orth_stderr', 'history'):
+        np.testing.assert_array_equal(getattr(loaded, field), getattr(taken, field))
@@ -0,0 +1,168 @@
+import sys
+sys.path.append("../src")
+
+from app import sources
+from app.pipeline import build_pipeline
+
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+MACRO_CSV = "./test_data/test_var.csv"
+
+
+@pytest.fixture
+def macro_db(tmp_path):
+    """Writes the test macro series into a SQLite table with ISO dates, as a database mirror would hold them."""
+    data = pd.read_csv(MACRO_CSV, usecols=list(sources.MACRO_SCHEMA.dtypes) + ['observation_date'])
+    data['observation_date'] = pd.to_datetime(data['observation_date'], format='%m/%d/%Y').dt.strftime('%Y-%m-%d')
+    path = tmp_path / "fred.db"
+    with sqlite3.connect(path) as connection:
+        data.to_sql('macro', connection, index=False)
+        connection.execute('CREATE INDEX macro_date ON macro (observation_date)')
+    return path
+
+
+def test_open_source_picks_the_source_by_location(tmp_path, macro_db):
+    """Test that files are opened by extension and SQLite URLs name their table."""
+    assert isinstance(sources.open_source('macro.csv', sources.MACRO_SCHEMA), sources.CsvSource)
+    assert isinstance(sources.open_source('macro.parquet', sources.MACRO_SCHEMA), sources.ParquetSource)
+    source = sources.open_source(f'sqlite:///{macro_db}?table=macro', sources.MACRO_SCHEMA)
+    assert isinstance(source, sources.SqlSource) and source.table == 'macro'
+    assert sources.open_source(source, sources.MACRO_SCHEMA) is source
+    with pytest.raises(ValueError):
+        sources.open_source(f'sqlite:///{macro_db}', sources.MACRO_SCHEMA)
+
+
+def test_sql_and_parquet_sources_read_like_the_csv(tmp_path, macro_db):
+    """Test that every source returns the same typed table."""
+    expected = sources.CsvSource(MACRO_CSV, sources.MACRO_SCHEMA, str(tmp_path / "cache")).read()
+    expected.astype({'observation_date': 'datetime64[us]'}).to_parquet(tmp_path / "macro.parquet")
+
+    from_sql = sources.open_source(f'sqlite:///{macro_db}?table=macro', sources.MACRO_SCHEMA).read()
+    from_parquet = sources.open_source(str(tmp_path / "macro.parquet"), sources.MACRO_SCHEMA).read()
+    for data in (from_sql, from_parquet):
+        pd.testing.assert_frame_equal(data[expected.columns], expected, check_dtype=False)
+        assert pd.api.types.is_datetime64_any_dtype(data['observation_date'])
+
+
+def test_sql_fingerprint_changes_only_with_the_data(macro_db):
+    """Test that the change query catches appended and revised rows but not unrelated writes."""
+    source = sources.open_source(f'sqlite:///{macro_db}?table=macro', sources.MACRO_SCHEMA)
+    first = source.fingerprint()
+    assert source.fingerprint() == first
+
+    with sqlite3.connect(macro_db) as connection:
+        connection.execute('CREATE TABLE notes (text TEXT)')
+        connection.execute("INSERT INTO notes VALUES ('unrelated')")
+    assert source.fingerprint() == first
+
+    with sqlite3.connect(macro_db) as connection:
+        connection.execute("UPDATE macro SET FEDFUNDS = FEDFUNDS + 0.25 WHERE observation_date = "
+                           "(SELECT MIN(observation_date) FROM macro)")
+    revised = source.fingerprint()
+    assert revised != first
+
+    with sqlite3.connect(macro_db) as connection:
+        connection.execute("INSERT INTO macro SELECT FEDFUNDS, CORESTICKM159SFRBATL, INDPRO, LAYOFFS, UNCERTAINTY, "
+                           "'2099-01-01' FROM macro LIMIT 1")
+    assert source.fingerprint() not in (first, revised)
+
+
+def test_file_fingerprint_rehashes_only_after_a_change(tmp_path):
+    """Test that an untouched file is not read again, and a modified one is."""
+    path = tmp_path / "layoffs.csv"
+    path.write_text("a,b\n1,2\n")
+    past = time.time() - 60
+    os.utime(path, (past, past))
+
+    first = sources.file_fingerprint(str(path))
+    with patch('app.sources.file_sha256') as mock_hash:
+        assert sources.file_fingerprint(str(path)) == first
+        mock_hash.assert_not_called()
+
+    path.write_text("a,b\n1,3\n")
+    assert sources.file_fingerprint(str(path)) != first
+
+
+def test_sources_must_implement_read_and_fingerprint(tmp_path):
+    """Test that a source missing part of the interface cannot be created."""
+    with pytest.raises(TypeError):
+        sources.FileSource(str(tmp_path / "layoffs.csv"), sources.LAYOFFS_SCHEMA)
+
+
+def test_pool_reuses_connections_up_to_its_size():
+    """Test that connections are opened on demand, returned for reuse, and bounded in number."""
+    opened = []
+
+    def connect():
+        opened.append(sqlite3.connect(':memory:', check_same_thread=False))
+        return opened[-1]
+
+    pool = sources.ConnectionPool(connect, size=2, timeout=0.1)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        assert again is first
+
+    with pool.connection(), pool.connection():
+        assert len(opened) == 2
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+    pool.close()
+
+
+def test_pool_serves_concurrent_readers(macro_db):
+    """Test that threads sharing a pool all read the table."""
+    source = sources.open_source(f'sqlite:///{macro_db}?table=macro', sources.MACRO_SCHEMA)
+    lengths = []
+    threads = [threading.Thread(target=lambda: lengths.append(len(source.read()))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert lengths == [len(source.read())] * 8
+
+
+def test_pipeline_keys_follow_the_database(macro_db):
+    """Test that a database-backed pipeline fits the same model and its keys change only with the data."""
+    location = f'sqlite:///{macro_db}?table=macro'
+    from_csv = build_pipeline('missing_layoffs.csv', MACRO_CSV, maxlags=2)
+    from_sql = build_pipeline('missing_layoffs.csv', location, maxlags=2)
+    pd.testing.assert_frame_equal(from_sql.get('lag_selection'), from_csv.get('lag_selection'))
+
+    key = from_sql.key('fit')
+    assert build_pipeline('missing_layoffs.csv', location, maxlags=2).key('fit') == key
+    with sqlite3.connect(macro_db) as connection:
+        connection.execute("UPDATE macro SET LAYOFFS = LAYOFFS + 1 WHERE rowid = 5")
+    assert build_pipeline('missing_layoffs.csv', location, maxlags=2).key('fit') != key
+
+
+def test_sql_fingerprint_catches_revised_categories(tmp_path):
+    """Test that revising or moving a text value changes the fingerprint, though no number or date changed."""
+    layoffs = pd.DataFrame({'Company': ['Acme', 'Globex', 'Initech'],
+                            'Location HQ': ['SF Bay Area', 'Seattle', 'Austin'],
+                            '# Laid Off': [100., 50., 20.], '%': [0.1, 0.05, None],
+                            'Industry': ['Retail', 'Finance', 'Retail'], 'Stage': ['Series B', 'IPO', 'Seed'],
+                            '$ Raised (mm)': [40., 500., 2.], 'Country': ['United States'] * 3,
+                            'Date': ['2023-01-05', '2023-02-01', '2023-03-15']})
+    path = tmp_path / "layoffs.db"
+    with sqlite3.connect(path) as connection:
+        layoffs.to_sql('layoffs', connection, index=False)
+    source = sources.open_source(f'sqlite:///{path}?table=layoffs', sources.LAYOFFS_SCHEMA)
+    fingerprints = [source.fingerprint()]
+
+    for statement in ("UPDATE layoffs SET Industry = 'Crypto' WHERE rowid = 1",
+                      "UPDATE layoffs SET Industry = 'Retail' WHERE rowid = 2",
+                      "UPDATE layoffs SET Industry = 'Finance' WHERE rowid = 3",
+                      "UPDATE layoffs SET Stage = 'Series C' WHERE rowid = 3"):
+        with sqlite3.connect(path) as connection:
+            connection.execute(statement)
+        fingerprints.append(source.fingerprint())
+    assert len(set(fingerprints)) == len(fingerprints)
+    assert source.read()['Industry'].tolist() == ['Crypto', 'Retail', 'Finance']
@@ -0,0 +1,117 @@
+import sys
+sys.path.append("../src")
+
+from app import specsearch
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+
+@pytest.fixture(scope="module")
+def macro():
+    """Provides simulated macro data in levels with the app's column names."""
+    rng = np.random.default_rng(7)
+    levels = np.cumsum(rng.normal(size=(150, 5)), axis=0) * 0.1 + rng.normal(size=(150, 5))
+    return pd.DataFrame(levels, columns=specsearch.RAW_VARIABLES,
+                        index=pd.date_range('2005-01-01', periods=150, freq='MS'))
+
+
+def test_specification_grid_enumerates_subsets_differencing_and_trends():
+    """Test that every subset containing the response is combined with every differencing choice and trend."""
+    grid = specsearch.specification_grid()
+    # Subsets of the four other variables with at least one member, each variable in levels or differenced
+    assert len(grid) == (4 * 2 ** 2 + 6 * 2 ** 3 + 4 * 2 ** 4 + 2 ** 5) * len(specsearch.TRENDS)
+    assert len(set(grid)) == len(grid)
+    assert specsearch.BASELINE in grid
+    assert all(spec.variables[-1] == 'LAYOFFS' for spec in grid)
+
+    fixed = specsearch.specification_grid(['FEDFUNDS', 'LAYOFFS'], differencing={'LAYOFFS': (False,)}, trends=['c'])
+    assert fixed == [specsearch.Specification(('FEDFUNDS', 'LAYOFFS'), (False, False), 'c'),
+                     specsearch.Specification(('FEDFUNDS', 'LAYOFFS'), (True, False), 'c')]
+
+
+def test_baseline_columns_match_the_app():
+    """Test that the baseline specification uses the columns of var.difference_variables."""
+    assert specsearch.BASELINE.columns == ['D_INDPRO', 'INFLATION', 'FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS']
+
+
+def test_search_matches_statsmodels(macro):
+    """Test that the chosen lag order, criteria and summed responses equal those of VAR(...).fit."""
+    spec = specsearch.Specification(('CORESTICKM159SFRBATL', 'FEDFUNDS', 'LAYOFFS'), (True, False, True), 'ct')
+    table = specsearch.search_specifications(macro, [spec], maxlags=4, orderings='all', executor=None)
+    panel = specsearch.specification_panel(macro)
+    assert len(table) == 3 * 6
+
+    for _, row in table.iterrows():
+        order = [{'INFLATION': 'CORESTICKM159SFRBATL'}.get(name, name) for name in row['Ordering'].split(' < ')]
+        columns = [spec.columns[spec.variables.index(variable)] for variable in order]
+        model = VAR(panel[columns]).fit(row['Lags'], trend='ct')
+        criteria = {lag: VAR(panel[columns]).fit(lag, trend='ct').info_criteria for lag in range(1, 5)}
+        assert row['Lags'] == min(criteria, key=lambda lag: criteria[lag][row['Criterion'].lower()])
+        assert row['AIC'] == pytest.approx(model.aic) and row['BIC'] == pytest.approx(model.bic)
+
+        responses = model.irf(20).orth_irfs[:specsearch.RESPONSE_HORIZON + 1].sum(axis=0)
+        assert row['H1: FEDFUNDS -> LAYOFFS'] == pytest.approx(
+            responses[columns.index('D_LAYOFFS'), columns.index('FEDFUNDS')])
+        assert row['H2: INFLATION -> LAYOFFS'] == pytest.approx(
+            responses[columns.index('D_LAYOFFS'), columns.index('INFLATION')])
+        assert np.isnan(row['H3: INDPRO -> LAYOFFS'])
+
+
+@pytest.mark.parametrize("executor", ['thread', 'process'])
+def test_pools_match_a_serial_search(macro, executor):
+    """Test that splitting the grid across a pool, through shared memory for processes, changes nothing."""
+    grid = specsearch.specification_grid(['FEDFUNDS', 'UNCERTAINTY', 'LAYOFFS'], trends=['c'])
+    serial = specsearch.search_specifications(macro, grid, maxlags=3, executor=None)
+    pooled = specsearch.search_specifications(macro, grid, maxlags=3, executor=executor, max_workers=2, batch_size=3)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+def test_table_is_ranked_with_stable_models_first(macro):
+    """Test that stable models come first, each group sorted by the ranking criterion."""
+    table = specsearch.search_specifications(macro, specsearch.specification_grid(trends=['c']), maxlags=2,
+                                             rank_by='BIC', executor=None)
+    assert list(table.index) == list(range(1, len(table) + 1))
+    stable = table['Stable'].to_numpy()
+    assert not np.any(~stable[:-1] & stable[1:])
+    for _, group in table.groupby('Stable'):
+        assert group['BIC'].is_monotonic_increasing
+
+
+def test_shared_arrays_round_trip():
+    """Test that a worker attaching to the shared block sees the arrays, read-only."""
+    arrays = {'gram': np.arange(24.).reshape(2, 3, 4), 'nobs': np.array([7])}
+    block, layout = specsearch._share(arrays)
+    try:
+        attached = specsearch._attach(layout)
+        np.testing.assert_array_equal(attached['gram'], arrays['gram'])
+        assert attached['nobs'][0] == 7
+        assert not attached['gram'].flags.writeable
+    finally:
+        attached_block, _ = specsearch._ATTACHED.pop(layout['name'])
+        del attached
+        attached_block.close()
+        block.close()
+        block.unlink()
+
+
+def test_hypothesis_support_counts_stable_models():
+    """Test that support is the share of stable models whose response has the expected sign."""
+    table = pd.DataFrame({'Stable': [True, True, True, False],
+                          'H1: FEDFUNDS -> LAYOFFS': [1., -1., 2., 5.],
+                          'H2: INFLATION -> LAYOFFS': [np.nan, np.nan, 1., 1.],
+                          'H3: INDPRO -> LAYOFFS': [-1., -2., -3., 1.],
+                          'H4: UNCERTAINTY -> LAYOFFS': [-1., -1., -1., 1.]})
+    support = specsearch.hypothesis_support(table)
+
+    assert support['Models'].tolist() == [3, 1, 3, 3]
+    assert support['Share supporting'].tolist() == pytest.approx([2 / 3, 1., 1., 0.])
+    assert support.loc['H1: FEDFUNDS -> LAYOFFS', 'Median response'] == 1.
+
+
+def test_unknown_executor():
+    """Test that an unknown executor is rejected."""
+    with pytest.raises(ValueError):
+        specsearch.search_specifications(pd.DataFrame(), [], executor='cluster')
@@ -0,0 +1,83 @@
+import sys
+sys.path.append("../src")
+
+from app import stationarity
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+from statsmodels.tsa.stattools import adfuller
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Starts every test with an empty ADF cache."""
+    stationarity.clear_adf_cache()
+    yield
+    stationarity.clear_adf_cache()
+
+
+@pytest.fixture
+def sample():
+    """Provides a random walk, a white noise series and a column with missing values."""
+    rng = np.random.default_rng(2)
+    noise = rng.normal(size=120)
+    return pd.DataFrame({
+        'WALK': noise.cumsum(),
+        'NOISE': rng.normal(size=120),
+        'GAPPY': np.r_[np.nan, rng.normal(size=119)],
+    })
+
+
+@pytest.mark.parametrize("executor", [None, 'thread', 'process'])
+def test_adf_tests_match_adfuller(sample, executor):
+    """Test that every row matches a direct adfuller call, whatever the executor."""
+    table = stationarity.adf_tests(sample, ['WALK', 'NOISE', 'GAPPY'], maxlag=2, executor=executor, max_workers=2)
+
+    assert list(table.columns) == stationarity.ADF_COLUMNS
+    assert list(table['Variable']) == ['WALK', 'NOISE', 'GAPPY']
+    for _, row in table.iterrows():
+        expected = adfuller(sample[row['Variable']].dropna(), 2)
+        assert row['ADF Statistic'] == pytest.approx(expected[0])
+        assert row['p-value'] == pytest.approx(expected[1])
+        assert row['Observations'] == expected[3]
+        assert row['Critical 5%'] == pytest.approx(expected[4]['5%'])
+
+
+def test_adf_tests_without_lag_selection(sample):
+    """Test that a fixed lag, whose adfuller result has no information criterion, gives a row with a missing IC."""
+    table = stationarity.adf_tests(sample, ['WALK', 'NOISE'], maxlag=3, autolag=None)
+
+    for _, row in table.iterrows():
+        stat, pvalue, usedlag, nobs, critical = adfuller(sample[row['Variable']], 3, 'c', None)
+        assert row['ADF Statistic'] == pytest.approx(stat)
+        assert row['p-value'] == pytest.approx(pvalue)
+        assert row['Used Lag'] == usedlag == 3
+        assert row['Observations'] == nobs
+        assert row['Critical 5%'] == pytest.approx(critical['5%'])
+        assert np.isnan(row['IC Best'])
+
+
+def test_adf_tests_are_cached_by_values_and_settings(sample):
+    """Test that a series is only tested again when its values or the settings change."""
+    with patch('app.stationarity.adfuller', wraps=adfuller) as mock_adfuller:
+        stationarity.adf_tests(sample, ['WALK', 'NOISE'])
+        assert mock_adfuller.call_count == 2
+
+        # Same values under another name hit the cache
+        stationarity.adf_tests(sample.rename(columns={'WALK': 'LEVELS'}), ['LEVELS', 'NOISE'])
+        assert mock_adfuller.call_count == 2
+
+        stationarity.adf_tests(sample, ['WALK'], maxlag=1)
+        assert mock_adfuller.call_count == 3
+
+        changed = sample.assign(NOISE=sample['NOISE'] + 1)
+        stationarity.adf_tests(changed, ['WALK', 'NOISE'])
+        assert mock_adfuller.call_count == 4
+
+
+def test_adf_tests_rejects_unknown_executor(sample):
+    """Test that an unknown executor raises an error."""
+    with pytest.raises(ValueError):
+        stationarity.adf_tests(sample, ['WALK'], executor='gpu')
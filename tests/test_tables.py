@@ -0,0 +1,78 @@
+import sys
+sys.path.append("../src")
+
+from app import tables
+
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def layoffs():
+    """Provides a small layoffs table with a missing industry and a missing date."""
+    return pd.DataFrame({
+        'Company': pd.array(['A', 'B', 'C', 'D', 'E', 'F'], dtype='string'),
+        'Industry': pd.Categorical(['Retail', 'Crypto', None, 'Retail', 'Finance', 'Crypto']),
+        'Stage': pd.Categorical(['Seed', 'Seed', 'Series A', 'Post-IPO', 'Seed', 'Series A']),
+        'Date': pd.to_datetime(['2023-03-01', '2023-01-15', '2022-12-31', None, '2023-01-01', '2023-02-01']),
+        '# Laid Off': [10., 20., 30., 40., 50., 60.],
+    })
+
+
+def test_select_without_filters_returns_every_row(layoffs):
+    """Test that an empty query keeps all rows in table order."""
+    np.testing.assert_array_equal(tables.LayoffsTable(layoffs).select(), np.arange(6))
+
+
+def test_select_matches_a_boolean_filter(layoffs):
+    """Test that category and date filters select the same rows as comparing the columns."""
+    table = tables.LayoffsTable(layoffs)
+    start, end = datetime.date(2023, 1, 1), datetime.date(2023, 2, 1)
+    rows = table.select({'Industry': ['Crypto', 'Finance'], 'Stage': ['Seed', 'Series A']}, start, end)
+
+    expected = (layoffs['Industry'].isin(['Crypto', 'Finance']) & layoffs['Stage'].isin(['Seed', 'Series A'])
+                & layoffs['Date'].between(pd.Timestamp(start), pd.Timestamp(end)))
+    np.testing.assert_array_equal(rows, np.flatnonzero(expected))
+    np.testing.assert_array_equal(rows, [1, 4, 5])
+
+
+def test_select_skips_empty_filters_and_open_date_bounds(layoffs):
+    """Test that an unselected column is not filtered and a missing bound leaves the range open."""
+    table = tables.LayoffsTable(layoffs)
+    np.testing.assert_array_equal(table.select({'Industry': [], 'Stage': ['Seed']}), [0, 1, 4])
+    # The undated row never falls inside a date range
+    np.testing.assert_array_equal(table.select(start=datetime.date(2023, 2, 1)), [0, 5])
+    np.testing.assert_array_equal(table.select(end=datetime.date(2022, 12, 31)), [2])
+
+
+def test_options_and_date_bounds(layoffs):
+    """Test that the filter options are the observed categories and the bounds ignore missing dates."""
+    table = tables.LayoffsTable(layoffs)
+    assert table.options('Industry') == ['Crypto', 'Finance', 'Retail']
+    assert table.date_bounds == (datetime.date(2022, 12, 31), datetime.date(2023, 3, 1))
+
+
+def test_date_bounds_without_dates(layoffs):
+    """Test that a table with no dated rows has no date bounds and still selects every row."""
+    undated = layoffs.assign(Date=pd.NaT)
+    assert tables.LayoffsTable(undated).date_bounds is None
+    assert tables.LayoffsTable(layoffs.iloc[:0]).date_bounds is None
+    np.testing.assert_array_equal(tables.LayoffsTable(undated).select(), np.arange(6))
+
+
+def test_page_projects_columns_without_copying_the_table(layoffs):
+    """Test that a page holds only the requested rows and columns, keeping the original labels."""
+    table = tables.LayoffsTable(layoffs)
+    page = table.page(np.array([1, 3, 4, 5]), 2, 3, ['# Laid Off', 'Company'])
+
+    assert list(page.columns) == ['# Laid Off', 'Company']
+    assert list(page.index) == [5]
+    assert table.page(np.array([1, 3]), 1, 25).equals(layoffs.iloc[[1, 3]])
+
+
+@pytest.mark.parametrize("rows, size, expected", [(0, 25, 1), (25, 25, 1), (26, 25, 2), (1199, 50, 24)])
+def test_page_count(rows, size, expected):
+    """Test that partial pages count and an empty selection still has one page."""
+    assert tables.page_count(rows, size) == expected
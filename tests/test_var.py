@@ -3,8 +3,10 @@ sys.path.append("../src")
 
 from app import var
 
+import numpy as np
 import pandas as pd
 import pytest
+from statsmodels.tsa.api import VAR
 from unittest.mock import Mock, patch
 import sys
 
@@ -67,18 +69,17 @@ def test_difference_variables():
         "The function should drop rows with NaN values resulting from differencing."
     
 
+@pytest.fixture
+def var_sample():
+    """Provides a stationary five-variable sample long enough to fit several lags."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.normal(size=(60, 5)),
+                        columns=["D_INDPRO", "INFLATION", "FEDFUNDS", "UNCERTAINTY", "LAYOFFS"])
+
+
 @pytest.mark.parametrize("maxlags", [1, 2, 3])
-def test_fit_var_model_and_select_lags(maxlags):
+def test_fit_var_model_and_select_lags(maxlags, var_sample):
     """Test fitting a VAR model and selecting optimal lags."""
-    # Create a sample DataFrame
-    raw_data = pd.DataFrame({
-        "D_INDPRO": [0.1, 0.2, 0.3],
-        "INFLATION": [0.01, 0.02, 0.03],
-        "FEDFUNDS": [1.5, 1.7, 1.8],
-        "UNCERTAINTY": [30, 40, 50],
-        "LAYOFFS": [1000, 1100, 1200]
-    })
-
     # Setup the mock to have aic, hqic, and bic attributes
     fit_result_mock = Mock()
     fit_result_mock.aic = 1.0
@@ -91,9 +92,41 @@ def test_fit_var_model_and_select_lags(maxlags):
         
         mock_var.return_value = mock_model
 
-        fitted_model, results_df = var.fit_var_model_and_select_lags(raw_data, maxlags)
+        fitted_model, results_df = var.fit_var_model_and_select_lags(var_sample, maxlags)
 
         assert isinstance(fitted_model, Mock), "The function should return a fitted model mock."
         assert isinstance(results_df, pd.DataFrame), "The function should return a DataFrame of AIC, HQIC, and BIC values."
         assert not results_df.empty, "The results DataFrame should not be empty."
-        assert mock_model.fit.call_count == maxlags + 1, f"VAR model should fit for each lag up to maxlags and once more with the best lag, expected {maxlags + 1} calls."
+        assert list(results_df.index) == list(range(1, maxlags + 1))
+        mock_model.fit.assert_called_once_with(results_df['AIC'].idxmin())
+
+
+def test_build_lag_matrix():
+    """Test that the lag matrix holds the trend and zero-filled lags of every order."""
+    values = np.arange(8, dtype=float).reshape(4, 2)
+    design = var.build_lag_matrix(values, 2, trend='ct')
+
+    assert design.shape == (4, 2 + 2 * 2)
+    assert list(design[:, 0]) == [1, 1, 1, 1]
+    assert list(design[:, 1]) == [1, 2, 3, 4]
+    assert list(design[3, 2:]) == [4, 5, 2, 3]
+    assert list(design[1, 2:]) == [0, 1, 0, 0]
+
+
+@pytest.mark.parametrize("trend", ['n', 'c', 'ct'])
+def test_select_lag_order_matches_statsmodels(trend, var_sample):
+    """Test that the one-pass information criteria match a separate fit for every lag."""
+    results_df = var.select_lag_order(var_sample, 4, trend=trend)
+
+    model = VAR(var_sample)
+    for lag in range(1, 5):
+        result = model.fit(lag, trend=trend)
+        assert results_df.loc[lag, 'AIC'] == pytest.approx(result.aic)
+        assert results_df.loc[lag, 'HQIC'] == pytest.approx(result.hqic)
+        assert results_df.loc[lag, 'BIC'] == pytest.approx(result.bic)
+
+
+def test_select_lag_order_rejects_too_many_lags(var_sample):
+    """Test that a lag order without residual degrees of freedom raises an error."""
+    with pytest.raises(ValueError):
+        var.select_lag_order(var_sample.iloc[:10], 4)